@@ -0,0 +1,114 @@
+"""
+Benchmark for the text-area crop sent with each extraction request.
+
+Compares the original crop (2x LANCZOS upscale, PNG written to a temp file
+and read back) with the in-memory crop of extract_album_data in each payload
+format, reporting CPU time per image and bytes per request. Uses the
+calendar photos in data/png-images when there are any, otherwise synthetic
+pages the size of a phone photo.
+
+    uv run python benchmarks/bench_crop.py [--images DIR] [--pages 8] [--size 3024x4032]
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+from catalogue import BACKEND_ROOT, PROJECT_ROOT, load_albums
+
+sys.path.insert(0, os.path.join(BACKEND_ROOT, "src", "scripts"))
+# The module creates its Gemini client on import; no request is made here
+os.environ.setdefault("GEMINI_API_KEY", "unused")
+
+import extract_album_data
+
+
+def legacy_crop(image_path: str) -> tuple[bytes, str]:
+    """The crop extract_album_data used before, including the temp file round trip."""
+    img = Image.open(image_path)
+    width, height = img.size
+    cropped = img.crop((0, int(height * 0.5), width, height))
+    cropped = cropped.resize((cropped.width * 2, cropped.height * 2), Image.Resampling.LANCZOS)
+    tmp = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
+    cropped.save(tmp.name, "PNG")
+    with open(tmp.name, "rb") as f:
+        data = f.read()
+    os.unlink(tmp.name)
+    return data, "image/png"
+
+
+def synthetic_pages(directory: str, count: int, size: tuple[int, int], seed: int = 7) -> list[str]:
+    """Calendar-like pages: a noisy photo background, a cover, and printed text lines."""
+    rng = random.Random(seed)
+    albums = [a for a in load_albums() if a["title"] and a["artist"]]
+    width, height = size
+    paths = []
+    for i in range(count):
+        album = rng.choice(albums)
+        noise = Image.effect_noise(size, 24).convert("RGB")
+        page = Image.blend(Image.new("RGB", size, (236, 230, 218)), noise, 0.25)
+        draw = ImageDraw.Draw(page)
+        draw.rectangle((width // 8, height // 10, width * 7 // 8, height * 6 // 10),
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+        lines = [album["artist"], album["title"], f"{album['label_name'] or 'Blue Note'}, {album['release_year']}"]
+        for n, line in enumerate(lines):
+            draw.text((width // 2, height * 7 // 10 + n * height // 40), line, fill=(20, 20, 20),
+                      font_size=height // 60)
+        draw.text((width // 12, height * 9 // 10), f"{i + 1:02d} JAN", fill=(20, 20, 20), font_size=height // 30)
+        path = os.path.join(directory, f"page{i:03d}.png")
+        page.save(path, "PNG")
+        paths.append(path)
+    return paths
+
+
+def measure(crop, paths: list[str], rounds: int) -> tuple[float, float, float, tuple[int, int]]:
+    """CPU seconds and wall seconds per image, mean payload bytes, and payload size in pixels."""
+    total_bytes = 0
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for _ in range(rounds):
+        for path in paths:
+            data, _ = crop(path)
+            total_bytes += len(data)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    with Image.open(io.BytesIO(crop(paths[0])[0])) as img:
+        dimensions = img.size
+    n = rounds * len(paths)
+    return cpu / n, wall / n, total_bytes / n, dimensions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--images", default=os.path.join(PROJECT_ROOT, "data", "png-images"),
+                        help="directory of calendar photos, if it exists")
+    parser.add_argument("--pages", type=int, default=8, help="synthetic pages when there are no photos")
+    parser.add_argument("--size", default="3024x4032", help="synthetic page size (default: 12 MP phone photo)")
+    parser.add_argument("--rounds", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if os.path.isdir(args.images) and extract_album_data.find_png_files(args.images):
+            paths, source = extract_album_data.find_png_files(args.images), args.images
+        else:
+            size = tuple(int(n) for n in args.size.split("x"))
+            paths, source = synthetic_pages(tmp, args.pages, size), f"{args.pages} synthetic {args.size} pages"
+
+        print(f"{len(paths)} images from {source}")
+        print(f"  {'variant':<16} {'CPU ms/image':>12} {'wall ms':>9} {'KB/request':>11}  payload")
+        variants = [("legacy temp PNG", legacy_crop)] + [
+            (f"in-memory {fmt}", lambda path, fmt=fmt: extract_album_data._crop_text_area(path, fmt))
+            for fmt in ("png", "jpeg", "webp")
+        ]
+        for label, crop in variants:
+            cpu, wall, size, (w, h) = measure(crop, paths, args.rounds)
+            print(f"  {label:<16} {cpu * 1000:12.0f} {wall * 1000:9.0f} {size / 1024:11.0f}  {w}x{h}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Micro-benchmark for recommendation email rendering.
+
+Renders one email per simulated recipient for albums from the catalogue
+export, once with the per-album fragment cache and once rendering every
+email from scratch, and prints the per-email cost of each.
+
+    uv run python benchmarks/bench_email_template.py [--emails 20000] [--albums 30]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from catalogue import BACKEND_ROOT, load_albums
+
+sys.path.insert(0, os.path.join(BACKEND_ROOT, "src"))
+
+import email_template
+from email_template import render_recommendation_email
+
+
+def run(emails: int, albums: list[dict]) -> float:
+    """Render `emails` emails round-robin over `albums`; returns seconds per email."""
+    start = time.perf_counter()
+    for i in range(emails):
+        render_recommendation_email(
+            f"Listener {i}", albums[i % len(albums)], f"https://jazzy.example/unsubscribe?token={i}"
+        )
+    return (time.perf_counter() - start) / emails
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--emails", type=int, default=20000)
+    parser.add_argument("--albums", type=int, default=30, help="distinct albums sent in one run")
+    args = parser.parse_args()
+
+    albums = load_albums(args.albums)
+    cached_fragments = email_template._render_album_fragments
+
+    email_template._render_album_fragments = cached_fragments.__wrapped__
+    uncached = run(args.emails, albums)
+
+    email_template._render_album_fragments = cached_fragments
+    cached_fragments.cache_clear()
+    cached = run(args.emails, albums)
+
+    print(f"{args.emails} emails over {len(albums)} albums")
+    print(f"  uncached: {uncached * 1e6:8.2f} µs/email")
+    print(f"  cached:   {cached * 1e6:8.2f} µs/email  ({uncached / cached:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
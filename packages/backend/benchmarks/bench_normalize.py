@@ -0,0 +1,155 @@
+"""
+Micro-benchmark for fuzzy matching of iTunes/Spotify search results.
+
+Runs the result matchers of add_streaming_links over a corpus of search
+responses, once with the original per-call normalization and once with the
+compiled, memoized text_normalize module, checks that both pick the same
+albums, and prints matching throughput.
+
+The corpus is read from a recorded HTTP cache (output/http-cache.sqlite3,
+written by the seeding scripts) when one exists; otherwise it is built from
+the catalogue export, with accented, reissue and punctuation variants.
+
+    uv run python benchmarks/bench_normalize.py [--cache output/http-cache.sqlite3] [--rounds 3]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import time
+import unicodedata
+
+from catalogue import BACKEND_ROOT, load_albums
+
+sys.path.insert(0, os.path.join(BACKEND_ROOT, "src", "scripts"))
+
+import add_streaming_links
+import match_ranking
+import text_normalize
+
+RESULTS_PER_RESPONSE = 25
+
+
+def legacy_normalize(text: str) -> str:
+    """The normalization add_streaming_links used before text_normalize."""
+    text = unicodedata.normalize("NFD", text)
+    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+    text = text.lower()
+    text = re.sub(r"[''`]", "'", text)
+    text = text.replace("&", "and")
+    text = re.sub(r"[^\w\s]", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+def _variant(rng: random.Random, text: str) -> str:
+    return rng.choice([
+        text,
+        text.upper(),
+        f"{text} (Remastered)",
+        f"{text} [Deluxe Edition]",
+        text.replace("a", "á").replace("e", "é"),
+        text.replace(" and ", " & "),
+        f"{text}: Live",
+    ])
+
+
+def synthetic_corpus(seed: int = 7) -> list[dict]:
+    """One iTunes-style and one Spotify-style response per catalogue album."""
+    rng = random.Random(seed)
+    albums = [a for a in load_albums() if a["title"] and a["artist"]]
+    corpus = []
+    for album in albums:
+        others = rng.sample(albums, RESULTS_PER_RESPONSE - 1)
+        picks = others[: rng.randrange(RESULTS_PER_RESPONSE)] + [album] + others
+        picks = picks[:RESULTS_PER_RESPONSE]
+        year = album["release_year"] or 1960
+        itunes = [
+            {"collectionName": _variant(rng, p["title"]), "artistName": _variant(rng, p["artist"]),
+             "releaseDate": f"{rng.choice([year, year + 20])}-01-01T08:00:00Z",
+             "collectionViewUrl": f"https://music.apple.com/ch/album/{i}", "artworkUrl100": "a/100x100bb.jpg"}
+            for i, p in enumerate(picks)
+        ]
+        spotify = [
+            {"name": r["collectionName"], "artists": [{"name": r["artistName"]}],
+             "release_date": r["releaseDate"][:10], "external_urls": {"spotify": r["collectionViewUrl"]}}
+            for r in itunes
+        ]
+        query = (album["title"], album["artist"], album["release_year"])
+        corpus.append({"query": query, "itunes": itunes, "spotify": spotify})
+    return corpus
+
+
+def recorded_corpus(path: str) -> list[dict]:
+    """Responses from the HTTP cache; each is matched against its first result's album."""
+    corpus = []
+    with sqlite3.connect(path) as db:
+        for (value,) in db.execute("SELECT value FROM entries"):
+            data = json.loads(value)
+            itunes = data.get("results") if isinstance(data, dict) else None
+            spotify = (data.get("albums") or {}).get("items") if isinstance(data, dict) else None
+            if itunes and itunes[0].get("collectionName"):
+                first = itunes[0]
+                query = (first["collectionName"], first.get("artistName", ""), None)
+                corpus.append({"query": query, "itunes": itunes, "spotify": []})
+            elif spotify and spotify[0].get("artists"):
+                first = spotify[0]
+                query = (first["name"], first["artists"][0]["name"], None)
+                corpus.append({"query": query, "itunes": [], "spotify": spotify})
+    return corpus
+
+
+def run(corpus: list[dict], rounds: int) -> tuple[float, list]:
+    """Match every response `rounds` times; returns (seconds per result, picks)."""
+    picks = []
+    results = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        picks = []
+        for entry in corpus:
+            title, artist, year = entry["query"]
+            picks.append((
+                add_streaming_links._match_apple_result(entry["itunes"], title, artist, year),
+                add_streaming_links._match_spotify_result(entry["spotify"], title, artist, year),
+                add_streaming_links._match_apple_result_loose(entry["itunes"], artist, year),
+            ))
+            results += len(entry["itunes"]) + len(entry["spotify"])
+    return (time.perf_counter() - start) / results, picks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--cache", default=os.path.join(BACKEND_ROOT, "output", "http-cache.sqlite3"),
+                        help="recorded HTTP cache to read responses from, if it exists")
+    parser.add_argument("--rounds", type=int, default=3, help="passes over the corpus (memo stays warm)")
+    args = parser.parse_args()
+
+    if os.path.exists(args.cache):
+        corpus, source = recorded_corpus(args.cache), args.cache
+    else:
+        corpus, source = synthetic_corpus(), "synthetic corpus from the catalogue export"
+
+    # Token sets are memoized on top of normalize; each run starts cold
+    add_streaming_links.normalize = match_ranking.normalize = legacy_normalize
+    match_ranking.tokens.cache_clear()
+    legacy, legacy_picks = run(corpus, args.rounds)
+
+    add_streaming_links.normalize = match_ranking.normalize = text_normalize.normalize
+    text_normalize.normalize.cache_clear()
+    match_ranking.tokens.cache_clear()
+    compiled, compiled_picks = run(corpus, args.rounds)
+
+    assert legacy_picks == compiled_picks, "normalizations picked different albums"
+    print(f"{len(corpus)} responses from {source}, {args.rounds} round(s)")
+    print(f"  legacy:   {legacy * 1e6:6.2f} µs/result  ({1 / legacy:>10,.0f} results/s)")
+    print(f"  compiled: {compiled * 1e6:6.2f} µs/result  ({1 / compiled:>10,.0f} results/s, {legacy / compiled:.1f}x)")
+    info = text_normalize.normalize.cache_info()
+    print(f"  memo: {info.hits} hits, {info.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Offline benchmark for the album enrichment pipeline.
+
+Runs main.py's pipeline in-process against an in-memory database seeded from
+the catalogue export (links, covers and summaries cleared), with iTunes,
+Spotify and Perplexity served from recorded HTTP cassettes (see
+src/scripts/cassette.py) after a fixed simulated latency. Album extraction is
+skipped: it reads local images through Gemini, not HTTP. Prints the time of
+each step and writes a JSON report that later runs can be compared against.
+
+    # once, with network access and API keys in .env.local
+    uv run python benchmarks/bench_pipeline.py --record
+    # then, offline
+    uv run python benchmarks/bench_pipeline.py [--latency-ms 100] [--compare output/bench-pipeline.json]
+
+Rate limiters still pace replayed requests as they would live; raise
+ITUNES_SEARCH_RPS / ITUNES_LOOKUP_RPS / SPOTIFY_RPS to take them out of the
+measurement.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+
+from catalogue import BACKEND_ROOT, load_albums
+from fake_supabase import FakeSupabaseClient
+
+sys.path.insert(0, os.path.join(BACKEND_ROOT, "src"))
+sys.path.insert(0, os.path.join(BACKEND_ROOT, "src", "scripts"))
+
+DEFAULT_REPORT = os.path.join(BACKEND_ROOT, "output", "bench-pipeline.json")
+# Columns the enrichment steps fill in
+ENRICHED_COLUMNS = (
+    "streaming_link_spotify", "streaming_link_apple", "cover_image_url",
+    "artist_summary", "album_summary",
+)
+
+
+def seed_albums(limit: int | None) -> list[dict]:
+    """Catalogue albums as the extraction step leaves them."""
+    albums = load_albums(limit)
+    for album in albums:
+        for column in ENRICHED_COLUMNS:
+            album[column] = None
+        album["apple_link_is_substitute"] = album["spotify_link_is_substitute"] = False
+    return albums
+
+
+def run_pipeline(db: FakeSupabaseClient) -> dict[str, float]:
+    """main.main() with each script run in-process against `db`; returns step timings."""
+    import main
+
+    timings: dict[str, float] = {}
+
+    def run_step(script_path: str, label: str) -> None:
+        if script_path == main.EXTRACT_SCRIPT:
+            print(f"Skipping {label} (not recorded).")
+            return
+        print(f"Running {label}...")
+        module = importlib.import_module(os.path.splitext(os.path.basename(script_path))[0])
+        module.get_supabase_client = lambda: db
+        start = time.perf_counter()
+        try:
+            module.main()
+        except SystemExit as e:
+            raise RuntimeError(f"{label} failed (exit code {e.code})")
+        timings[label] = time.perf_counter() - start
+
+    main.run_script = run_step
+    start = time.perf_counter()
+    main.main()
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+def _print_comparison(report: dict, baseline: dict) -> None:
+    print(f"\nCompared with {baseline.get('recorded_at', 'baseline')}:")
+    for label, seconds in report["steps"].items():
+        before = baseline["steps"].get(label)
+        if before:
+            print(f"  {label:<28} {before:8.2f}s → {seconds:8.2f}s  ({seconds / before - 1:+.0%})")
+    if baseline.get("filled") != report["filled"]:
+        print(f"  Results differ: {baseline.get('filled')} → {report['filled']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--record", action="store_true",
+                        help="call the live APIs and record a new cassette")
+    parser.add_argument("--albums", type=int, default=100, help="catalogue albums to enrich (default 100)")
+    parser.add_argument("--latency-ms", default="100",
+                        help='simulated latency per replayed request, or "recorded" (default 100)')
+    parser.add_argument("--db-latency-ms", type=float, default=20.0, help="simulated database round trip")
+    parser.add_argument("--output", default=DEFAULT_REPORT, help="where to write the JSON report")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    if args.record:
+        from dotenv import load_dotenv
+
+        load_dotenv(os.path.join(BACKEND_ROOT, ".env.local"))
+        os.environ["HTTP_CASSETTE"] = "record"
+    else:
+        os.environ["HTTP_CASSETTE"] = "replay"
+        os.environ["HTTP_CASSETTE_LATENCY_MS"] = args.latency_ms
+        # Credentials are only checked for presence; the cassette holds the answers
+        for name in ("SPOTIFY_CLIENT_ID", "SPOTIFY_CLIENT_SECRET", "PERPLEXITY_API_KEY"):
+            os.environ.setdefault(name, "replay")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    db = FakeSupabaseClient(albums=seed_albums(args.albums), latency=args.db_latency_ms / 1000)
+    timings = run_pipeline(db)
+
+    albums = db.tables["albums"].rows
+    report = {
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "mode": "record" if args.record else "replay",
+        "albums": len(albums),
+        "latency_ms": None if args.record else args.latency_ms,
+        "db_round_trips": db.round_trips,
+        "steps": timings,
+        "filled": {c: sum(1 for a in albums if a.get(c)) for c in ENRICHED_COLUMNS},
+    }
+    print(f"\n{len(albums)} albums, {db.round_trips} database round trips")
+    for label, seconds in timings.items():
+        print(f"  {label:<28} {seconds:8.2f}s")
+    print(f"  filled: {report['filled']}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+    if baseline:
+        _print_comparison(report, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Offline benchmark for the recommendation sender.
+
+Runs send_recommendations.main() against an in-process fake Supabase client
+and a local HTTP stub of the Resend API, on synthetic subscriber sets with
+random recommendation histories. Reports wall time, emails/sec, database
+round trips per user and peak traced memory for each dataset size and
+selection mode. No credentials or network access are needed.
+
+    uv run python benchmarks/bench_send_recommendations.py
+    uv run python benchmarks/bench_send_recommendations.py --users 1000 10000 100000 \\
+        --selection batch rpc per-user --db-latency-ms 20 --output bench.json
+
+Each scenario runs in its own subprocess so caches and memory peaks don't
+leak between them.
+"""
+
+import argparse
+import contextlib
+import http.server
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from catalogue import BACKEND_ROOT, load_albums
+from fake_supabase import FakeSupabaseClient
+
+sys.path.insert(0, os.path.join(BACKEND_ROOT, "src"))
+
+
+# --- Synthetic data ---
+
+def build_dataset(user_count: int, max_history: int, seed: int) -> tuple[list, list, list]:
+    """Users, albums and recommendations with random, realistic histories.
+
+    Each user received a run of consecutive albums in calendar order starting
+    at a random point; about 1% have received every album (history reset).
+    """
+    from send_recommendations import _sort_catalogue
+
+    rng = random.Random(seed)
+    albums = load_albums()
+    streamable = _sort_catalogue(albums)
+    start_date = datetime(2026, 1, 1, 4, tzinfo=timezone.utc)
+
+    users, recommendations = [], []
+    for i in range(user_count):
+        user_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        users.append({
+            "user_id": user_id,
+            "email": f"listener{i}@example.com",
+            "name": f"Listener {i}",
+            "subscription_status": "active",
+            "newsletter_frequency": "daily",
+            "unsubscribe_token": str(uuid.UUID(int=rng.getrandbits(128))),
+        })
+        if rng.random() < 0.01:
+            length = len(streamable)
+        else:
+            length = rng.randint(0, max_history)
+        offset = rng.randrange(len(streamable))
+        for day in range(length):
+            album = streamable[(offset + day) % len(streamable)]
+            recommendations.append({
+                "recommendation_id": f"{i}-{day}",
+                "user_id": user_id,
+                "album_id": album["album_id"],
+                "sent_date": (start_date + timedelta(days=day)).isoformat(),
+            })
+    return users, albums, recommendations
+
+
+def fake_next_albums_for_users(client: FakeSupabaseClient, p_user_ids: list[str]) -> list[dict]:
+    """Python equivalent of the next_albums_for_users SQL function."""
+    from send_recommendations import _sort_catalogue, pick_next_album
+
+    albums = client.tables["albums"].rows
+    streamable = _sort_catalogue(albums)
+    order_by_id = {a["album_id"]: a.get("calendar_order") for a in albums}
+    table = client.tables["recommendations"]
+
+    rows = []
+    for user_id in p_user_ids:
+        history = sorted(table.candidates([("eq", "user_id", user_id)]), key=lambda r: r["sent_date"], reverse=True)
+        album, reset = pick_next_album(streamable, order_by_id, [r["album_id"] for r in history])
+        if reset:
+            table.remove(history)
+        rows.append({
+            "user_id": user_id,
+            "album_id": album["album_id"] if album else None,
+            "history_reset": reset,
+        })
+    return rows
+
+
+# --- Resend stub ---
+
+class _ResendStub(http.server.BaseHTTPRequestHandler):
+    latency = 0.0
+    requests = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.latency)
+        with self.lock:
+            type(self).requests += 1
+        emails = body if isinstance(body, list) else [body]
+        payload = {"data": [{"id": str(uuid.uuid4())} for _ in emails]}
+        if not isinstance(body, list):
+            payload = payload["data"][0]
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextlib.contextmanager
+def resend_stub(latency: float):
+    import resend
+
+    _ResendStub.latency = latency
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _ResendStub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    previous = resend.api_url
+    resend.api_url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        yield _ResendStub
+    finally:
+        resend.api_url = previous
+        server.shutdown()
+
+
+# --- Scenarios ---
+
+def run_scenario(args) -> dict:
+    """Run one send against fresh fakes; returns the measurements."""
+    import send_recommendations
+
+    users, albums, recommendations = build_dataset(args.users, args.max_history, args.seed)
+    client = FakeSupabaseClient(
+        users=users,
+        albums=albums,
+        recommendations=recommendations,
+        latency=args.db_latency_ms / 1000,
+        rpc_functions={"next_albums_for_users": fake_next_albums_for_users},
+    )
+    del users, recommendations
+
+    os.environ["RESEND_API_KEY"] = "re_benchmark"
+    send_recommendations.get_supabase_client = lambda: client
+
+    with tempfile.TemporaryDirectory() as tmp, resend_stub(args.resend_latency_ms / 1000) as stub:
+        send_recommendations.OUTPUT_DIR = tmp
+        report_path = os.path.join(tmp, "report.json")
+        tracemalloc.start()
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            send_recommendations.main([
+                "--selection", args.selection[0],
+                "--rate-limit", str(args.rate_limit),
+                "--concurrency", str(args.concurrency),
+                "--run-id", "benchmark",
+                "--report", report_path,
+            ])
+        wall = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        with open(report_path) as f:
+            report = json.load(f)
+
+    return {
+        "users": args.users,
+        "selection": args.selection[0],
+        "wall_seconds": round(wall, 3),
+        "emails_sent": report["counters"].get("emails_sent", 0),
+        "emails_per_second": round(report["counters"].get("emails_sent", 0) / wall, 1),
+        "db_round_trips": client.round_trips,
+        "db_round_trips_per_user": round(client.round_trips / args.users, 4),
+        "resend_requests": stub.requests,
+        "peak_traced_mb": round(peak / 2**20, 1),
+        "stages": report["stages"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--selection", nargs="+", default=["batch", "rpc"],
+                        choices=["batch", "rpc", "per-user"])
+    parser.add_argument("--max-history", type=int, default=30,
+                        help="upper bound of random history length per user")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0,
+                        help="simulated latency added to every database round trip")
+    parser.add_argument("--resend-latency-ms", type=float, default=20.0,
+                        help="simulated latency of every Resend API request")
+    parser.add_argument("--rate-limit", type=float, default=1000.0,
+                        help="Resend requests/second allowed (high by default to measure our own loop)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="also write all results as JSON to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.users = args.users[0]
+        print(json.dumps(run_scenario(args)))
+        return
+
+    results = []
+    print(f"{'users':>8} {'selection':>9} {'wall s':>8} {'emails/s':>9} "
+          f"{'DB calls':>9} {'DB/user':>8} {'Resend':>7} {'peak MB':>8}")
+    for users in args.users:
+        for selection in args.selection:
+            command = [
+                sys.executable, os.path.abspath(__file__), "--child",
+                "--users", str(users), "--selection", selection,
+                "--max-history", str(args.max_history),
+                "--db-latency-ms", str(args.db_latency_ms),
+                "--resend-latency-ms", str(args.resend_latency_ms),
+                "--rate-limit", str(args.rate_limit),
+                "--concurrency", str(args.concurrency),
+                "--seed", str(args.seed),
+            ]
+            output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+            print(f"{users:>8} {selection:>9} {result['wall_seconds']:>8.2f} "
+                  f"{result['emails_per_second']:>9.1f} {result['db_round_trips']:>9} "
+                  f"{result['db_round_trips_per_user']:>8.3f} {result['resend_requests']:>7} "
+                  f"{result['peak_traced_mb']:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""Album rows from the committed catalogue export, used as benchmark data."""
+
+import csv
+import os
+
+BACKEND_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PROJECT_ROOT = os.path.abspath(os.path.join(BACKEND_ROOT, "..", ".."))
+CATALOGUE_CSV = os.path.join(PROJECT_ROOT, "data", "catalogue", "jazzy-catalogue-2026-03-22.csv")
+
+_INT_COLUMNS = ("release_year", "calendar_order")
+_BOOL_COLUMNS = ("apple_link_is_substitute", "spotify_link_is_substitute")
+
+
+def load_albums(limit: int | None = None) -> list[dict]:
+    """Return catalogue rows as the albums table would, with typed columns."""
+    with open(CATALOGUE_CSV, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))[:limit]
+    albums = []
+    for row in rows:
+        album = {k: (v if v not in ("", "null") else None) for k, v in row.items()}
+        for column in _INT_COLUMNS:
+            if album.get(column) is not None:
+                album[column] = int(album[column])
+        for column in _BOOL_COLUMNS:
+            album[column] = album.get(column) == "true"
+        albums.append(album)
+    return albums
@@ -0,0 +1,286 @@
+"""
+In-process stand-in for the Supabase client, for benchmarks and tests.
+
+Implements the subset of the PostgREST query builder the backend scripts use
+(select/eq/in_/gt/is_/or_/order/range/limit, insert/update/upsert/delete and
+rpc) over plain Python lists, counts every round trip, and can add a fixed
+per-request latency to mimic a remote database.
+"""
+
+import itertools
+import time
+from types import SimpleNamespace
+
+
+class _Session:
+    """Mimics the httpx client behind client.postgrest, for response hooks."""
+
+    def __init__(self):
+        self.event_hooks = {"request": [], "response": []}
+
+
+class FakeTable:
+    """Rows of one table. With an index column, rows live in per-key buckets so
+    filtering and deleting by that column never scans the whole table."""
+
+    def __init__(self, rows: list[dict], index_column: str | None = None):
+        self.index_column = index_column
+        self._rows: list[dict] = []
+        self._index: dict = {}
+        for row in rows:
+            self.add(row)
+
+    @property
+    def rows(self) -> list[dict]:
+        if self.index_column:
+            return [row for bucket in self._index.values() for row in bucket]
+        return self._rows
+
+    def candidates(self, filters: list[tuple]) -> list[dict]:
+        """Rows that can match, narrowed through the index when possible."""
+        for op, column, value in filters:
+            if column != self.index_column:
+                continue
+            if op == "eq":
+                return list(self._index.get(value, []))
+            if op == "in":
+                return [row for key in value for row in self._index.get(key, [])]
+        return list(self.rows)
+
+    def add(self, row: dict) -> None:
+        if self.index_column:
+            self._index.setdefault(row[self.index_column], []).append(row)
+        else:
+            self._rows.append(row)
+
+    def remove(self, doomed: list[dict]) -> None:
+        ids = {id(row) for row in doomed}
+        if self.index_column:
+            for key in {row[self.index_column] for row in doomed}:
+                self._index[key] = [r for r in self._index[key] if id(r) not in ids]
+        else:
+            self._rows = [row for row in self._rows if id(row) not in ids]
+
+
+def _matches_or(row: dict, expression: str) -> bool:
+    """Evaluate PostgREST or=(...) filters of the form col.is.null / col.not.is.null."""
+    for clause in expression.split(","):
+        column, _, condition = clause.partition(".")
+        if condition == "is.null" and row.get(column) is None:
+            return True
+        if condition == "not.is.null" and row.get(column) is not None:
+            return True
+    return False
+
+
+def _sort_key(value):
+    # PostgREST default ordering puts NULLs last for ascending sorts
+    return (value is None, value if value is not None else 0)
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeSupabaseClient", table: str):
+        self._client = client
+        self._table = table
+        self._action = "select"
+        self._columns: list[str] | None = None
+        self._embeds: dict[str, list[str]] = {}
+        self._filters: list[tuple] = []
+        self._orders: list[tuple[str, bool]] = []
+        self._offset = 0
+        self._limit: int | None = None
+        self._payload = None
+        self._on_conflict: str | None = None
+        self._negate_next = False
+
+    # --- actions ---
+    def select(self, columns: str = "*"):
+        self._action = "select"
+        self._columns = None
+        for part in (c.strip() for c in columns.split(",")):
+            if "(" in part:
+                name, inner = part.rstrip(")").split("(")
+                self._embeds[name] = [c.strip() for c in inner.split(",")]
+            elif part != "*":
+                self._columns = (self._columns or []) + [part]
+        return self
+
+    def insert(self, rows):
+        self._action, self._payload = "insert", rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict: str = "", **_):
+        self._action, self._payload = "upsert", rows if isinstance(rows, list) else [rows]
+        self._on_conflict = on_conflict
+        return self
+
+    def update(self, values: dict):
+        self._action, self._payload = "update", values
+        return self
+
+    def delete(self):
+        self._action = "delete"
+        return self
+
+    # --- filters ---
+    @property
+    def not_(self):
+        self._negate_next = True
+        return self
+
+    def _filter(self, op, column, value):
+        self._filters.append((("not_" if self._negate_next else "") + op, column, value))
+        self._negate_next = False
+        return self
+
+    def eq(self, column, value):
+        return self._filter("eq", column, value)
+
+    def in_(self, column, values):
+        return self._filter("in", column, set(values))
+
+    def gt(self, column, value):
+        return self._filter("gt", column, value)
+
+    def is_(self, column, value):
+        return self._filter("is", column, value)
+
+    def or_(self, expression):
+        return self._filter("or", None, expression)
+
+    # --- modifiers ---
+    def order(self, column, desc: bool = False):
+        self._orders.append((column, desc))
+        return self
+
+    def range(self, start: int, end: int):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    # --- execution ---
+    def _row_matches(self, row: dict) -> bool:
+        for op, column, value in self._filters:
+            negate = op.startswith("not_")
+            op = op.removeprefix("not_")
+            if op == "eq":
+                ok = row.get(column) == value
+            elif op == "in":
+                ok = row.get(column) in value
+            elif op == "gt":
+                ok = row.get(column) is not None and row.get(column) > value
+            elif op == "is":
+                ok = row.get(column) is None if value == "null" else row.get(column) == value
+            else:
+                ok = _matches_or(row, value)
+            if ok == negate:
+                return False
+        return True
+
+    def _project(self, row: dict, albums_by_id: dict) -> dict:
+        result = dict(row) if self._columns is None else {c: row.get(c) for c in self._columns}
+        for name, columns in self._embeds.items():
+            # Only many-to-one embeds are needed: recommendations -> albums
+            target = albums_by_id.get(row.get("album_id"))
+            result[name] = {c: target.get(c) for c in columns} if target else None
+        return result
+
+    def execute(self):
+        self._client.round_trip()
+        table = self._client.tables[self._table]
+
+        if self._action == "insert":
+            for row in self._payload:
+                table.add(self._client.with_defaults(self._table, row))
+            return SimpleNamespace(data=self._payload)
+
+        if self._action == "upsert":
+            key = self._on_conflict
+            existing = {row[key]: row for row in table.rows}
+            for row in self._payload:
+                if row[key] in existing:
+                    existing[row[key]].update(row)
+                else:
+                    table.add(self._client.with_defaults(self._table, row))
+            return SimpleNamespace(data=self._payload)
+
+        rows = [row for row in table.candidates(self._filters) if self._row_matches(row)]
+
+        if self._action == "update":
+            for row in rows:
+                row.update(self._payload)
+            return SimpleNamespace(data=rows)
+
+        if self._action == "delete":
+            table.remove(rows)
+            return SimpleNamespace(data=rows)
+
+        for column, desc in reversed(self._orders):
+            rows.sort(key=lambda r: _sort_key(r.get(column)), reverse=desc)
+        end = None if self._limit is None else self._offset + self._limit
+        if self._client.max_rows is not None:
+            end = min(end if end is not None else len(rows), self._offset + self._client.max_rows)
+        albums_by_id = self._client.albums_by_id if self._embeds else {}
+        return SimpleNamespace(
+            data=[self._project(row, albums_by_id) for row in rows[self._offset : end]]
+        )
+
+
+class FakeSupabaseClient:
+    """Tables are plain lists of dicts; `recommendations` is indexed by user_id."""
+
+    def __init__(
+        self,
+        users: list[dict] | None = None,
+        albums: list[dict] | None = None,
+        recommendations: list[dict] | None = None,
+        latency: float = 0.0,
+        max_rows: int | None = 1000,
+        rpc_functions: dict | None = None,
+    ):
+        self.tables = {
+            "users": FakeTable(users or []),
+            "albums": FakeTable(albums or []),
+            "recommendations": FakeTable(recommendations or [], index_column="user_id"),
+        }
+        self.latency = latency
+        self.max_rows = max_rows  # PostgREST's max-rows cap, None to disable
+        self.rpc_functions = rpc_functions or {}
+        self.round_trips = 0
+        self.postgrest = SimpleNamespace(session=_Session())
+        self._ids = itertools.count(1)
+
+    @property
+    def albums_by_id(self) -> dict:
+        return {a["album_id"]: a for a in self.tables["albums"].rows}
+
+    def round_trip(self) -> None:
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+        for hook in self.postgrest.session.event_hooks["response"]:
+            hook(None)
+
+    def with_defaults(self, table: str, row: dict) -> dict:
+        row = dict(row)
+        if table == "recommendations":
+            row.setdefault("recommendation_id", f"rec-{next(self._ids):012d}")
+            row.setdefault("sent_date", time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime()))
+        return row
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: dict):
+        function = self.rpc_functions[name]
+        client = self
+
+        class _Call:
+            def execute(self):
+                client.round_trip()
+                return SimpleNamespace(data=function(client, **params))
+
+        return _Call()
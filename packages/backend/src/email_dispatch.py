@@ -0,0 +1,189 @@
+"""
+Concurrent email dispatch through the Resend batch API.
+Groups rendered emails into batch-send calls, runs them on a bounded thread
+pool behind a token-bucket rate limiter, and retries 429/5xx responses with
+jittered exponential backoff. A batch rejected with another 4xx (e.g. one
+malformed address) is split in halves until the bad emails are isolated.
+"""
+
+import concurrent.futures
+import hashlib
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, Iterator
+
+import resend
+
+from send_metrics import RunMetrics
+
+RESEND_BATCH_LIMIT = 100  # emails per batch request, enforced by Resend
+DEFAULT_RATE_LIMIT = 2.0  # requests/second — Resend's default per-account limit
+DEFAULT_CONCURRENCY = 4
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+# Errors about the request's content; auth or quota errors would fail every half too
+SPLITTABLE_STATUSES = (400, 422)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: allows `rate` acquisitions per second on average,
+    with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class OutgoingEmail:
+    """A rendered email plus the recommendation it delivers."""
+
+    user_id: str
+    album_id: str
+    params: dict  # resend.Emails.SendParams
+
+
+@dataclass
+class DispatchResult:
+    email: OutgoingEmail
+    ok: bool
+    error: str = ""
+
+
+def _status(exc: Exception) -> int | None:
+    """HTTP status carried by a Resend API error, if any."""
+    code = getattr(exc, "code", None)
+    try:
+        return int(code) if code is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_delay(exc: Exception, attempt: int) -> float | None:
+    """Seconds to wait before retrying, or None if the error is not retryable."""
+    status = _status(exc)
+
+    # Resend API errors carry an HTTP status; anything else is a transport error
+    if isinstance(exc, resend.exceptions.ResendError) and status is not None:
+        if status != 429 and status < 500:
+            return None
+
+    # Full jitter keeps parallel workers from retrying in lockstep
+    delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+    headers = getattr(exc, "headers", None) or {}
+    retry_after = headers.get("retry-after") or headers.get("Retry-After")
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    return delay
+
+
+def _idempotency_key(batch: list[OutgoingEmail]) -> str:
+    """Stable key per batch and day, so retries never deliver an email twice."""
+    day = datetime.now(timezone.utc).date().isoformat()
+    digest = hashlib.sha256()
+    for email in batch:
+        digest.update(f"{email.user_id}:{email.album_id};".encode())
+    return f"recommendations/{day}/{digest.hexdigest()[:32]}"
+
+
+def _send_batch(
+    batch: list[OutgoingEmail], limiter: TokenBucket, metrics: RunMetrics
+) -> list[DispatchResult]:
+    """Send one batch request, retrying transient failures.
+
+    Resend rejects a whole batch if any email in it is invalid, so a batch
+    failing with a validation error (400/422) is bisected and each half sent on its
+    own (with its own idempotency key, derived from its emails); only the
+    emails that fail alone are reported as failed.
+    """
+    options = {"idempotency_key": _idempotency_key(batch)}
+    params = [email.params for email in batch]
+
+    for attempt in range(MAX_ATTEMPTS):
+        limiter.acquire()
+        metrics.count("resend_requests")
+        try:
+            with metrics.time("resend_call"):
+                resend.Batch.send(params, options)
+            return [DispatchResult(email, ok=True) for email in batch]
+        except Exception as e:
+            if _status(e) == 429:
+                metrics.count("resend_rate_limited")
+            delay = _retry_delay(e, attempt)
+            if delay is None and len(batch) > 1 and _status(e) in SPLITTABLE_STATUSES:
+                metrics.count("resend_batch_splits")
+                half = len(batch) // 2
+                print(f"  Resend rejected a batch of {len(batch)} ({e}), splitting it...")
+                return _send_batch(batch[:half], limiter, metrics) + _send_batch(batch[half:], limiter, metrics)
+            if delay is None or attempt == MAX_ATTEMPTS - 1:
+                return [DispatchResult(email, ok=False, error=str(e)) for email in batch]
+            metrics.count("resend_retries")
+            print(f"  Resend batch of {len(batch)} failed ({e}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+    return []  # unreachable: the last attempt always returns
+
+
+def _batched(emails: Iterable[OutgoingEmail], size: int) -> Iterator[list[OutgoingEmail]]:
+    batch: list[OutgoingEmail] = []
+    for email in emails:
+        batch.append(email)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def dispatch(
+    emails: Iterable[OutgoingEmail],
+    rate_limit: float = DEFAULT_RATE_LIMIT,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    batch_size: int = RESEND_BATCH_LIMIT,
+    metrics: RunMetrics | None = None,
+) -> Iterator[DispatchResult]:
+    """Send emails in batches and yield a result per email as batches finish.
+
+    `emails` is consumed lazily: at most `concurrency` batches are in flight,
+    so callers can feed it from a generator without buffering everything.
+    """
+    limiter = TokenBucket(rate_limit)
+    metrics = metrics or RunMetrics()
+    batch_size = min(batch_size, RESEND_BATCH_LIMIT)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        in_flight: set[concurrent.futures.Future] = set()
+        for batch in _batched(emails, batch_size):
+            if len(in_flight) >= concurrency:
+                done, in_flight = concurrent.futures.wait(
+                    in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    yield from future.result()
+            in_flight.add(executor.submit(_send_batch, batch, limiter, metrics))
+
+        for future in concurrent.futures.as_completed(in_flight):
+            yield from future.result()
@@ -1,8 +1,16 @@
 """
 HTML email template for jazz album recommendations.
 Matches the visual style of the signup confirmation email.
+
+Everything except the greeting and the unsubscribe link depends only on the
+album, so those fragments are rendered once per album and cached; each
+recipient only costs a few string concatenations.
 """
 
+from functools import lru_cache
+
+ALBUM_FRAGMENT_CACHE_SIZE = 512
+
 
 def _render_summaries(album_summary: str | None, artist_summary: str | None) -> str:
     """Render the editorial summaries block, or empty string if both are absent."""
@@ -29,16 +37,22 @@ def _render_summaries(album_summary: str | None, artist_summary: str | None) ->
               </table>'''
 
 
-def render_recommendation_email(user_name: str, album: dict, unsubscribe_url: str = "") -> str:
-    title = album.get("title", "Unknown Album")
-    artist = album.get("artist", "Unknown Artist")
-    release_year = album.get("release_year")
-    cover_image_url = album.get("cover_image_url")
-    spotify_link = album.get("streaming_link_spotify")
-    apple_link = album.get("streaming_link_apple")
-    artist_summary = album.get("artist_summary")
-    album_summary = album.get("album_summary")
+@lru_cache(maxsize=ALBUM_FRAGMENT_CACHE_SIZE)
+def _render_album_fragments(
+    title: str,
+    artist: str,
+    release_year: int | None,
+    cover_image_url: str | None,
+    spotify_link: str | None,
+    apple_link: str | None,
+    artist_summary: str | None,
+    album_summary: str | None,
+) -> tuple[str, str]:
+    """Render the album-specific parts of the email.
 
+    Returns (head, body): the document up to the greeting's name, and from
+    after the name up to the unsubscribe link.
+    """
     year_text = f" ({release_year})" if release_year else ""
 
     streaming_buttons = ""
@@ -63,7 +77,7 @@ def render_recommendation_email(user_name: str, album: dict, unsubscribe_url: st
                 </tr>
               </table>'''
 
-    return f'''<!DOCTYPE html>
+    head = f'''<!DOCTYPE html>
 <html lang="en">
 <head>
   <meta charset="UTF-8">
@@ -126,7 +140,8 @@ def render_recommendation_email(user_name: str, album: dict, unsubscribe_url: st
           <!-- Body -->
           <tr>
             <td class="email-body-td" style="padding: 40px;">
-              <h2 style="margin: 0 0 16px; color: #18181b; font-size: 22px; font-weight: 600;">Hey {user_name}!</h2>
+              <h2 style="margin: 0 0 16px; color: #18181b; font-size: 22px; font-weight: 600;">Hey '''
+    body = f'''!</h2>
               <p style="margin: 0 0 24px; color: #52525b; font-size: 15px; line-height: 1.6;">
                 We picked a jazz album just for you. Give it a listen and let the music take you somewhere new.
               </p>
@@ -148,7 +163,11 @@ def render_recommendation_email(user_name: str, album: dict, unsubscribe_url: st
           <tr>
             <td class="email-footer-td" style="padding: 24px 40px; border-top: 1px solid #e4e4e7; text-align: center;">
               <p style="margin: 0; color: #a1a1aa; font-size: 12px;">Jazzy &mdash; Discover jazz, one album at a time.</p>
-              {'<p style="margin: 8px 0 0; font-size: 12px;"><a href="' + unsubscribe_url + '" style="color: #a1a1aa; text-decoration: underline;">Unsubscribe</a></p>' if unsubscribe_url else ''}
+              '''
+    return head, body
+
+
+_FOOTER = '''
             </td>
           </tr>
         </table>
@@ -157,3 +176,22 @@ def render_recommendation_email(user_name: str, album: dict, unsubscribe_url: st
   </table>
 </body>
 </html>'''
+
+
+def render_recommendation_email(user_name: str, album: dict, unsubscribe_url: str = "") -> str:
+    head, body = _render_album_fragments(
+        album.get("title", "Unknown Album"),
+        album.get("artist", "Unknown Artist"),
+        album.get("release_year"),
+        album.get("cover_image_url"),
+        album.get("streaming_link_spotify"),
+        album.get("streaming_link_apple"),
+        album.get("artist_summary"),
+        album.get("album_summary"),
+    )
+    unsubscribe = (
+        '<p style="margin: 8px 0 0; font-size: 12px;"><a href="' + unsubscribe_url
+        + '" style="color: #a1a1aa; text-decoration: underline;">Unsubscribe</a></p>'
+        if unsubscribe_url else ''
+    )
+    return f"{head}{user_name}{body}{unsubscribe}{_FOOTER}"
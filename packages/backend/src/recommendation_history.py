@@ -0,0 +1,129 @@
+"""
+Buffered writes of sent recommendations to the recommendations table.
+Successful sends are appended to a local journal before they are buffered,
+then flushed to the database in multi-row inserts. Rows still in the journal
+after a crash are replayed on the next run, so history is never lost.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+
+from supabase import Client
+
+from send_metrics import RunMetrics
+
+FLUSH_SIZE = 500
+# Rows per page when reading history back; PostgREST truncates at max-rows
+PAGE_SIZE = 1000
+# Ids per in_() filter, to keep request URLs short
+ID_CHUNK_SIZE = 100
+
+
+class RecommendationHistory:
+    def __init__(
+        self,
+        client: Client,
+        journal_path: str,
+        flush_size: int = FLUSH_SIZE,
+        metrics: RunMetrics | None = None,
+    ):
+        self.client = client
+        self.metrics = metrics or RunMetrics()
+        self.journal_path = journal_path
+        self.flush_size = flush_size
+        self._buffer: list[dict] = []
+        # Buffer size that triggers the next flush; pushed back after a failure
+        self._flush_at = flush_size
+        os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+        self._journal = open(journal_path, "a", encoding="utf-8")
+
+    def replay(self) -> int:
+        """Insert rows left in the journal by an interrupted run. Returns the count."""
+        with open(self.journal_path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        if not rows:
+            return 0
+
+        # The crash may have happened after the insert but before the journal
+        # was cleared, so skip rows that already made it to the database.
+        existing: set[tuple[str, str]] = set()
+        user_ids = sorted({r["user_id"] for r in rows})
+        album_ids = sorted({r["album_id"] for r in rows})
+        for i in range(0, len(user_ids), ID_CHUNK_SIZE):
+            for j in range(0, len(album_ids), ID_CHUNK_SIZE):
+                existing.update(
+                    self._existing_pairs(user_ids[i : i + ID_CHUNK_SIZE], album_ids[j : j + ID_CHUNK_SIZE])
+                )
+
+        missing = [r for r in rows if (r["user_id"], r["album_id"]) not in existing]
+        for i in range(0, len(missing), self.flush_size):
+            self.client.table("recommendations").insert(missing[i : i + self.flush_size]).execute()
+        self._truncate_journal()
+        return len(missing)
+
+    def _existing_pairs(self, user_ids: list[str], album_ids: list[str]) -> set[tuple[str, str]]:
+        pairs: set[tuple[str, str]] = set()
+        start = 0
+        while True:
+            page = (
+                self.client.table("recommendations")
+                .select("user_id, album_id")
+                .in_("user_id", user_ids)
+                .in_("album_id", album_ids)
+                .order("recommendation_id")
+                .range(start, start + PAGE_SIZE - 1)
+                .execute()
+                .data
+            )
+            pairs.update((r["user_id"], r["album_id"]) for r in page)
+            if len(page) < PAGE_SIZE:
+                return pairs
+            start += PAGE_SIZE
+
+    def add(self, user_id: str, album_id: str) -> None:
+        """Journal a sent recommendation and flush once the buffer is full."""
+        row = {
+            "user_id": user_id,
+            "album_id": album_id,
+            "sent_date": datetime.now(timezone.utc).isoformat(),
+        }
+        self._journal.write(json.dumps(row) + "\n")
+        self._journal.flush()
+        self._buffer.append(row)
+        if len(self._buffer) >= self._flush_at:
+            self.flush()
+
+    def flush(self) -> None:
+        """Insert buffered rows. On failure they stay journaled for the next run."""
+        if not self._buffer:
+            return
+        os.fsync(self._journal.fileno())
+        while self._buffer:
+            chunk = self._buffer[: self.flush_size]
+            try:
+                with self.metrics.time("history_insert"):
+                    self.client.table("recommendations").insert(chunk).execute()
+            except Exception as e:
+                print(f"  Failed to record {len(self._buffer)} recommendation(s), will retry: {e}")
+                # Try again once another flush_size rows are buffered, not on every add()
+                self._flush_at = len(self._buffer) + self.flush_size
+                return
+            del self._buffer[: len(chunk)]
+        self._flush_at = self.flush_size
+        self._truncate_journal()
+
+    def close(self) -> None:
+        self.flush()
+        self._journal.close()
+        if self._buffer:
+            print(
+                f"  {len(self._buffer)} recommendation(s) could not be recorded; "
+                f"kept in {self.journal_path} for the next run."
+            )
+
+    def _truncate_journal(self) -> None:
+        # Truncate rather than delete: CI caches the file, and an empty
+        # journal must overwrite any older one.
+        self._journal.truncate(0)
+        self._journal.seek(0)
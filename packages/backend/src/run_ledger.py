@@ -0,0 +1,89 @@
+"""
+Per-run checkpoint for the recommendation sender.
+Records every user handled by a run in a local SQLite file, so a restarted
+run with the same run_id only processes the users it had not finished yet.
+Runs are kept for RETENTION_DAYS, so a failed hourly tick can still be
+resumed with --at after later ticks have run.
+Also assigns users to shards so several runners can split one run.
+"""
+
+import hashlib
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+FINISHED_STATUSES = ("sent", "skipped")
+RETENTION_DAYS = 7
+
+
+def shard_of(user_id: str, shard_count: int) -> int:
+    """Stable shard index for a user (independent of Python's hash seed)."""
+    digest = hashlib.sha1(user_id.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """Parse an 'i/N' shard spec (0 <= i < N)."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"invalid shard '{value}', expected i/N") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"invalid shard '{value}', need 0 <= i < N")
+    return index, count
+
+
+class RunLedger:
+    def __init__(self, path: str, run_id: str, retention_days: float = RETENTION_DAYS):
+        self.run_id = run_id
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path)
+        # WAL + NORMAL: each commit survives a process crash without an fsync
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS run_users (
+                run_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                album_id TEXT,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (run_id, user_id)
+            )
+            """
+        )
+        # Drop runs nobody will resume any more; the current one always stays
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=retention_days)).isoformat()
+        self._db.execute(
+            "DELETE FROM run_users WHERE run_id != ? AND run_id IN"
+            " (SELECT run_id FROM run_users GROUP BY run_id HAVING MAX(updated_at) < ?)",
+            (run_id, cutoff),
+        )
+        self._db.commit()
+
+    def finished(self, user_ids: list[str]) -> set[str]:
+        """Return which of the given users this run already sent to or skipped."""
+        done: set[str] = set()
+        # Stay below SQLite's bound-parameter limit
+        for i in range(0, len(user_ids), 500):
+            chunk = user_ids[i : i + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self._db.execute(
+                f"SELECT user_id FROM run_users WHERE run_id = ? AND user_id IN ({placeholders})"
+                f" AND status IN ({', '.join('?' * len(FINISHED_STATUSES))})",
+                [self.run_id, *chunk, *FINISHED_STATUSES],
+            )
+            done.update(row[0] for row in rows)
+        return done
+
+    def mark(self, user_id: str, status: str, album_id: str | None = None) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO run_users (run_id, user_id, status, album_id, updated_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (self.run_id, user_id, status, album_id, datetime.now(timezone.utc).isoformat()),
+        )
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
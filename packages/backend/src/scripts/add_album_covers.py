@@ -7,12 +7,16 @@ import concurrent.futures
 import os
 import re
 import sys
-import time
 
 import requests
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+from http_cache import cached_get, close_cache
+from rate_limit import ITUNES_LOOKUP, ITUNES_SEARCH, RateLimiter
+from text_normalize import normalize
+from write_behind import WriteBehindBuffer
+
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 BACKEND_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
 
@@ -33,24 +37,13 @@ def get_supabase_client() -> Client:
     return create_client(url, key)
 
 
-def _normalize(text: str) -> str:
-    """Lowercase and strip for fuzzy comparison."""
-    return text.strip().lower()
-
-
-def _itunes_get(url: str, params: dict, max_retries: int = 5) -> requests.Response | None:
-    """GET request to iTunes API with exponential backoff on 429."""
-    delay = 5
-    for attempt in range(max_retries):
-        response = requests.get(url, params=params)
-        if response.status_code == 429:
-            print(f"    iTunes rate limit (429), retrying in {delay}s...")
-            time.sleep(delay)
-            delay *= 2
-            continue
-        return response
-    print(f"    iTunes rate limit persists after {max_retries} retries, skipping.")
-    return None
+def _itunes_get(url: str, params: dict, limiter: RateLimiter) -> requests.Response | None:
+    """GET request to iTunes API, paced by the limiter and retried on 429."""
+    response = cached_get(url, params=params, limiter=limiter, max_attempts=5, backoff_seconds=5)
+    if response.status_code == 429:
+        print("    iTunes rate limit persists after retries, skipping.")
+        return None
+    return response
 
 
 def _search_itunes(query: str) -> list[dict]:
@@ -58,6 +51,7 @@ def _search_itunes(query: str) -> list[dict]:
     response = _itunes_get(
         ITUNES_SEARCH_URL,
         params={"term": query, "media": "music", "entity": "album", "limit": 10},
+        limiter=ITUNES_SEARCH,
     )
     if response is None or response.status_code != 200:
         return []
@@ -68,15 +62,15 @@ def _match_artwork(
     results: list[dict], title: str, artist: str, release_year: int | None
 ) -> str | None:
     """Find the best matching album artwork from iTunes results."""
-    norm_title = _normalize(title)
-    norm_artist = _normalize(artist)
+    norm_title = normalize(title)
+    norm_artist = normalize(artist)
 
     exact_match = None
     fuzzy_match = None
 
     for result in results:
-        r_title = _normalize(result.get("collectionName", ""))
-        r_artist = _normalize(result.get("artistName", ""))
+        r_title = normalize(result.get("collectionName", ""))
+        r_artist = normalize(result.get("artistName", ""))
         r_date = result.get("releaseDate", "")
 
         print(
@@ -119,7 +113,7 @@ def _extract_collection_id(apple_music_url: str) -> str | None:
 def _lookup_cover_by_id(collection_id: str) -> str | None:
     """Look up album artwork directly via iTunes Lookup API using collection ID."""
     try:
-        response = _itunes_get(ITUNES_LOOKUP_URL, params={"id": collection_id})
+        response = _itunes_get(ITUNES_LOOKUP_URL, params={"id": collection_id}, limiter=ITUNES_LOOKUP)
         if response is None or response.status_code != 200:
             return None
         results = response.json().get("results", [])
@@ -164,7 +158,7 @@ def get_albums_missing_covers(client: Client) -> list[dict]:
 MAX_WORKERS = 1
 
 
-def _process_album(album: dict, client) -> bool:
+def _process_album(album: dict, writes: WriteBehindBuffer) -> bool:
     """Look up and store cover art for a single album. Returns True if updated."""
     title = album["title"]
     artist = album["artist"]
@@ -190,14 +184,10 @@ def _process_album(album: dict, client) -> bool:
             print(f"    Cover: {cover_url}")
 
     if cover_url:
-        client.table("albums").update({"cover_image_url": cover_url}).eq(
-            "album_id", album["album_id"]
-        ).execute()
-        time.sleep(0.5)
+        writes.update(album["album_id"], {"cover_image_url": cover_url})
         return True
 
     print("    Cover: not found")
-    time.sleep(0.5)
     return False
 
 
@@ -211,9 +201,13 @@ def main():
     if not albums:
         return
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = [executor.submit(_process_album, album, client) for album in albums]
+    with (
+        WriteBehindBuffer(client) as writes,
+        concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor,
+    ):
+        futures = [executor.submit(_process_album, album, writes) for album in albums]
         results = [f.result() for f in concurrent.futures.as_completed(futures)]
+    close_cache()
 
     updated = sum(1 for r in results if r)
     print(f"\nDone. Updated {updated}/{len(albums)} album(s).")
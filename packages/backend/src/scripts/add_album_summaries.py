@@ -13,10 +13,12 @@ import re
 import sys
 import time
 
-import requests
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+import http_client
+from write_behind import WriteBehindBuffer
+
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 BACKEND_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
 
@@ -74,23 +76,17 @@ Your entire response must be a single line of text with no newline characters.""
             {"role": "user", "content": prompt},
         ],
     }
-    for attempt in range(4):
-        response = None
-        try:
-            response = requests.post(
-                PERPLEXITY_API_URL, headers=headers, json=payload, timeout=30
-            )
-            response.raise_for_status()
-            text = response.json()["choices"][0]["message"]["content"].strip()
-            return re.sub(r"\[\d+\]", "", text).strip()
-        except Exception as e:
-            if response is not None and response.status_code == 429 and attempt < 3:
-                wait = 10 * (2 ** attempt)  # 10s, 20s, 40s
-                print(f"    Rate limited, retrying in {wait}s...")
-                time.sleep(wait)
-            else:
-                print(f"    Perplexity error: {e}")
-                return None
+    try:
+        # Perplexity rate limits reset slowly: back off from 10s
+        response = http_client.post(
+            PERPLEXITY_API_URL, headers=headers, json=payload, backoff_seconds=10
+        )
+        response.raise_for_status()
+        text = response.json()["choices"][0]["message"]["content"].strip()
+        return re.sub(r"\[\d+\]", "", text).strip()
+    except Exception as e:
+        print(f"    Perplexity error: {e}")
+        return None
 
 
 def get_albums_missing_summaries(client: Client) -> list[dict]:
@@ -107,7 +103,7 @@ def get_albums_missing_summaries(client: Client) -> list[dict]:
 MAX_WORKERS = 2
 
 
-def _process_album(album: dict, client: Client, api_key: str) -> bool:
+def _process_album(album: dict, writes: WriteBehindBuffer, api_key: str) -> bool:
     """Generate and store summaries for a single album. Returns True if updated."""
     title = album["title"]
     artist = album["artist"]
@@ -156,7 +152,7 @@ then write something about his general musical style.{artist_context}"""
         time.sleep(REQUEST_DELAY_SECONDS)
 
     if updates:
-        client.table("albums").update(updates).eq("album_id", album["album_id"]).execute()
+        writes.update(album["album_id"], updates)
         return True
 
     return False
@@ -174,9 +170,12 @@ def main():
     if not albums:
         return
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+    with (
+        WriteBehindBuffer(client) as writes,
+        concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor,
+    ):
         futures = [
-            executor.submit(_process_album, album, client, api_key)
+            executor.submit(_process_album, album, writes, api_key)
             for album in albums
         ]
         results = [f.result() for f in concurrent.futures.as_completed(futures)]
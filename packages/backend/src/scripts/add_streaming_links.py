@@ -7,14 +7,19 @@ import concurrent.futures
 import os
 import sys
 import threading
-import time
-import unicodedata
 import re
 
-import requests
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+import http_client
+from http_cache import cached_get, close_cache
+from match_ranking import CandidateIndex, parse_year, similarity
+from rate_limit import ITUNES_LOOKUP, ITUNES_SEARCH, SPOTIFY, RateLimiter
+from speculative import first_match
+from text_normalize import normalize, strip_accents
+from write_behind import WriteBehindBuffer
+
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 BACKEND_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
 
@@ -27,6 +32,14 @@ ARTWORK_SIZE = "600x600"
 # Set when Spotify returns a long-term rate limit — signals all workers to skip Spotify
 _spotify_rate_limited = threading.Event()
 
+# Confidence recorded for links found through a shared UPC barcode; other
+# links record their match_ranking score
+UPC_CONFIDENCE = 1.0
+
+# Search strategies of one album run concurrently, this many at a time; the
+# highest-priority match still wins (see speculative.first_match)
+SPECULATION_WIDTH = 3
+
 
 def get_supabase_client() -> Client:
     load_dotenv(os.path.join(BACKEND_ROOT, ".env.local"))
@@ -49,7 +62,7 @@ def get_spotify_token() -> str | None:
         )
         return None
 
-    response = requests.post(
+    response = http_client.post(
         SPOTIFY_TOKEN_URL,
         data={"grant_type": "client_credentials"},
         auth=(client_id, client_secret),
@@ -61,115 +74,101 @@ def get_spotify_token() -> str | None:
     return response.json()["access_token"]
 
 
-def _normalize(text: str) -> str:
-    """Normalize text for fuzzy comparison: strip diacritics, standardize punctuation."""
-    # Strip diacritics/accents (e.g. "Éthiopiques" → "ethiopiques")
-    text = unicodedata.normalize("NFD", text)
-    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
-    text = text.lower()
-    # Normalize apostrophes/quotes
-    text = re.sub(r"[''`]", "'", text)
-    # Normalize ampersand
-    text = text.replace("&", "and")
-    # Remove all punctuation except spaces
-    text = re.sub(r"[^\w\s]", " ", text)
-    # Collapse whitespace
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+def _spotify_index(items: list[dict]) -> CandidateIndex:
+    return CandidateIndex(
+        items,
+        title=lambda item: item.get("name", ""),
+        artists=lambda item: [a["name"] for a in item.get("artists", [])],
+        date=lambda item: item.get("release_date"),
+    )
 
 
-def _to_search_query(text: str) -> str:
-    """Strip accents and normalize for use as an iTunes search query."""
-    text = unicodedata.normalize("NFD", text)
-    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
-    return text.strip()
+def _apple_index(results: list[dict]) -> CandidateIndex:
+    return CandidateIndex(
+        results,
+        title=lambda result: result.get("collectionName", ""),
+        artists=lambda result: [result.get("artistName", "")],
+        date=lambda result: result.get("releaseDate"),
+    )
 
 
-def _word_overlap(a: str, b: str) -> float:
-    """Fraction of words in `a` that also appear in `b`."""
-    words_a = set(a.split())
-    words_b = set(b.split())
-    if not words_a:
-        return 0.0
-    return len(words_a & words_b) / len(words_a)
+def _spotify_match(ranked: tuple[dict, float] | None) -> tuple[str, float] | None:
+    if not ranked:
+        return None
+    item, score = ranked
+    return item["external_urls"].get("spotify"), score
 
 
 def _match_spotify_result(
     items: list[dict], title: str, artist: str, release_year: int | None
-) -> str | None:
-    """Find the best matching album from Spotify results. Prefers exact year match."""
-    norm_title = _normalize(title)
-    norm_artist = _normalize(artist)
+) -> tuple[str, float] | None:
+    """Find the best matching album from Spotify results.
+
+    Returns (url, score) of the top-ranked result (see match_ranking) or None.
+    """
+    return _spotify_match(_spotify_index(items).best(title, artist, release_year))
 
-    exact_match = None
-    fuzzy_match = None
 
-    for item in items:
-        r_title = _normalize(item.get("name", ""))
-        r_artists = [_normalize(a["name"]) for a in item.get("artists", [])]
+_SPOTIFY_RETRY_MAX = 30  # seconds — longer Retry-After means a hard ban, skip entirely
 
-        if norm_title not in r_title and r_title not in norm_title:
-            continue
-        if not any(norm_artist in ra or ra in norm_artist for ra in r_artists):
-            continue
 
-        url = item["external_urls"].get("spotify")
-        r_date = item.get("release_date", "")
-        if release_year and r_date:
-            if int(r_date[:4]) == release_year and not exact_match:
-                exact_match = url
-            elif not fuzzy_match:
-                fuzzy_match = url
-        elif not fuzzy_match:
-            fuzzy_match = url
+def _spotify_get(token: str, url: str, params: dict | None = None, cancel: threading.Event | None = None):
+    """GET a Spotify API URL through the Spotify limiter.
 
-    return exact_match or fuzzy_match
+    Returns None once Spotify has imposed a long-term rate limit. A set
+    `cancel` raises http_client.Cancelled (see speculative.first_match).
+    """
+    if _spotify_rate_limited.is_set():
+        return None
+    response = cached_get(
+        url,
+        params=params,
+        headers={"Authorization": f"Bearer {token}"},
+        limiter=SPOTIFY,
+        max_retry_after=_SPOTIFY_RETRY_MAX,
+        cancel=cancel,
+    )
+    # Unparseable values are left to the limiter's backoff, like a short wait
+    retry_after = http_client.parse_retry_after(response) or 0
+    if response.status_code == 429 and retry_after > _SPOTIFY_RETRY_MAX:
+        print(f"    Spotify hard rate limit ({retry_after:g}s). Skipping all Spotify lookups.")
+        _spotify_rate_limited.set()
+        return None
+    return response
 
 
-_SPOTIFY_RETRY_MAX = 30  # seconds — longer Retry-After means a hard ban, skip entirely
+def _itunes_get(url: str, params: dict, limiter: RateLimiter, cancel: threading.Event | None = None):
+    """GET an iTunes API URL through the given limiter."""
+    return cached_get(url, params=params, limiter=limiter, cancel=cancel)
 
 
-def _search_spotify_query(token: str, query: str) -> list[dict]:
+def _search_spotify_query(token: str, query: str, cancel: threading.Event | None = None) -> list[dict]:
     """Run a Spotify search and return album items."""
-    if _spotify_rate_limited.is_set():
+    response = _spotify_get(token, SPOTIFY_SEARCH_URL, {"q": query, "type": "album", "limit": 10}, cancel)
+    if response is None:
         return []
-    for attempt in range(3):
-        response = requests.get(
-            SPOTIFY_SEARCH_URL,
-            headers={"Authorization": f"Bearer {token}"},
-            params={"q": query, "type": "album", "limit": 10},
-        )
-        if response.status_code == 200:
-            return response.json().get("albums", {}).get("items", [])
-        if response.status_code == 429:
-            retry_after = int(response.headers.get("Retry-After", 2 ** attempt))
-            if retry_after > _SPOTIFY_RETRY_MAX:
-                print(f"    Spotify hard rate limit ({retry_after}s). Skipping all Spotify lookups.")
-                _spotify_rate_limited.set()
-                return []
-            print(f"    Spotify rate limited, retrying in {retry_after}s...")
-            time.sleep(retry_after)
-            continue
-        print(f"    Spotify search error {response.status_code}: {response.text[:120]}")
-        break
+    if response.status_code == 200:
+        return response.json().get("albums", {}).get("items", [])
+    print(f"    Spotify search error {response.status_code}: {response.text[:120]}")
     return []
 
 
 def search_spotify(
     token: str, title: str, artist: str, release_year: int | None
-) -> tuple[str | None, bool]:
+) -> tuple[str | None, bool, float | None]:
     """Try multiple Spotify search strategies with progressively looser queries.
 
-    Returns (url, is_substitute) where is_substitute is True when the link is
-    the artist's most popular album rather than an exact title match.
+    Returns (url, is_substitute, confidence) where is_substitute is True when
+    the link is the artist's most popular album rather than an exact title
+    match, and confidence is the link's match score (see match_ranking).
     """
     if not title or not artist:
-        return None, False
+        return None, False, None
 
     stripped_title = re.sub(r"\s*\(.*?\)", "", title).strip()
-    ascii_title = _to_search_query(title)
-    ascii_artist = _to_search_query(artist)
-    ascii_stripped = _to_search_query(stripped_title)
+    ascii_title = strip_accents(title)
+    ascii_artist = strip_accents(artist)
+    ascii_stripped = strip_accents(stripped_title)
 
     attempts = [
         (f"album:{title} artist:{artist}", title),         # 1. original
@@ -179,35 +178,42 @@ def search_spotify(
         (f"{ascii_artist} {ascii_title}", title),          # 5. artist-first plain
     ]
 
-    for query, match_title in attempts:
-        items = _search_spotify_query(token, query)
-        url = _match_spotify_result(items, match_title, artist, release_year)
-        if url:
-            return url, False
-        time.sleep(0.2)
+    def exact(query, match_title):
+        def strategy(cancel):
+            items = _search_spotify_query(token, query, cancel)
+            match = _match_spotify_result(items, match_title, artist, release_year)
+            if match and match[0]:
+                url, score = match
+                return url, False, score
+            return None
+        return strategy
 
     # Artist fallback: return first result that matches artist name
-    items = _search_spotify_query(token, f"artist:{ascii_artist}")
-    norm_artist = _normalize(artist)
-    for item in items:
-        r_artists = [_normalize(a["name"]) for a in item.get("artists", [])]
-        if any(norm_artist in ra or ra in norm_artist for ra in r_artists):
-            url = item["external_urls"].get("spotify")
-            if url:
-                return url, True
+    def artist_fallback(cancel):
+        items = _search_spotify_query(token, f"artist:{ascii_artist}", cancel)
+        norm_artist = normalize(artist)
+        for item in items:
+            r_artists = [normalize(a["name"]) for a in item.get("artists", [])]
+            if any(norm_artist in ra or ra in norm_artist for ra in r_artists):
+                url = item["external_urls"].get("spotify")
+                if url:
+                    score = similarity(
+                        title, artist, release_year,
+                        item.get("name", ""), item["artists"][0]["name"], parse_year(item.get("release_date")),
+                    )
+                    return url, True, score
+        return None
 
-    return None, False
+    strategies = [exact(query, match_title) for query, match_title in attempts] + [artist_fallback]
+    return first_match(strategies, SPECULATION_WIDTH) or (None, False, None)
 
 
 def _get_spotify_album_upc(token: str, spotify_url: str) -> str | None:
     """Fetch the UPC barcode for a Spotify album URL."""
     album_id = spotify_url.split("/album/")[-1].split("?")[0]
     try:
-        response = requests.get(
-            f"https://api.spotify.com/v1/albums/{album_id}",
-            headers={"Authorization": f"Bearer {token}"},
-        )
-        if response.status_code != 200:
+        response = _spotify_get(token, f"https://api.spotify.com/v1/albums/{album_id}")
+        if response is None or response.status_code != 200:
             return None
         return response.json().get("external_ids", {}).get("upc")
     except Exception:
@@ -221,7 +227,7 @@ def _get_itunes_album_upc(apple_url: str) -> str | None:
         return None
     collection_id = match.group(1)
     try:
-        response = requests.get(ITUNES_LOOKUP_URL, params={"id": collection_id})
+        response = _itunes_get(ITUNES_LOOKUP_URL, {"id": collection_id}, ITUNES_LOOKUP)
         if response.status_code != 200:
             return None
         results = response.json().get("results", [])
@@ -245,7 +251,7 @@ def _search_spotify_by_upc(token: str, upc: str) -> str | None:
 def _lookup_itunes_by_upc(upc: str) -> tuple[str, str | None] | None:
     """Look up an Apple Music album URL and artwork by UPC barcode."""
     try:
-        response = requests.get(ITUNES_LOOKUP_URL, params={"upc": upc, "country": "ch"})
+        response = _itunes_get(ITUNES_LOOKUP_URL, {"upc": upc, "country": "ch"}, ITUNES_LOOKUP)
         if response.status_code != 200:
             return None
         results = response.json().get("results", [])
@@ -261,11 +267,159 @@ def _lookup_itunes_by_upc(upc: str) -> tuple[str, str | None] | None:
         return None
 
 
-def _search_itunes(query: str, country: str = "ch") -> list[dict]:
+# Ids per request: Spotify's /v1/albums limit, and a conservative size for
+# iTunes' comma-separated lookup (keeps URLs short)
+SPOTIFY_ALBUMS_BATCH = 20
+ITUNES_LOOKUP_BATCH = 100
+
+
+def _batches(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _get_spotify_album_upcs(token: str, spotify_urls: list[str]) -> dict[str, str | None]:
+    """UPCs for many Spotify album URLs, 20 per request. URLs whose request
+    failed are left out, so callers can fall back to single lookups."""
+    by_id = {url.split("/album/")[-1].split("?")[0]: url for url in spotify_urls}
+    upcs: dict[str, str | None] = {}
+    for ids in _batches(sorted(by_id), SPOTIFY_ALBUMS_BATCH):
+        response = _spotify_get(token, "https://api.spotify.com/v1/albums", {"ids": ",".join(ids)})
+        if response is None or response.status_code != 200:
+            continue
+        # Albums come back in request order, None for unknown ids
+        for album_id, album in zip(ids, response.json().get("albums", [])):
+            upcs[by_id[album_id]] = (album or {}).get("external_ids", {}).get("upc")
+    return upcs
+
+
+def _get_itunes_album_upcs(apple_urls: list[str]) -> dict[str, str | None]:
+    """UPCs for many Apple Music album URLs via comma-separated iTunes lookups."""
+    by_id = {}
+    for url in apple_urls:
+        match = re.search(r"/id(\d+)", url)
+        if match:
+            by_id[match.group(1)] = url
+    upcs: dict[str, str | None] = {}
+    for ids in _batches(sorted(by_id), ITUNES_LOOKUP_BATCH):
+        response = _itunes_get(ITUNES_LOOKUP_URL, {"id": ",".join(ids)}, ITUNES_LOOKUP)
+        if response.status_code != 200:
+            continue
+        found = {
+            str(result.get("collectionId")): result.get("upc")
+            for result in response.json().get("results", [])
+            if result.get("upc")
+        }
+        for collection_id in ids:
+            upcs[by_id[collection_id]] = found.get(collection_id)
+    return upcs
+
+
+def _lookup_itunes_by_upcs(upcs: list[str]) -> dict[str, tuple[str, str | None] | None]:
+    """Apple Music URL and artwork for many UPCs via comma-separated lookups.
+
+    Only UPCs the response can be attributed to are returned; if a result
+    doesn't echo its UPC, the rest of that batch is left to single lookups.
+    """
+    found: dict[str, tuple[str, str | None] | None] = {}
+    for batch in _batches(sorted(set(upcs)), ITUNES_LOOKUP_BATCH):
+        response = _itunes_get(ITUNES_LOOKUP_URL, {"upc": ",".join(batch), "country": "ch"}, ITUNES_LOOKUP)
+        if response.status_code != 200:
+            continue
+        attributable = True
+        for result in response.json().get("results", []):
+            url = result.get("collectionViewUrl")
+            if not url:
+                continue
+            if not result.get("upc"):
+                attributable = False
+                continue
+            artwork = result.get("artworkUrl100")
+            if artwork:
+                artwork = artwork.replace("100x100", ARTWORK_SIZE)
+            found.setdefault(result["upc"], (url, artwork))
+        if attributable:
+            for upc in batch:
+                found.setdefault(upc, None)
+    return found
+
+
+class UpcBridge:
+    """UPC-based cross-links between Spotify and Apple Music, resolved in bulk
+    up front for every album that already has one of the two links.
+
+    Links discovered later in the run fall back to single-item lookups.
+    """
+
+    def __init__(self, token: str | None):
+        self.token = token
+        self._apple_by_spotify: dict[str, tuple[str, str | None] | None] = {}
+        self._spotify_by_apple: dict[str, str | None] = {}
+
+    @classmethod
+    def resolve(cls, albums: list[dict], token: str | None) -> "UpcBridge":
+        bridge = cls(token)
+        if not token:
+            return bridge
+
+        # Same conditions as the bridge steps in _process_album
+        spotify_urls = [
+            a["streaming_link_spotify"] for a in albums
+            if a["streaming_link_spotify"] and a["streaming_link_apple"] is None
+            and not a.get("apple_link_is_substitute")
+        ]
+        apple_urls = [
+            a["streaming_link_apple"] for a in albums
+            if a["streaming_link_apple"] and a["streaming_link_spotify"] is None
+            and not a.get("spotify_link_is_substitute")
+        ]
+        if not spotify_urls and not apple_urls:
+            return bridge
+        print(f"Resolving UPCs for {len(spotify_urls) + len(apple_urls)} existing link(s) in bulk...")
+
+        # Spotify → UPC → Apple Music: both steps batched
+        spotify_upcs = _get_spotify_album_upcs(token, spotify_urls)
+        apple_by_upc = _lookup_itunes_by_upcs([upc for upc in spotify_upcs.values() if upc])
+        for url, upc in spotify_upcs.items():
+            if not upc:
+                bridge._apple_by_spotify[url] = None
+            elif upc in apple_by_upc:
+                bridge._apple_by_spotify[url] = apple_by_upc[upc]
+
+        # Apple Music → UPC batched; Spotify has no multi-UPC search
+        apple_upcs = _get_itunes_album_upcs(apple_urls)
+        upcs = sorted({upc for upc in apple_upcs.values() if upc})
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            found = executor.map(lambda upc: _search_spotify_by_upc(token, upc), upcs)
+            spotify_by_upc = dict(zip(upcs, found))
+        for url, upc in apple_upcs.items():
+            bridge._spotify_by_apple[url] = spotify_by_upc.get(upc) if upc else None
+        return bridge
+
+    def apple_for_spotify(self, spotify_url: str) -> tuple[str, str | None] | None:
+        """(Apple Music URL, artwork) of the album with the same UPC, if any."""
+        if spotify_url in self._apple_by_spotify:
+            return self._apple_by_spotify[spotify_url]
+        upc = _get_spotify_album_upc(self.token, spotify_url)
+        return _lookup_itunes_by_upc(upc) if upc else None
+
+    def spotify_for_apple(self, apple_url: str) -> str | None:
+        """Spotify URL of the album with the same UPC, if any."""
+        if apple_url in self._spotify_by_apple:
+            return self._spotify_by_apple[apple_url]
+        upc = _get_itunes_album_upc(apple_url)
+        return _search_spotify_by_upc(self.token, upc) if upc else None
+
+
+def _search_itunes(
+    query: str, country: str = "ch", cancel: threading.Event | None = None, **extra_params
+) -> list[dict]:
     """Run an iTunes Search API query and return album results."""
-    response = requests.get(
+    response = _itunes_get(
         ITUNES_SEARCH_URL,
-        params={"term": query, "media": "music", "entity": "album", "limit": 25, "country": country},
+        {"term": query, "media": "music", "entity": "album", "limit": 25, "country": country, **extra_params},
+        ITUNES_SEARCH,
+        cancel,
     )
     if response.status_code != 200:
         print(f"    iTunes search error {response.status_code} (country={country}): {response.text[:120]}")
@@ -273,52 +427,25 @@ def _search_itunes(query: str, country: str = "ch") -> list[dict]:
     return response.json().get("results", [])
 
 
-def _title_matches(norm_title: str, r_title: str) -> bool:
-    """True if titles are similar enough: substring or ≥60% word overlap."""
-    if norm_title in r_title or r_title in norm_title:
-        return True
-    return _word_overlap(norm_title, r_title) >= 0.6
+def _apple_match(ranked: tuple[dict, float] | None) -> tuple[str, str | None, float] | None:
+    if not ranked:
+        return None
+    result, score = ranked
+    artwork = result.get("artworkUrl100")
+    if artwork:
+        artwork = artwork.replace("100x100", ARTWORK_SIZE)
+    return result.get("collectionViewUrl"), artwork, score
 
 
 def _match_apple_result(
     results: list[dict], title: str, artist: str, release_year: int | None
-) -> tuple[str, str | None] | None:
-    """Find the best matching album from iTunes results. Prefers exact year match, falls back to title+artist match.
+) -> tuple[str, str | None, float] | None:
+    """Find the best matching album from iTunes results: the closest title and
+    release year wins, so reissues are accepted when the original isn't listed.
 
-    Returns (collectionViewUrl, artworkUrl) or None.
+    Returns (collectionViewUrl, artworkUrl, score) or None.
     """
-    norm_title = _normalize(title)
-    norm_artist = _normalize(artist)
-
-    exact_match = None
-    fuzzy_match = None
-
-    for result in results:
-        r_title = _normalize(result.get("collectionName", ""))
-        r_artist = _normalize(result.get("artistName", ""))
-        r_date = result.get("releaseDate", "")
-
-        if not _title_matches(norm_title, r_title):
-            continue
-        if norm_artist not in r_artist and r_artist not in norm_artist:
-            continue
-
-        url = result.get("collectionViewUrl")
-        artwork = result.get("artworkUrl100")
-        if artwork:
-            artwork = artwork.replace("100x100", ARTWORK_SIZE)
-
-        # Check year match
-        if release_year and r_date:
-            if int(r_date[:4]) == release_year and not exact_match:
-                exact_match = (url, artwork)
-            elif not fuzzy_match:
-                fuzzy_match = (url, artwork)
-        elif not fuzzy_match:
-            fuzzy_match = (url, artwork)
-
-    # Prefer exact year match, but accept reissues
-    return exact_match or fuzzy_match
+    return _apple_match(_apple_index(results).best(title, artist, release_year))
 
 
 def _match_apple_result_loose(
@@ -330,9 +457,9 @@ def _match_apple_result_loose(
     """
     if not release_year:
         return None
-    norm_artist = _normalize(artist)
+    norm_artist = normalize(artist)
     for result in results:
-        r_artist = _normalize(result.get("artistName", ""))
+        r_artist = normalize(result.get("artistName", ""))
         r_date = result.get("releaseDate", "")
         if norm_artist not in r_artist and r_artist not in norm_artist:
             continue
@@ -347,13 +474,15 @@ def _match_apple_result_loose(
     return None
 
 
-def _pick_artist_top_album(artist: str, country: str = "ch") -> tuple[str, str | None, str | None, str | None, int | None] | None:
+def _pick_artist_top_album(
+    artist: str, country: str = "ch", cancel: threading.Event | None = None
+) -> tuple[str, str | None, str | None, str | None, int | None] | None:
     """Return the collectionViewUrl, artworkUrl, title, artist, year of the artist's most popular album on iTunes."""
-    ascii_artist = _to_search_query(artist)
-    norm_artist = _normalize(artist)
-    results = _search_itunes(ascii_artist, country)
+    ascii_artist = strip_accents(artist)
+    norm_artist = normalize(artist)
+    results = _search_itunes(ascii_artist, country, cancel)
     for result in results:
-        r_artist = _normalize(result.get("artistName", ""))
+        r_artist = normalize(result.get("artistName", ""))
         if norm_artist in r_artist or r_artist in norm_artist:
             url = result.get("collectionViewUrl")
             if url:
@@ -366,26 +495,22 @@ def _pick_artist_top_album(artist: str, country: str = "ch") -> tuple[str, str |
     return None
 
 
-def search_apple_music(
-    title: str, artist: str, release_year: int | None, country: str = "ch"
-) -> tuple[str | None, str | None, bool, dict | None]:
-    """Try multiple iTunes search strategies with progressively looser queries.
+def _apple_music_strategies(
+    title: str, artist: str, release_year: int | None, country: str
+) -> list:
+    """The search strategies for one storefront, in order of precedence.
 
-    Searches the given storefront first; falls back to the US store if nothing is found.
-    Returns (url, artwork_url, is_substitute, sub_meta) where sub_meta is a dict
-    with {title, artist, release_year} when is_substitute is True, else None.
+    Each takes speculative.first_match's cancel event and returns
+    (url, artwork_url, is_substitute, sub_meta, confidence) or None.
     """
-    if not title or not artist:
-        return None, None, False, None
-
     # Strip parenthetical subtitles (e.g. "... (Bande Originale Du Film)" → "...")
     stripped_title = re.sub(r"\s*\(.*?\)", "", title).strip()
     # ASCII versions (strip accents) so the iTunes API doesn't choke on special chars
-    ascii_title = _to_search_query(title)
-    ascii_stripped = _to_search_query(stripped_title)
+    ascii_title = strip_accents(title)
+    ascii_stripped = strip_accents(stripped_title)
     # First word of artist for partial matches (e.g. "Erroll" from "Erroll Garner")
     artist_first = artist.split()[0] if artist else artist
-    ascii_artist = _to_search_query(artist)
+    ascii_artist = strip_accents(artist)
 
     # Build ordered list of (search_query, match_title, match_artist) attempts
     attempts = [
@@ -412,34 +537,58 @@ def search_apple_music(
         ),  # 8. first name + stripped
     ]
 
-    for query, match_title, match_artist in attempts:
-        results = _search_itunes(query, country)
-        match = _match_apple_result(results, match_title, match_artist, release_year)
-        if match:
-            url, artwork = match
-            return url, artwork, False, None
-        time.sleep(0.2)
+    def exact(query, match_title, match_artist):
+        def strategy(cancel):
+            results = _search_itunes(query, country, cancel)
+            match = _match_apple_result(results, match_title, match_artist, release_year)
+            if match and match[0]:
+                url, artwork, score = match
+                return url, artwork, False, None, score
+            return None
+        return strategy
+
+    def substitute(match):
+        url, artwork, sub_title, sub_artist, sub_year = match
+        score = similarity(title, artist, release_year, sub_title, sub_artist, sub_year)
+        return url, artwork, True, {"title": sub_title, "artist": sub_artist, "release_year": sub_year}, score
 
     # Strategy 9: artist + year loose match
-    if release_year:
-        results = _search_itunes(f"{ascii_artist} {release_year}", country)
+    def artist_and_year(cancel):
+        results = _search_itunes(f"{ascii_artist} {release_year}", country, cancel)
         match = _match_apple_result_loose(results, artist, release_year)
-        if match:
-            url, artwork, sub_title, sub_artist, sub_year = match
-            return url, artwork, True, {"title": sub_title, "artist": sub_artist, "release_year": sub_year}
-        time.sleep(0.2)
+        return substitute(match) if match else None
 
     # Fall back to artist's most popular album
-    match = _pick_artist_top_album(artist, country)
-    if match:
-        url, artwork, sub_title, sub_artist, sub_year = match
-        return url, artwork, True, {"title": sub_title, "artist": sub_artist, "release_year": sub_year}
+    def artist_top_album(cancel):
+        match = _pick_artist_top_album(artist, country, cancel)
+        return substitute(match) if match else None
+
+    strategies = [exact(*attempt) for attempt in attempts]
+    if release_year:
+        strategies.append(artist_and_year)
+    strategies.append(artist_top_album)
+    return strategies
+
+
+def search_apple_music(
+    title: str, artist: str, release_year: int | None, country: str = "ch"
+) -> tuple[str | None, str | None, bool, dict | None, float | None]:
+    """Try multiple iTunes search strategies with progressively looser queries.
 
+    Searches the given storefront first; falls back to the US store if nothing is found.
+    Returns (url, artwork_url, is_substitute, sub_meta, confidence) where sub_meta
+    is a dict with {title, artist, release_year} when is_substitute is True, else
+    None, and confidence is the link's match score (see match_ranking).
+    """
+    if not title or not artist:
+        return None, None, False, None, None
+
+    strategies = _apple_music_strategies(title, artist, release_year, country)
     # Nothing found in this storefront — retry in the US store
     if country != "us":
-        return search_apple_music(title, artist, release_year, country="us")
+        strategies += _apple_music_strategies(title, artist, release_year, "us")
 
-    return None, None, False, None
+    return first_match(strategies, SPECULATION_WIDTH) or (None, None, False, None, None)
 
 
 def get_albums_missing_links(client: Client) -> list[dict]:
@@ -454,15 +603,121 @@ def get_albums_missing_links(client: Client) -> list[dict]:
     return response.data
 
 
-MAX_WORKERS = 1
+# Throughput is set by the per-provider limiters in rate_limit.py; workers
+# only need to be enough to keep every provider's budget busy.
+MAX_WORKERS = 8
+
 
+# Albums per artist listing: iTunes' maximum, and two pages of Spotify's 50
+ITUNES_ARTIST_LISTING_LIMIT = 200
+SPOTIFY_ARTIST_LISTING_PAGES = 2
+SPOTIFY_PAGE_SIZE = 50
 
-def _process_album(album: dict, client: Client, spotify_token: str | None) -> tuple[bool, bool, bool]:
+
+class ArtistIndex:
+    """Discographies of catalogue artists, fetched and tokenized once per
+    artist, so their albums can be matched without a search each.
+
+    Only exact (normalized) title matches are answered locally; anything else
+    falls through to the regular search cascade.
+    """
+
+    def __init__(self):
+        self._apple: dict[str, CandidateIndex] = {}
+        self._spotify: dict[str, CandidateIndex] = {}
+
+    def add_apple(self, artist: str, country: str = "ch") -> None:
+        results = _search_itunes(
+            strip_accents(artist), country,
+            attribute="artistTerm", limit=ITUNES_ARTIST_LISTING_LIMIT,
+        )
+        self._apple[normalize(artist)] = _apple_index(results)
+
+    def add_spotify(self, token: str, artist: str) -> None:
+        items = []
+        for page in range(SPOTIFY_ARTIST_LISTING_PAGES):
+            response = _spotify_get(token, SPOTIFY_SEARCH_URL, {
+                "q": f"artist:{strip_accents(artist)}", "type": "album",
+                "limit": SPOTIFY_PAGE_SIZE, "offset": page * SPOTIFY_PAGE_SIZE,
+            })
+            if response is None or response.status_code != 200:
+                break
+            page_items = response.json().get("albums", {}).get("items", [])
+            items += page_items
+            if len(page_items) < SPOTIFY_PAGE_SIZE:
+                break
+        self._spotify[normalize(artist)] = _spotify_index(items)
+
+    @staticmethod
+    def _best(listing: CandidateIndex | None, title: str, artist: str, release_year: int | None):
+        if not listing:
+            return None
+        stripped_title = re.sub(r"\s*\(.*?\)", "", title).strip()
+        return (
+            listing.best(title, artist, release_year, min_title_similarity=1.0)
+            or listing.best(stripped_title, artist, release_year, min_title_similarity=1.0)
+        )
+
+    def match_apple(self, title: str, artist: str, release_year: int | None) -> tuple[str, str | None, float] | None:
+        """(url, artwork_url, score) of an exact title match in the artist's listing."""
+        return _apple_match(self._best(self._apple.get(normalize(artist)), title, artist, release_year))
+
+    def match_spotify(self, title: str, artist: str, release_year: int | None) -> tuple[str, float] | None:
+        """(url, score) of an exact title match in the artist's listing."""
+        return _spotify_match(self._best(self._spotify.get(normalize(artist)), title, artist, release_year))
+
+
+def build_artist_index(albums: list[dict], spotify_token: str | None) -> ArtistIndex:
+    """Fetch listings for artists with several albums missing a link.
+
+    Artists with a single album aren't worth it: that album's own first
+    search usually finds it.
+    """
+    apple_counts: dict[str, int] = {}
+    spotify_counts: dict[str, int] = {}
+    names: dict[str, str] = {}
+    for album in albums:
+        if not album.get("artist") or not album.get("title"):
+            continue
+        key = normalize(album["artist"])
+        if key == "various artists":
+            continue
+        names.setdefault(key, album["artist"])
+        if album["streaming_link_apple"] is None and not album.get("apple_link_is_substitute"):
+            apple_counts[key] = apple_counts.get(key, 0) + 1
+        if album["streaming_link_spotify"] is None and not album.get("spotify_link_is_substitute"):
+            spotify_counts[key] = spotify_counts.get(key, 0) + 1
+
+    index = ArtistIndex()
+    jobs = [(index.add_apple, names[key]) for key, n in apple_counts.items() if n > 1]
+    if spotify_token:
+        jobs += [
+            (lambda artist: index.add_spotify(spotify_token, artist), names[key])
+            for key, n in spotify_counts.items() if n > 1
+        ]
+    if not jobs:
+        return index
+
+    print(f"Fetching {len(jobs)} artist listing(s) shared by several albums...")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for future in [executor.submit(fn, artist) for fn, artist in jobs]:
+            future.result()
+    return index
+
+
+def _process_album(
+    album: dict,
+    writes: WriteBehindBuffer,
+    spotify_token: str | None,
+    index: ArtistIndex | None = None,
+    bridge: UpcBridge | None = None,
+) -> tuple[bool, bool, bool]:
     """Process a single album's streaming links. Returns (updated, apple_sub, spotify_sub)."""
     title = album["title"]
     artist = album["artist"]
     release_year = album.get("release_year")
     updates = {}
+    bridge = bridge or UpcBridge(spotify_token)
 
     print(f"  {title} — {artist}")
 
@@ -471,22 +726,33 @@ def _process_album(album: dict, client: Client, spotify_token: str | None) -> tu
         spotify_url = updates.get("streaming_link_spotify") or album.get("streaming_link_spotify")
         apple_url = None
         if spotify_url and spotify_token:
-            upc = _get_spotify_album_upc(spotify_token, spotify_url)
-            if upc:
-                upc_result = _lookup_itunes_by_upc(upc)
-                if upc_result:
-                    apple_url, artwork_url = upc_result
-                    updates["streaming_link_apple"] = apple_url
-                    updates["apple_link_is_substitute"] = False
-                    if artwork_url and not album.get("cover_image_url"):
-                        updates["cover_image_url"] = artwork_url
-                    print(f"    Apple Music (via UPC): {apple_url}")
+            upc_result = bridge.apple_for_spotify(spotify_url)
+            if upc_result:
+                apple_url, artwork_url = upc_result
+                updates["streaming_link_apple"] = apple_url
+                updates["apple_link_is_substitute"] = False
+                updates["apple_link_confidence"] = UPC_CONFIDENCE
+                if artwork_url and not album.get("cover_image_url"):
+                    updates["cover_image_url"] = artwork_url
+                print(f"    Apple Music (via UPC): {apple_url}")
+
+        if not apple_url and index:
+            match = index.match_apple(title, artist, release_year)
+            if match:
+                apple_url, artwork_url, score = match
+                updates["streaming_link_apple"] = apple_url
+                updates["apple_link_is_substitute"] = False
+                updates["apple_link_confidence"] = round(score, 3)
+                if artwork_url and not album.get("cover_image_url"):
+                    updates["cover_image_url"] = artwork_url
+                print(f"    Apple Music (artist listing): {apple_url}")
 
         if not apple_url:
-            url, artwork_url, is_sub, sub_meta = search_apple_music(title, artist, release_year)
+            url, artwork_url, is_sub, sub_meta, score = search_apple_music(title, artist, release_year)
             if url:
                 updates["streaming_link_apple"] = url
                 updates["apple_link_is_substitute"] = is_sub
+                updates["apple_link_confidence"] = round(score, 3)
                 if artwork_url and not album.get("cover_image_url"):
                     updates["cover_image_url"] = artwork_url
                 if is_sub and sub_meta:
@@ -514,7 +780,6 @@ def _process_album(album: dict, client: Client, spotify_token: str | None) -> tu
                     print(f"    Apple Music: {url}")
             else:
                 print("    Apple Music: not found")
-        time.sleep(0.5)
 
     apple_sub = updates.get("apple_link_is_substitute", False)
 
@@ -524,31 +789,39 @@ def _process_album(album: dict, client: Client, spotify_token: str | None) -> tu
         apple_url = updates.get("streaming_link_apple") or album.get("streaming_link_apple")
         spotify_url = None
         if apple_url:
-            upc = _get_itunes_album_upc(apple_url)
-            if upc:
-                spotify_url = _search_spotify_by_upc(spotify_token, upc)
-                if spotify_url:
-                    updates["streaming_link_spotify"] = spotify_url
-                    updates["spotify_link_is_substitute"] = False
-                    print(f"    Spotify (via UPC): {spotify_url}")
+            spotify_url = bridge.spotify_for_apple(apple_url)
+            if spotify_url:
+                updates["streaming_link_spotify"] = spotify_url
+                updates["spotify_link_is_substitute"] = False
+                updates["spotify_link_confidence"] = UPC_CONFIDENCE
+                print(f"    Spotify (via UPC): {spotify_url}")
+
+        if not spotify_url and index:
+            match = index.match_spotify(title, artist, release_year)
+            if match:
+                spotify_url, score = match
+                updates["streaming_link_spotify"] = spotify_url
+                updates["spotify_link_is_substitute"] = False
+                updates["spotify_link_confidence"] = round(score, 3)
+                print(f"    Spotify (artist listing): {spotify_url}")
 
         if not spotify_url:
-            url, is_sub = search_spotify(spotify_token, title, artist, release_year)
+            url, is_sub, score = search_spotify(spotify_token, title, artist, release_year)
             if url:
                 updates["streaming_link_spotify"] = url
                 updates["spotify_link_is_substitute"] = is_sub
+                updates["spotify_link_confidence"] = round(score, 3)
                 if is_sub:
                     print(f"    Spotify (substitute): {url}")
                 else:
                     print(f"    Spotify: {url}")
             else:
                 print("    Spotify: not found")
-        time.sleep(0.5)
 
     spotify_sub = updates.get("spotify_link_is_substitute", False)
 
     if updates:
-        client.table("albums").update(updates).eq("album_id", album["album_id"]).execute()
+        writes.update(album["album_id"], updates)
         return True, apple_sub, spotify_sub
 
     return False, False, False
@@ -566,12 +839,19 @@ def main():
     if not albums:
         return
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+    bridge = UpcBridge.resolve(albums, spotify_token)
+    index = build_artist_index(albums, spotify_token)
+
+    with (
+        WriteBehindBuffer(client) as writes,
+        concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor,
+    ):
         futures = [
-            executor.submit(_process_album, album, client, spotify_token)
+            executor.submit(_process_album, album, writes, spotify_token, index, bridge)
             for album in albums
         ]
         results = [f.result() for f in concurrent.futures.as_completed(futures)]
+    close_cache()
 
     updated = sum(1 for was_updated, _, _ in results if was_updated)
     apple_substitute_count = sum(1 for _, apple_sub, _ in results if apple_sub)
@@ -0,0 +1,188 @@
+"""
+Record/replay of the seeding scripts' HTTP traffic, for offline benchmarks.
+
+HTTP_CASSETTE=record sends requests to the network as usual and saves every
+request/response pair when the script exits. HTTP_CASSETTE=replay answers
+requests from the saved pairs without touching the network, after
+HTTP_CASSETTE_LATENCY_MS milliseconds ("recorded" to replay each response's
+original duration). Identical requests get their recorded responses in
+order, so retried 429s replay as they happened.
+
+Cassettes are gzipped JSON lines in HTTP_CASSETTE_DIR (default
+output/cassettes/), one per recording script; replay reads them all. They
+hold response bodies, not request headers, so API keys stay out of them,
+and token fields in JSON bodies (e.g. Spotify's access_token) are redacted.
+The on-disk HTTP cache is bypassed while a cassette is in use.
+"""
+
+import atexit
+import glob
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from disk_cache import OUTPUT_DIR
+
+DEFAULT_CASSETTE_DIR = os.path.join(OUTPUT_DIR, "cassettes")
+# Response headers the scripts read; everything else is dropped
+KEPT_HEADERS = ("Content-Type", "Retry-After")
+# JSON fields holding credentials, replaced by REDACTED when recording
+SECRET_FIELDS = ("access_token", "refresh_token", "id_token")
+REDACTED = "redacted"
+
+
+def mode() -> str | None:
+    """"record", "replay", or None when cassettes are off."""
+    value = os.environ.get("HTTP_CASSETTE", "").lower()
+    return value if value in ("record", "replay") else None
+
+
+def cassette_dir() -> str:
+    return os.environ.get("HTTP_CASSETTE_DIR") or DEFAULT_CASSETTE_DIR
+
+
+def request_key(request: requests.PreparedRequest) -> str:
+    """Method, normalized URL with sorted query, and a digest of the body."""
+    parts = urlsplit(request.url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    url = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ""))
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode()
+    digest = hashlib.sha256(body).hexdigest()[:16] if body else "-"
+    return f"{request.method} {url} {digest}"
+
+
+def redact(body: str) -> str:
+    """`body` with the values of SECRET_FIELDS in a JSON object replaced."""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    if not isinstance(data, dict) or not any(field in data for field in SECRET_FIELDS):
+        return body
+    return json.dumps({k: REDACTED if k in SECRET_FIELDS else v for k, v in data.items()}, ensure_ascii=False)
+
+
+class RecordingAdapter(HTTPAdapter):
+    """A pooled HTTPAdapter that also keeps each exchange for the cassette."""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._interactions: list[dict] = []
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        interaction = {
+            "key": request_key(request),
+            "status": response.status_code,
+            "headers": {h: response.headers[h] for h in KEPT_HEADERS if h in response.headers},
+            "body": redact(response.text),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+        with self._lock:
+            self._interactions.append(interaction)
+        return response
+
+    def save(self) -> None:
+        with self._lock:
+            interactions = list(self._interactions)
+        if not interactions:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            for interaction in interactions:
+                f.write(json.dumps(interaction, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+        print(f"HTTP cassette: recorded {len(interactions)} request(s) to {self.path}")
+
+
+class ReplayAdapter(BaseAdapter):
+    """Serves recorded responses in place of the network."""
+
+    def __init__(self, paths: list[str], latency: float | None):
+        super().__init__()
+        self.latency = latency  # seconds, or None to replay recorded durations
+        self.replayed = 0
+        self.missed = 0
+        self._interactions: dict[str, deque] = {}
+        self._lock = threading.Lock()
+        for path in paths:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    interaction = json.loads(line)
+                    self._interactions.setdefault(interaction["key"], deque()).append(interaction)
+
+    def _next(self, key: str) -> dict | None:
+        with self._lock:
+            queue = self._interactions.get(key)
+            if not queue:
+                self.missed += 1
+                return None
+            self.replayed += 1
+            # The last response keeps answering once the recorded ones run out
+            return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        key = request_key(request)
+        interaction = self._next(key)
+        if interaction is None:
+            print(f"    Not in cassette: {key}")
+            interaction = {"status": 404, "headers": {"Content-Type": "application/json"},
+                           "body": json.dumps({"error": "not recorded"}), "elapsed_ms": 0}
+
+        time.sleep(interaction["elapsed_ms"] / 1000 if self.latency is None else self.latency)
+        response = requests.Response()
+        response.status_code = interaction["status"]
+        response.headers = CaseInsensitiveDict(interaction["headers"])
+        response._content = interaction["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+    def report(self) -> None:
+        print(f"HTTP cassette: replayed {self.replayed} request(s), {self.missed} not recorded")
+
+
+def _latency() -> float | None:
+    value = os.environ.get("HTTP_CASSETTE_LATENCY_MS")
+    return None if value == "recorded" else float(value or 0) / 1000
+
+
+def adapter(**pool_kwargs) -> BaseAdapter | None:
+    """The transport adapter for the current mode, or None when cassettes are off.
+
+    `pool_kwargs` configure the real connection pool when recording.
+    """
+    current = mode()
+    if current == "record":
+        name = os.path.splitext(os.path.basename(sys.argv[0] or "session"))[0] or "session"
+        recorder = RecordingAdapter(os.path.join(cassette_dir(), f"{name}.jsonl.gz"), **pool_kwargs)
+        atexit.register(recorder.save)
+        return recorder
+    if current == "replay":
+        paths = sorted(glob.glob(os.path.join(cassette_dir(), "*.jsonl.gz")))
+        if not paths:
+            raise FileNotFoundError(f"No cassettes in {cassette_dir()}; record some with HTTP_CASSETTE=record")
+        player = ReplayAdapter(paths, _latency())
+        atexit.register(player.report)
+        return player
+    return None
@@ -0,0 +1,101 @@
+"""
+Persistent key-value cache for the seeding scripts.
+Stores JSON values in a local SQLite file with a per-entry TTL and evicts the
+least recently used entries once it grows past a size bound. Safe to share
+between threads and between scripts run one after another.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
+OUTPUT_DIR = os.path.join(BACKEND_ROOT, "output")
+
+DEFAULT_MAX_ENTRIES = 100_000
+# Inserts between eviction passes, so trimming stays off the hot path
+_EVICT_EVERY = 500
+
+_MISSING = object()
+
+
+class DiskCache:
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        # WAL lets a second script read while another one writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed_idx ON entries (accessed_at)")
+        self._db.commit()
+        self._inserts = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default=None):
+        """Return the cached value for key, or default if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return default
+            self._db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value, ttl: float) -> None:
+        """Store a JSON-serializable value for ttl seconds."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            self._db.commit()
+            self._inserts += 1
+            if self._inserts % _EVICT_EVERY == 0:
+                self._evict(now)
+
+    def get_or_set(self, key: str, compute, ttl: float):
+        """Return the cached value, or compute, store and return it."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value, ttl)
+        return value
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then the least recently used beyond max_entries."""
+        self._db.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM entries WHERE key IN ("
+            " SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._evict(time.time())
+            self._db.close()
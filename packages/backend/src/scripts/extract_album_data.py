@@ -10,11 +10,15 @@ in packages/backend/.env.local (set PRODUCTION=True to use .env.production)
 """
 
 import concurrent.futures
+import hashlib
+import io
 import json
+import math
+import multiprocessing
 import os
+import queue
 import re
 import sys
-import tempfile
 import time
 from datetime import datetime
 
@@ -24,6 +28,10 @@ from google.genai import types
 from PIL import Image
 from supabase import create_client, Client
 
+import gemini_batch
+from disk_cache import OUTPUT_DIR, DiskCache
+from gemini_batch import GeminiBatchJobs, LocalBatchJobs
+
 
 # --- Configuration ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -68,10 +76,43 @@ Return ONLY a JSON object with these keys:
 Return ONLY valid JSON, no other text.\
 """
 
+# Several pages per request: each image follows a text part naming its file
+BATCH_EXTRACTION_PROMPT = f"""\
+Each photo above is a different jazz calendar page, introduced by a line \
+"Image: <filename>". Read every page as described below.
+
+{EXTRACTION_PROMPT}
+
+Instead of a single object, return ONLY a JSON array with one object per photo, \
+in the order given. Add an "image" key to each object with the filename that \
+introduced its photo.\
+"""
+
 PROJECT_ROOT = os.path.abspath(os.path.join(BACKEND_ROOT, "..", ".."))
 
 PNG_PHOTOS_DIR = os.path.join(PROJECT_ROOT, "data", "png-images")
 
+# Payload sent to the model: "png" (lossless), or a smaller "jpeg" / "webp"
+IMAGE_FORMAT = os.environ.get("EXTRACTION_IMAGE_FORMAT", "png").lower()
+IMAGE_MIME_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+# Gemini scales larger images down to fit this, so pixels beyond it are wasted
+MAX_IMAGE_SIDE = 3072
+# Upscaling makes the small printed text easier to read, up to MAX_IMAGE_SIDE
+TEXT_UPSCALE = 2
+# 4:4:4 chroma keeps the edges of small text sharp in JPEG
+JPEG_OPTIONS = {"quality": 90, "subsampling": 0}
+WEBP_OPTIONS = {"quality": 90, "method": 4}
+
+# Parsed model responses, keyed by image content, model and prompt version, so
+# unchanged images are never sent twice (EXTRACTION_CACHE=off disables it)
+DEFAULT_EXTRACTION_CACHE_PATH = os.path.join(OUTPUT_DIR, "extraction-cache.sqlite3")
+EXTRACTION_CACHE_TTL_SECONDS = 365 * 24 * 3600
+# Everything besides the image that shapes the model's answer. Answers from
+# single-page and multi-page requests share keys, so both prompts count.
+PROMPT_VERSION = hashlib.sha256(
+    f"{EXTRACTION_PROMPT}|{BATCH_EXTRACTION_PROMPT}|{IMAGE_FORMAT}|{MAX_IMAGE_SIDE}|{TEXT_UPSCALE}".encode()
+).hexdigest()[:16]
+
 
 def get_supabase_client() -> Client:
     url = os.environ.get("SUPABASE_URL")
@@ -92,8 +133,17 @@ def find_png_files(directory):
     return png_files
 
 
-def _parse_json_from_response(text):
-    """Extracts and parses a JSON object from the model's response text."""
+def _parse_json_from_response(text, filenames=None):
+    """Extracts and parses a JSON object from the model's response text.
+
+    With `filenames`, the response is a batch answer instead: a JSON array of
+    objects tagged with an "image" filename. Returns {filename: object} for the
+    objects that could be parsed and matched; a malformed item only loses its
+    own entry. Untagged objects are matched by position if the array is intact.
+    """
+    if filenames is not None:
+        return _parse_batch_response(text, filenames)
+
     # Try direct JSON parse first
     try:
         return json.loads(text.strip())
@@ -111,6 +161,60 @@ def _parse_json_from_response(text):
     return None
 
 
+def _parse_batch_response(text, filenames):
+    items = None
+    array_match = re.search(r"\[.*\]", text, re.DOTALL)
+    for candidate in (text.strip(), array_match.group() if array_match else None):
+        if candidate is None:
+            continue
+        try:
+            parsed = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(parsed, list):
+            items = parsed
+            break
+    intact = items is not None
+
+    if not intact:
+        # Salvage the objects that are valid on their own
+        items = []
+        for object_match in re.finditer(r"\{[^{}]*\}", text, re.DOTALL):
+            try:
+                items.append(json.loads(object_match.group()))
+            except json.JSONDecodeError:
+                continue
+        if not items:
+            return None
+
+    by_name = {name.lower(): name for name in filenames}
+    records = {}
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        name = by_name.get(str(item.get("image") or "").strip().lower())
+        if name is None and intact and len(items) == len(filenames):
+            name = filenames[i]
+        if name is not None and name not in records:
+            records[name] = item
+    return records
+
+
+def get_extraction_cache() -> DiskCache | None:
+    if os.environ.get("EXTRACTION_CACHE", "").lower() in ("off", "0", "false"):
+        return None
+    return DiskCache(os.environ.get("EXTRACTION_CACHE_PATH") or DEFAULT_EXTRACTION_CACHE_PATH)
+
+
+def extraction_cache_key(image_path, model=MODEL_NAME) -> str:
+    """Content hash of the image file, with the model and prompt version."""
+    digest = hashlib.sha256()
+    with open(image_path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return f"{digest.hexdigest()}:{model}:{PROMPT_VERSION}"
+
+
 def _calendar_date_to_day_of_year(date_str: str) -> int | None:
     """Convert a calendar date like '02 JAN' to a day-of-year integer (e.g. 2)."""
     try:
@@ -120,52 +224,74 @@ def _calendar_date_to_day_of_year(date_str: str) -> int | None:
         return None
 
 
-def _crop_text_area(image_path):
+def _crop_text_area(image_path, image_format=IMAGE_FORMAT):
     """Crops to the bottom portion of the image where the text metadata lives.
 
     The cropped area is upscaled 2x so the small printed text is easier for
-    the vision model to read accurately.
+    the vision model to read accurately, but never past MAX_IMAGE_SIDE; large
+    photos are scaled down instead, decoding JPEGs at reduced size (draft) and
+    shrinking by whole factors (reduce) before the final resample.
+
+    Returns (image_bytes, mime_type), encoded in memory.
     """
     img = Image.open(image_path)
     width, height = img.size
     # The text area is always in the bottom ~50% of the calendar page
+    crop_height = height - int(height * 0.5)
+    scale = min(TEXT_UPSCALE, MAX_IMAGE_SIDE / max(width, crop_height))
+    target = (round(width * scale), round(crop_height * scale))
+
+    if scale <= 0.5:
+        img.draft("RGB", (math.ceil(width * scale), math.ceil(height * scale)))
+        width, height = img.size
     cropped = img.crop((0, int(height * 0.5), width, height))
-    # Upscale 2x for better character recognition on small text
-    cropped = cropped.resize(
-        (cropped.width * 2, cropped.height * 2), Image.Resampling.LANCZOS
-    )
-    tmp = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-    cropped.save(tmp.name, "PNG")
-    return tmp.name
+    factor = min(cropped.width // target[0], cropped.height // target[1])
+    if factor >= 2:
+        cropped = cropped.reduce(factor)
+    if cropped.size != target:
+        cropped = cropped.resize(target, Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    if image_format == "jpeg":
+        cropped.convert("RGB").save(buffer, "JPEG", **JPEG_OPTIONS)
+    elif image_format == "webp":
+        cropped.convert("RGB").save(buffer, "WEBP", **WEBP_OPTIONS)
+    else:
+        cropped.save(buffer, "PNG")
+    return buffer.getvalue(), IMAGE_MIME_TYPES.get(image_format, "image/png")
+
+
+def _prepare_image(image_path):
+    """Crop stage, run in a worker process. Returns (image_path, image_bytes, mime_type);
+    the bytes are None if the image could not be read."""
+    try:
+        return (image_path, *_crop_text_area(image_path))
+    except Exception as e:
+        print(f"Error preparing {image_path}: {e}")
+        return image_path, None, None
 
 
 def extract_album_info_from_image(image_path, model=MODEL_NAME):
     """
     Extracts album title, artist, and release year from an image using a vision LLM.
     """
-    cropped_path = None
-    try:
-        cropped_path = _crop_text_area(image_path)
+    _, image_bytes, mime_type = _prepare_image(image_path)
+    if image_bytes is None:
+        return None
+    return extract_album_info(image_bytes, mime_type, image_path, model)
 
-        with open(cropped_path, "rb") as f:
-            image_bytes = f.read()
 
+def extract_album_info(image_bytes, mime_type, image_path, model=MODEL_NAME, cache=None, cache_key=None):
+    """
+    Extracts album info from the prepared crop of `image_path` using a vision LLM.
+    Parsed responses with a title are stored in `cache` under `cache_key`, if given.
+    """
+    try:
         contents = [
-            types.Part.from_bytes(data=image_bytes, mime_type="image/png"),
+            types.Part.from_bytes(data=image_bytes, mime_type=mime_type),
             EXTRACTION_PROMPT,
         ]
-        for attempt in range(4):
-            try:
-                response = client.models.generate_content(model=model, contents=contents)
-                break
-            except Exception as e:
-                if "429" in str(e) and attempt < 3:
-                    wait = 5 * (2 ** attempt)  # 5s, 10s, 20s
-                    print(f"  Rate limited on {os.path.basename(image_path)}, retrying in {wait}s...")
-                    time.sleep(wait)
-                else:
-                    raise
-
+        response = _generate_content(model, contents, os.path.basename(image_path))
         raw_text = response.text
         data = _parse_json_from_response(raw_text)
 
@@ -174,37 +300,100 @@ def extract_album_info_from_image(image_path, model=MODEL_NAME):
             print(f"  Response: {raw_text}")
             return None
 
-        raw_year = data.get("release_year")
-        if isinstance(raw_year, str):
-            year_match = re.search(r"\d{4}", raw_year)
-            raw_year = int(year_match.group()) if year_match else None
-        release_year = int(raw_year) if raw_year else None
-
-        calendar_date = str(data.get("calendar_date", "")).strip().upper()
-        calendar_order = _calendar_date_to_day_of_year(calendar_date) if calendar_date else None
-
-        def _str_or_none(val, fallback=None):
-            s = str(val).strip() if val is not None else None
-            if not s or s.lower() == "none":
-                return fallback
-            return s
-
-        return {
-            "title": _str_or_none(data.get("title"), "Unknown Title"),
-            "artist": _str_or_none(data.get("artist"), "Unknown Artist"),
-            "label_name": _str_or_none(data.get("label_name")),
-            "release_year": release_year,
-            "cover_artists": _str_or_none(data.get("cover_artists")),
-            "calendar_order": calendar_order,
-            "image_filename": None,  # filled in by main()
-        }
+        album_info = _album_info_from_response(data)
+        # Only keep answers worth reusing; anything else is asked again next run
+        if cache is not None and cache_key and _has_title(album_info):
+            cache.set(cache_key, data, EXTRACTION_CACHE_TTL_SECONDS)
+        return album_info
 
     except Exception as e:
         print(f"Error processing {image_path}: {e}")
         return None
-    finally:
-        if cropped_path:
-            os.unlink(cropped_path)
+
+
+def extract_album_batch(prepared_images, model=MODEL_NAME, cache=None, cache_keys=None) -> dict[str, dict]:
+    """
+    Extracts album info for several prepared crops, given as (image_path,
+    image_bytes, mime_type), in a single request. Returns {image_path: album
+    info} for the images the answer covered with a title; callers retry the
+    rest one at a time. Those answers are stored in `cache` under `cache_keys`.
+    """
+    filenames = [os.path.basename(image_path) for image_path, _, _ in prepared_images]
+    contents = []
+    for filename, (_, image_bytes, mime_type) in zip(filenames, prepared_images):
+        contents += [f"Image: {filename}", types.Part.from_bytes(data=image_bytes, mime_type=mime_type)]
+    contents.append(BATCH_EXTRACTION_PROMPT)
+
+    try:
+        response = _generate_content(model, contents, f"{len(filenames)} images")
+        raw_text = response.text
+        records = _parse_json_from_response(raw_text, filenames)
+    except Exception as e:
+        print(f"Error processing batch of {len(filenames)} images: {e}")
+        return {}
+    if records is None:
+        print(f"Could not parse JSON from model response for batch of {len(filenames)} images:")
+        print(f"  Response: {raw_text}")
+        return {}
+
+    albums = {}
+    for filename, (image_path, _, _) in zip(filenames, prepared_images):
+        data = records.get(filename)
+        if data is None:
+            continue
+        try:
+            album_info = _album_info_from_response(data)
+        except Exception as e:
+            print(f"Error processing {image_path}: {e}")
+            continue
+        if not _has_title(album_info):
+            continue
+        if cache is not None and cache_keys and cache_keys.get(image_path):
+            cache.set(cache_keys[image_path], data, EXTRACTION_CACHE_TTL_SECONDS)
+        albums[image_path] = album_info
+    return albums
+
+
+def _generate_content(model, contents, label):
+    """generate_content with backoff on rate limits; `label` names the request in logs."""
+    for attempt in range(4):
+        try:
+            return client.models.generate_content(model=model, contents=contents)
+        except Exception as e:
+            if "429" in str(e) and attempt < 3:
+                wait = 5 * (2 ** attempt)  # 5s, 10s, 20s
+                print(f"  Rate limited on {label}, retrying in {wait}s...")
+                time.sleep(wait)
+            else:
+                raise
+
+
+def _album_info_from_response(data: dict) -> dict:
+    """Album fields from the model's parsed JSON."""
+    raw_year = data.get("release_year")
+    if isinstance(raw_year, str):
+        year_match = re.search(r"\d{4}", raw_year)
+        raw_year = int(year_match.group()) if year_match else None
+    release_year = int(raw_year) if raw_year else None
+
+    calendar_date = str(data.get("calendar_date", "")).strip().upper()
+    calendar_order = _calendar_date_to_day_of_year(calendar_date) if calendar_date else None
+
+    def _str_or_none(val, fallback=None):
+        s = str(val).strip() if val is not None else None
+        if not s or s.lower() == "none":
+            return fallback
+        return s
+
+    return {
+        "title": _str_or_none(data.get("title"), "Unknown Title"),
+        "artist": _str_or_none(data.get("artist"), "Unknown Artist"),
+        "label_name": _str_or_none(data.get("label_name")),
+        "release_year": release_year,
+        "cover_artists": _str_or_none(data.get("cover_artists")),
+        "calendar_order": calendar_order,
+        "image_filename": None,  # filled in by main()
+    }
 
 
 EXTRACTION_COLS = ["title", "artist", "release_year", "label_name", "cover_artists", "calendar_order", "image_filename"]
@@ -258,33 +447,243 @@ def upsert_albums_to_db(supabase: Client, albums: list[dict]) -> None:
     print(f"Upsert complete: {inserted} inserted, {updated} updated, {skipped} skipped.")
 
 
-MAX_WORKERS = 5
-
-
-def _process_image_file(image_path: str, existing_by_filename: dict) -> dict | None:
-    """Extract album info from a single image. Returns album dict or None."""
+# Model requests in flight at once
+MAX_WORKERS = int(os.environ.get("EXTRACTION_CONCURRENCY") or 5)
+# Processes cropping images; Pillow work holds the GIL, so threads can't share it
+PREPARE_WORKERS = int(os.environ.get("EXTRACTION_PREPARE_WORKERS") or os.cpu_count() or 2)
+# Pages per model request (default 1); a failed or malformed item is retried alone
+BATCH_SIZE = max(1, int(os.environ.get("EXTRACTION_BATCH_SIZE") or 1))
+# Images travel base64-encoded inline, and a request may carry at most 20 MB
+MAX_BATCH_BYTES = 14 * 1024 * 1024
+# Crops waiting for a model slot; bounds memory when there are thousands of pages
+PREPARED_QUEUE_SIZE = 2 * MAX_WORKERS * BATCH_SIZE
+# "sync" sends requests as pages are cropped; "batch" submits every page as one
+# Gemini batch job (no rate-limit stalls, for full reseeds) and "local-batch"
+# runs that path with requests sent from here instead
+EXTRACTION_MODE = os.environ.get("EXTRACTION_MODE", "sync").lower()
+BATCH_POLL_SECONDS = float(os.environ.get("EXTRACTION_BATCH_POLL_SECONDS") or gemini_batch.DEFAULT_POLL_SECONDS)
+
+
+def _needs_extraction(image_path: str, existing_by_filename: dict) -> bool:
     filename = os.path.basename(image_path)
     existing = existing_by_filename.get(filename)
-
     if existing and all(existing.get(col) is not None for col in EXTRACTION_COLS):
         print(f"Skipping {filename} (already complete in DB)")
-        return None
+        return False
+    return True
+
 
-    print(f"Processing {filename}...")
-    album_info = extract_album_info_from_image(image_path)
+def _has_title(album_info: dict | None) -> bool:
+    return bool(album_info and album_info["title"].strip() and album_info["title"] != "Unknown Title")
 
-    if (
-        album_info
-        and album_info["title"].strip()
-        and album_info["title"] != "Unknown Title"
-    ):
-        album_info["image_filename"] = filename
+
+def _valid_album(album_info: dict | None, image_path: str) -> dict | None:
+    if _has_title(album_info):
+        album_info["image_filename"] = os.path.basename(image_path)
         return album_info
 
     print(f"Could not extract valid information from {image_path}")
     return None
 
 
+def _process_prepared_image(
+    image_path: str, image_bytes: bytes, mime_type: str, cache: DiskCache | None = None, cache_key: str | None = None
+) -> dict | None:
+    """Extract album info from a prepared crop. Returns album dict or None."""
+    print(f"Processing {os.path.basename(image_path)}...")
+    album_info = extract_album_info(image_bytes, mime_type, image_path, cache=cache, cache_key=cache_key)
+    return _valid_album(album_info, image_path)
+
+
+def _cached_albums(image_paths: list[str], cache: DiskCache) -> tuple[list[dict], list[str], dict[str, str]]:
+    """Albums answered from the extraction cache, the images still to extract,
+    and the cache key of each image."""
+
+    def key(image_path):
+        try:
+            return extraction_cache_key(image_path)
+        except OSError as e:
+            print(f"Error reading {image_path}: {e}")
+            return None
+
+    # Hashing releases the GIL, so threads read and hash files in parallel
+    with concurrent.futures.ThreadPoolExecutor(max_workers=PREPARE_WORKERS) as executor:
+        keys = dict(zip(image_paths, executor.map(key, image_paths)))
+
+    albums, misses = [], []
+    for image_path in image_paths:
+        data = cache.get(keys[image_path]) if keys[image_path] else None
+        if data is None:
+            misses.append(image_path)
+            continue
+        print(f"Using cached extraction for {os.path.basename(image_path)}")
+        try:
+            album_info = _album_info_from_response(data)
+        except Exception as e:
+            print(f"Error processing {image_path}: {e}")
+            album_info = None
+        album = _valid_album(album_info, image_path)
+        if album:
+            albums.append(album)
+    return albums, misses, keys
+
+
+def _crop_all(image_paths: list[str]):
+    """Crop images across PREPARE_WORKERS processes, yielding _prepare_image
+    results as they finish. At most two crops per process are pending at a
+    time, so a slow consumer holds back the cropping."""
+    # Spawned, not forked: this process already runs the model threads
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=PREPARE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        pending: set[concurrent.futures.Future] = set()
+        for image_path in image_paths:
+            if len(pending) >= 2 * PREPARE_WORKERS:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(pool.submit(_prepare_image, image_path))
+        for future in concurrent.futures.as_completed(pending):
+            yield future.result()
+
+
+def _prepare_all(image_paths: list[str], prepared: queue.Queue) -> None:
+    """Crop stage: crop images into `prepared`; a full queue blocks further
+    crops, so cropping never runs far ahead of the model calls. Puts one
+    None per model worker when done."""
+    try:
+        for item in _crop_all(image_paths):
+            prepared.put(item)
+    finally:
+        for _ in range(MAX_WORKERS):
+            prepared.put(None)
+
+
+def _prepared_batches(prepared: queue.Queue, batch_size: int):
+    """Group crops off the queue into requests of up to `batch_size` images
+    and MAX_BATCH_BYTES; stops at the None sentinel."""
+    batch, batch_bytes = [], 0
+    while (item := prepared.get()) is not None:
+        image_bytes = item[1]
+        if image_bytes is None:
+            continue
+        if batch and batch_bytes + len(image_bytes) > MAX_BATCH_BYTES:
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(item)
+        batch_bytes += len(image_bytes)
+        if len(batch) >= batch_size:
+            yield batch
+            batch, batch_bytes = [], 0
+    if batch:
+        yield batch
+
+
+def _extract_prepared(prepared: queue.Queue, cache: DiskCache | None, keys: dict[str, str]) -> list[dict]:
+    """Model stage: one of MAX_WORKERS threads taking crops off the queue."""
+    albums = []
+    for batch in _prepared_batches(prepared, BATCH_SIZE):
+        answered = {}
+        if len(batch) > 1:
+            print(f"Processing {', '.join(os.path.basename(path) for path, _, _ in batch)}...")
+            answered = extract_album_batch(batch, cache=cache, cache_keys=keys)
+        for image_path, image_bytes, mime_type in batch:
+            if image_path in answered:
+                album_info = _valid_album(answered[image_path], image_path)
+            else:
+                if len(batch) > 1:
+                    print(f"  No usable answer for {os.path.basename(image_path)} in the batch, retrying alone")
+                album_info = _process_prepared_image(image_path, image_bytes, mime_type, cache, keys.get(image_path))
+            if album_info:
+                albums.append(album_info)
+    return albums
+
+
+def extract_albums(image_paths: list[str], cache: DiskCache | None = None) -> list[dict]:
+    """Run the crop and model stages concurrently over `image_paths`.
+
+    With a cache, images whose content, model and prompt were seen before
+    are answered from it and never cropped or sent.
+    """
+    albums: list[dict] = []
+    keys: dict[str, str] = {}
+    if cache is not None:
+        albums, image_paths, keys = _cached_albums(image_paths, cache)
+    if not image_paths:
+        return albums
+
+    prepared: queue.Queue = queue.Queue(maxsize=PREPARED_QUEUE_SIZE)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS + 1) as executor:
+        producer = executor.submit(_prepare_all, image_paths, prepared)
+        consumers = [executor.submit(_extract_prepared, prepared, cache, keys) for _ in range(MAX_WORKERS)]
+        albums += [album for future in consumers for album in future.result()]
+        producer.result()
+    return albums
+
+
+def get_batch_jobs():
+    if EXTRACTION_MODE == "local-batch":
+        return LocalBatchJobs(client, MODEL_NAME, max_workers=MAX_WORKERS)
+    return GeminiBatchJobs(client, MODEL_NAME)
+
+
+def extract_albums_in_batch_job(
+    image_paths: list[str], jobs, cache: DiskCache | None = None, job_name: str | None = None
+) -> list[dict]:
+    """Extract `image_paths` through a single batch job, one request per page.
+
+    Submits a new job unless `job_name` names one to collect. Pages the job
+    could not answer are extracted directly with extract_albums.
+    """
+    albums: list[dict] = []
+    keys: dict[str, str] = {}
+    if cache is not None:
+        albums, image_paths, keys = _cached_albums(image_paths, cache)
+    if not image_paths:
+        return albums
+
+    if job_name is None:
+        requests = (
+            (
+                os.path.basename(image_path),
+                [types.Part.from_bytes(data=image_bytes, mime_type=mime_type), EXTRACTION_PROMPT],
+            )
+            for image_path, image_bytes, mime_type in _crop_all(image_paths)
+            if image_bytes is not None
+        )
+        job_name = jobs.submit(requests, display_name="album-extraction")
+        print(f"Submitted {job_name}; if this run is interrupted, rerun with EXTRACTION_BATCH_JOB={job_name}")
+    state = gemini_batch.wait(jobs, job_name, BATCH_POLL_SECONDS)
+    if state not in ("JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED"):
+        raise RuntimeError(f"Batch job {job_name} ended in {state}")
+    results = jobs.results(job_name)
+
+    leftover = []
+    for image_path in image_paths:
+        raw_text = results.get(os.path.basename(image_path))
+        data = _parse_json_from_response(raw_text) if raw_text else None
+        if data is None:
+            leftover.append(image_path)
+            continue
+        try:
+            album_info = _album_info_from_response(data)
+        except Exception as e:
+            print(f"Error processing {image_path}: {e}")
+            leftover.append(image_path)
+            continue
+        if not _has_title(album_info):
+            leftover.append(image_path)
+            continue
+        if cache is not None and keys.get(image_path):
+            cache.set(keys[image_path], data, EXTRACTION_CACHE_TTL_SECONDS)
+        albums.append(_valid_album(album_info, image_path))
+
+    if leftover:
+        print(f"{len(leftover)} page(s) without a usable answer from the batch job, extracting them directly...")
+        albums += extract_albums(leftover, cache)
+    return albums
+
+
 def main():
     """
     Main function to extract album data from photos and insert into the database.
@@ -301,15 +700,25 @@ def main():
     existing_rows = db_client.table("albums").select(", ".join(EXTRACTION_COLS)).execute()
     existing_by_filename = {row["image_filename"]: row for row in existing_rows.data if row.get("image_filename")}
 
-    print(f"Found {len(png_files)} images. Processing with up to {MAX_WORKERS} workers...\n")
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = [
-            executor.submit(_process_image_file, image_path, existing_by_filename)
-            for image_path in png_files
-        ]
-        results = [f.result() for f in concurrent.futures.as_completed(futures)]
-
-    all_albums_data = [r for r in results if r is not None]
+    to_extract = [path for path in png_files if _needs_extraction(path, existing_by_filename)]
+    print(
+        f"Found {len(png_files)} images, {len(to_extract)} to extract. Cropping in "
+        f"{PREPARE_WORKERS} processes, up to {MAX_WORKERS} model requests of {BATCH_SIZE} "
+        f"image(s) at a time...\n"
+    )
+    cache = get_extraction_cache()
+    try:
+        if EXTRACTION_MODE in ("batch", "local-batch"):
+            all_albums_data = extract_albums_in_batch_job(
+                to_extract, get_batch_jobs(), cache, os.environ.get("EXTRACTION_BATCH_JOB") or None
+            )
+        else:
+            all_albums_data = extract_albums(to_extract, cache)
+    finally:
+        if cache is not None:
+            if cache.hits + cache.misses:
+                print(f"Extraction cache: {cache.hits}/{cache.hits + cache.misses} images served from {cache.path}")
+            cache.close()
 
     # Create a fresh client — the original connection may have gone stale
     # during the long image processing phase.
@@ -0,0 +1,141 @@
+"""
+Gemini Batch API jobs for bulk generate_content requests.
+
+A batch job takes every request at once, runs them asynchronously within 24
+hours at half the price, and is not subject to the per-minute rate limits of
+the synchronous API. Requests are written to a JSONL file and uploaded, so a
+job can carry far more than the 20 MB allowed inline.
+
+LocalBatchJobs offers the same submit / state / results interface but sends
+each request through generate_content itself, for tests and for trying the
+bulk path without waiting on a real job.
+"""
+
+import concurrent.futures
+import json
+import os
+import tempfile
+import time
+import uuid
+from typing import Iterable
+
+from google import genai
+from google.genai import types
+
+# A job in any of these states will not change any more
+DONE_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_PARTIALLY_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
+DEFAULT_POLL_SECONDS = 30
+
+
+def _part_json(part) -> dict:
+    if isinstance(part, str):
+        return {"text": part}
+    return part.model_dump(mode="json", by_alias=True, exclude_none=True)
+
+
+def _response_text(response: dict) -> str | None:
+    return types.GenerateContentResponse.model_validate(response).text
+
+
+class GeminiBatchJobs:
+    """Runs requests as Gemini batch jobs, referred to by job name."""
+
+    def __init__(self, client: genai.Client, model: str):
+        self.client = client
+        self.model = model
+
+    def submit(self, requests: Iterable[tuple[str, list]], display_name: str) -> str:
+        """Upload (key, contents) requests as one job and return its name.
+
+        `requests` is consumed lazily, so callers can produce large payloads
+        one at a time.
+        """
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            for key, contents in requests:
+                request = {"contents": [{"role": "user", "parts": [_part_json(p) for p in contents]}]}
+                f.write(json.dumps({"key": key, "request": request}) + "\n")
+        try:
+            uploaded = self.client.files.upload(
+                file=f.name, config=types.UploadFileConfig(display_name=display_name, mime_type="jsonl")
+            )
+        finally:
+            os.unlink(f.name)
+        job = self.client.batches.create(
+            model=self.model, src=uploaded.name, config=types.CreateBatchJobConfig(display_name=display_name)
+        )
+        return job.name
+
+    def state(self, name: str) -> str:
+        job = self.client.batches.get(name=name)
+        return job.state.name if job.state else "JOB_STATE_UNSPECIFIED"
+
+    def results(self, name: str) -> dict[str, str | None]:
+        """Response text by request key; None for requests that failed."""
+        job = self.client.batches.get(name=name)
+        if job.dest is None or not job.dest.file_name:
+            return {}
+        results = {}
+        for line in self.client.files.download(file=job.dest.file_name).decode().splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry.get("response"):
+                results[entry["key"]] = _response_text(entry["response"])
+            else:
+                print(f"  Batch request {entry.get('key')} failed: {entry.get('error') or entry.get('status')}")
+                results[entry["key"]] = None
+        return results
+
+
+class LocalBatchJobs:
+    """Stand-in for GeminiBatchJobs that runs each request with
+    generate_content on background threads."""
+
+    def __init__(self, client: genai.Client, model: str, max_workers: int = 5):
+        self.client = client
+        self.model = model
+        self.max_workers = max_workers
+        self._jobs: dict[str, dict[str, concurrent.futures.Future]] = {}
+
+    def submit(self, requests: Iterable[tuple[str, list]], display_name: str) -> str:
+        name = f"local-batches/{display_name}-{uuid.uuid4().hex[:8]}"
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        self._jobs[name] = {
+            key: executor.submit(self.client.models.generate_content, model=self.model, contents=contents)
+            for key, contents in requests
+        }
+        executor.shutdown(wait=False)
+        return name
+
+    def state(self, name: str) -> str:
+        futures = self._jobs[name].values()
+        return "JOB_STATE_SUCCEEDED" if all(f.done() for f in futures) else "JOB_STATE_RUNNING"
+
+    def results(self, name: str) -> dict[str, str | None]:
+        results = {}
+        for key, future in self._jobs.pop(name).items():
+            try:
+                results[key] = future.result().text
+            except Exception as e:
+                print(f"  Batch request {key} failed: {e}")
+                results[key] = None
+        return results
+
+
+def wait(jobs, name: str, poll_seconds: float = DEFAULT_POLL_SECONDS) -> str:
+    """Poll the job until it is done; returns its final state."""
+    last_state = None
+    while True:
+        state = jobs.state(name)
+        if state != last_state:
+            print(f"  {name}: {state}")
+            last_state = state
+        if state in DONE_STATES:
+            return state
+        time.sleep(poll_seconds)
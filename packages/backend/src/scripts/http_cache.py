@@ -0,0 +1,125 @@
+"""
+Cached HTTP GETs for the iTunes and Spotify lookups in the seeding scripts.
+Successful JSON responses are kept in a shared on-disk cache keyed by the
+normalized URL and query parameters, so reruns (or a second script asking
+the same question) skip the network. Empty result sets are cached too, for a
+shorter time. Errors and rate-limit responses are never cached.
+
+Set HTTP_CACHE=off to bypass the cache, or HTTP_CACHE_PATH to move it. The
+cache is also bypassed while an HTTP cassette is in use.
+"""
+
+import json
+import os
+import re
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+
+import cassette
+import http_client
+from disk_cache import OUTPUT_DIR, DiskCache
+
+DEFAULT_CACHE_PATH = os.path.join(OUTPUT_DIR, "http-cache.sqlite3")
+TTL_SECONDS = 30 * 24 * 3600
+# Empty results are rechecked sooner — catalogues gain albums over time
+NEGATIVE_TTL_SECONDS = 3 * 24 * 3600
+
+_cache: DiskCache | None = None
+_cache_lock = threading.Lock()
+
+
+class CachedResponse:
+    """The parts of requests.Response the scripts use, rebuilt from the cache."""
+
+    def __init__(self, data):
+        self.status_code = 200
+        self.headers: dict = {}
+        self._data = data
+
+    @property
+    def text(self) -> str:
+        return json.dumps(self._data)
+
+    def json(self):
+        return self._data
+
+
+def get_cache() -> DiskCache | None:
+    """The process-wide cache, opened on first use; None when disabled."""
+    global _cache
+    if os.environ.get("HTTP_CACHE", "").lower() in ("off", "0", "false"):
+        return None
+    # Every request must reach a cassette being recorded or replayed
+    if cassette.mode():
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskCache(os.environ.get("HTTP_CACHE_PATH") or DEFAULT_CACHE_PATH)
+        return _cache
+
+
+def cache_key(url: str, params: dict | None = None) -> str:
+    """Normalize URL and params: lowercase scheme/host, merged and sorted
+    query parameters, collapsed whitespace in values."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query) + [(k, str(v)) for k, v in (params or {}).items()]
+    query = sorted((k, re.sub(r"\s+", " ", v).strip()) for k, v in query)
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), urlencode(query), "")
+    )
+
+
+def _is_empty(data) -> bool:
+    """True for iTunes (results) and Spotify (albums.items) responses with no hits."""
+    if not isinstance(data, dict):
+        return False
+    if "results" in data:
+        return not data["results"]
+    if "albums" in data and isinstance(data["albums"], dict):
+        return not data["albums"].get("items")
+    return False
+
+
+def cached_get(
+    url: str, params: dict | None = None, headers: dict | None = None, **kwargs
+) -> requests.Response | CachedResponse:
+    """http_client.get with a persistent cache for successful JSON responses.
+
+    Keyword arguments (limiter, retry settings) go to http_client.get, so
+    only real network requests wait for a rate limiter; cache hits are free.
+    Headers (e.g. a Spotify bearer token) are not part of the key: responses
+    must not depend on who asks.
+    """
+    cache = get_cache()
+    if cache is None:
+        return http_client.get(url, params=params, headers=headers, **kwargs)
+
+    key = cache_key(url, params)
+    data = cache.get(key)
+    if data is not None:
+        return CachedResponse(data)
+
+    response = http_client.get(url, params=params, headers=headers, **kwargs)
+    if response.status_code == 200:
+        try:
+            data = response.json()
+        except ValueError:
+            return response
+        ttl = NEGATIVE_TTL_SECONDS if _is_empty(data) else TTL_SECONDS
+        cache.set(key, data, ttl)
+    return response
+
+
+def close_cache() -> None:
+    """Print hit statistics and close the cache, if it was opened."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            return
+        total = _cache.hits + _cache.misses
+        if total:
+            print(f"HTTP cache: {_cache.hits}/{total} lookups served from {_cache.path}")
+        _cache.close()
+        _cache = None
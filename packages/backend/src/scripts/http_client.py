@@ -0,0 +1,127 @@
+"""
+Shared HTTP client for the seeding scripts.
+One pooled requests.Session per process, so calls to the same host reuse
+keep-alive connections instead of a new TCP+TLS handshake each time, with
+default timeouts and one retry policy for 429 and 5xx responses: honour
+Retry-After, otherwise back off exponentially with jitter, and report rate
+limits to the provider's RateLimiter when one is given. Traffic can be
+recorded and replayed offline (see cassette.py).
+"""
+
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import cassette
+from rate_limit import RateLimiter
+
+DEFAULT_TIMEOUT = (5, 30)  # seconds: connect, read
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BACKOFF_SECONDS = 2.0
+# Connections kept open per host — enough for every worker thread
+POOL_SIZE = 32
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+class Cancelled(Exception):
+    """Raised instead of sending a request whose `cancel` event is set."""
+
+
+def get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            # Recording or replaying a cassette swaps in its own transport
+            adapter = cassette.adapter(pool_connections=8, pool_maxsize=POOL_SIZE) or HTTPAdapter(
+                pool_connections=8, pool_maxsize=POOL_SIZE
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def parse_retry_after(response: requests.Response) -> float | None:
+    """Retry-After in seconds; None if absent or not a number (e.g. an HTTP date)."""
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def request(
+    method: str,
+    url: str,
+    limiter: RateLimiter | None = None,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+    max_retry_after: float | None = None,
+    timeout=DEFAULT_TIMEOUT,
+    cancel: threading.Event | None = None,
+    **kwargs,
+) -> requests.Response:
+    """Send a request through the shared session, retrying transient failures.
+
+    Waits for `limiter` before every attempt. A 429 whose Retry-After exceeds
+    `max_retry_after` is returned immediately so the caller can give up on
+    the provider. The last response is returned once attempts run out;
+    connection errors are raised after the last attempt. Once `cancel` is
+    set, Cancelled is raised instead of waiting for the limiter or sending.
+    """
+    session = get_session()
+    for attempt in range(max_attempts):
+        last_attempt = attempt == max_attempts - 1
+        # Checked again after the limiter wait, which can be long
+        if cancel is not None and cancel.is_set():
+            raise Cancelled(url)
+        if limiter is not None:
+            limiter.acquire()
+            if cancel is not None and cancel.is_set():
+                raise Cancelled(url)
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if last_attempt:
+                raise
+            delay = random.uniform(0, backoff_seconds * 2 ** attempt)
+            print(f"    {e.__class__.__name__} for {url}, retrying in {delay:.1f}s...")
+            time.sleep(delay)
+            continue
+
+        if response.status_code not in RETRY_STATUSES:
+            if limiter is not None:
+                limiter.succeeded()
+            return response
+
+        retry_after = parse_retry_after(response)
+        if last_attempt or (
+            max_retry_after is not None and retry_after is not None and retry_after > max_retry_after
+        ):
+            return response
+
+        # Full jitter keeps parallel workers from retrying in lockstep
+        delay = retry_after if retry_after is not None else random.uniform(0, backoff_seconds * 2 ** attempt)
+        if response.status_code == 429 and limiter is not None:
+            # Pauses every worker using this provider, not just this one
+            limiter.rate_limited(delay)
+        else:
+            print(f"    HTTP {response.status_code} from {url}, retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+    raise AssertionError("unreachable: the last attempt always returns or raises")
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
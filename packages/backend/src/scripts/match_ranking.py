@@ -0,0 +1,154 @@
+"""
+Scored ranking of search results against an album.
+Each response is tokenized once into a small inverted index (title token →
+candidates). An album is only scored against candidates that share a title
+token with it, on title token-set similarity, artist similarity and
+release-year distance; the best score wins, ties going to the earlier result,
+so rankings are deterministic. One index answers any number of albums, e.g.
+every album of an artist against that artist's discography.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Iterable
+
+from text_normalize import NORMALIZE_CACHE_SIZE, normalize
+
+TITLE_WEIGHT = 0.6
+ARTIST_WEIGHT = 0.25
+YEAR_WEIGHT = 0.15
+# Share of the album's title words a candidate title must contain, unless
+# one title's words contain the other's (e.g. an added "Remastered")
+MIN_TITLE_COVERAGE = 0.6
+# Years apart at which the year score drops to zero
+YEAR_HORIZON = 10
+# Year score when either side has no release year
+UNKNOWN_YEAR_SCORE = 0.5
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def tokens(text: str) -> frozenset[str]:
+    """The set of normalized words in `text`."""
+    return frozenset(normalize(text).split())
+
+
+def parse_year(date: str | None) -> int | None:
+    """Year of an API release date ("1959-08-17", "1959", "1959-08-17T07:00:00Z")."""
+    if date and date[:4].isdigit():
+        return int(date[:4])
+    return None
+
+
+def _jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def _title_matches(query: frozenset[str], candidate: frozenset[str]) -> bool:
+    if not candidate:
+        return False
+    if candidate <= query or query <= candidate:
+        return True
+    return len(query & candidate) / len(query) >= MIN_TITLE_COVERAGE
+
+
+def _artist_matches(query: frozenset[str], candidate: frozenset[str]) -> bool:
+    return bool(candidate) and (candidate <= query or query <= candidate)
+
+
+def _year_score(year: int | None, candidate_year: int | None) -> float:
+    if year is None or candidate_year is None:
+        return UNKNOWN_YEAR_SCORE
+    return 1 - min(abs(year - candidate_year), YEAR_HORIZON) / YEAR_HORIZON
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """One search result, tokenized."""
+
+    position: int
+    item: dict
+    title: frozenset[str]
+    artists: tuple[frozenset[str], ...]
+    year: int | None
+
+    def score(self, title: frozenset[str], artist: frozenset[str], year: int | None) -> float:
+        """Similarity to an album in [0, 1]; 1.0 is same title, artist and year."""
+        artist_similarity = max((_jaccard(artist, a) for a in self.artists), default=0.0)
+        return (
+            TITLE_WEIGHT * _jaccard(title, self.title)
+            + ARTIST_WEIGHT * artist_similarity
+            + YEAR_WEIGHT * _year_score(year, self.year)
+        )
+
+    def matches(self, title: frozenset[str], artist: frozenset[str]) -> bool:
+        """Whether this could be the album at all: similar title, same artist."""
+        return _title_matches(title, self.title) and any(_artist_matches(artist, a) for a in self.artists)
+
+
+class CandidateIndex:
+    """Search results indexed by title token.
+
+    `title`, `artists` and `date` extract the album title, artist names and
+    release date from one result, so iTunes and Spotify responses share
+    the same ranking.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[dict],
+        title: Callable[[dict], str],
+        artists: Callable[[dict], list[str]],
+        date: Callable[[dict], str | None],
+    ):
+        self.candidates: list[Candidate] = []
+        self._postings: dict[str, list[Candidate]] = {}
+        for position, item in enumerate(items):
+            candidate = Candidate(
+                position,
+                item,
+                tokens(title(item) or ""),
+                tuple(tokens(name or "") for name in artists(item)),
+                parse_year(date(item)),
+            )
+            self.candidates.append(candidate)
+            for token in candidate.title:
+                self._postings.setdefault(token, []).append(candidate)
+
+    def rank(
+        self, title: str, artist: str, release_year: int | None, min_title_similarity: float = 0.0
+    ) -> list[tuple[Candidate, float]]:
+        """Candidates that match the album, best first, with their scores."""
+        title_tokens = tokens(title)
+        artist_tokens = tokens(artist)
+        seen: dict[int, Candidate] = {}
+        for token in title_tokens:
+            for candidate in self._postings.get(token, ()):
+                seen[candidate.position] = candidate
+
+        ranked = [
+            (candidate, candidate.score(title_tokens, artist_tokens, release_year))
+            for candidate in seen.values()
+            if candidate.matches(title_tokens, artist_tokens)
+            and _jaccard(title_tokens, candidate.title) >= min_title_similarity
+        ]
+        ranked.sort(key=lambda pair: (-pair[1], pair[0].position))
+        return ranked
+
+    def best(
+        self, title: str, artist: str, release_year: int | None, min_title_similarity: float = 0.0
+    ) -> tuple[dict, float] | None:
+        """The top-scoring result for the album and its score, or None."""
+        ranked = self.rank(title, artist, release_year, min_title_similarity)
+        if not ranked:
+            return None
+        candidate, score = ranked[0]
+        return candidate.item, score
+
+
+def similarity(
+    title: str, artist: str, release_year: int | None,
+    candidate_title: str, candidate_artist: str, candidate_year: int | None,
+) -> float:
+    """Score of a result picked by other means (e.g. a substitute album)."""
+    candidate = Candidate(0, {}, tokens(candidate_title or ""), (tokens(candidate_artist or ""),), candidate_year)
+    return candidate.score(tokens(title), tokens(artist), release_year)
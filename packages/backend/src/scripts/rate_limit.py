@@ -0,0 +1,100 @@
+"""
+Per-provider request rate limiting for the seeding scripts.
+Each external API gets its own adaptive token bucket: it starts at a
+conservative rate, creeps up while requests succeed, and halves (and pauses
+for Retry-After) when the provider answers 429. Worker threads simply call
+acquire() before every network request.
+
+Starting rates can be overridden with ITUNES_SEARCH_RPS, ITUNES_LOOKUP_RPS
+and SPOTIFY_RPS (requests/second). They are read on a limiter's first use,
+so values the scripts load from .env.local in main() take effect.
+"""
+
+import os
+import threading
+import time
+
+# Rate gained per successful request, as a fraction of the ceiling
+_INCREASE_STEP = 0.02
+
+
+class RateLimiter:
+    """Thread-safe token bucket with additive-increase/multiplicative-decrease."""
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        max_rate: float | None = None,
+        min_rate: float = 0.05,
+        env: str | None = None,
+    ):
+        self.name = name
+        self._env = env
+        self._max_rate = max_rate
+        self._min_rate = min_rate
+        self._set_rate(rate)
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _set_rate(self, rate: float) -> None:
+        self.rate = rate
+        self.max_rate = max(rate, self._max_rate if self._max_rate is not None else rate)
+        self.min_rate = min(self._min_rate, rate)
+
+    def _configure(self) -> None:
+        """Apply the `env` override once, on first use. Call with the lock held."""
+        if self._env is not None:
+            self._set_rate(_env_rate(self._env, self.rate))
+            self._env = None
+
+    def acquire(self) -> None:
+        """Block until a request may be sent, then take a token."""
+        with self._lock:
+            self._configure()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    # Bursts stay at one second's worth of requests
+                    capacity = max(1.0, self.rate)
+                    elapsed = now - max(self._updated, self._paused_until)
+                    self._tokens = min(capacity, self._tokens + elapsed * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self._configure()
+            self.rate = min(self.max_rate, self.rate + self.max_rate * _INCREASE_STEP)
+
+    def rate_limited(self, retry_after: float | None = None) -> None:
+        """Back off after a 429: halve the rate and pause every worker."""
+        with self._lock:
+            self._configure()
+            self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            self._tokens = 0.0
+        print(f"    {self.name} rate limited, slowing to {self.rate:.2f} req/s (pause {pause:.0f}s)")
+
+
+def _env_rate(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+# Apple documents roughly 20 requests/minute for the iTunes Search API but
+# tolerates more; search and lookup are throttled separately.
+ITUNES_SEARCH = RateLimiter("iTunes search", 1.0, max_rate=4.0, env="ITUNES_SEARCH_RPS")
+ITUNES_LOOKUP = RateLimiter("iTunes lookup", 1.0, max_rate=4.0, env="ITUNES_LOOKUP_RPS")
+# Spotify enforces a rolling 30-second window per app
+SPOTIFY = RateLimiter("Spotify", 4.0, max_rate=10.0, env="SPOTIFY_RPS")
@@ -0,0 +1,54 @@
+"""
+Speculative execution of ordered fallback strategies.
+Runs the first few strategies of a cascade concurrently and returns the
+result of the highest-priority one that matches — exactly what running them
+one after another would return — without waiting for every round trip in turn.
+"""
+
+import concurrent.futures
+import threading
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+# Shared by all callers; strategies never submit work themselves, so a
+# bounded pool cannot deadlock.
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=32, thread_name_prefix="speculative")
+
+
+def first_match(strategies: list[Callable[[threading.Event], T | None]], width: int = 3) -> T | None:
+    """Return the first non-None result in list order, running up to `width`
+    strategies at a time.
+
+    A strategy's result is only used once every strategy before it has
+    returned None, so precedence is the same as a sequential loop. Strategies
+    that have not started when the answer is known are cancelled. Ones
+    already running are ignored, and the event each strategy is called with
+    is set so they can stop before sending further requests (see
+    http_client.request's `cancel`).
+    """
+    cancel = threading.Event()
+    results: dict[int, T | None] = {}
+    in_flight: dict[concurrent.futures.Future, int] = {}
+    next_index = 0
+    wanted = 0  # lowest index whose result is still unknown
+
+    try:
+        while wanted < len(strategies):
+            while next_index < len(strategies) and len(in_flight) < width:
+                in_flight[_executor.submit(strategies[next_index], cancel)] = next_index
+                next_index += 1
+
+            done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                results[in_flight.pop(future)] = future.result()
+
+            while wanted in results:
+                if results[wanted] is not None:
+                    return results[wanted]
+                wanted += 1
+        return None
+    finally:
+        cancel.set()
+        for future in in_flight:
+            future.cancel()
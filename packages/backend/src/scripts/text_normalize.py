@@ -0,0 +1,41 @@
+"""
+Text normalization for fuzzy matching of album titles and artist names.
+Shared by the streaming-link and cover lookups. Patterns are compiled once,
+ASCII text (most API results) skips Unicode decomposition, and results are
+memoized because the same titles and artists are compared over and over.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+NORMALIZE_CACHE_SIZE = 65536
+
+_NON_WORD = re.compile(r"[^\w\s]")
+# What _NON_WORD replaces within ASCII, as a str.translate table
+_ASCII_PUNCTUATION = str.maketrans({chr(i): " " for i in range(128) if _NON_WORD.match(chr(i))})
+
+
+def _strip_marks(text: str) -> str:
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(c for c in decomposed if unicodedata.category(c) != "Mn")
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def strip_accents(text: str) -> str:
+    """Remove diacritics (e.g. "Éthiopiques" → "Ethiopiques") and surrounding whitespace."""
+    if text.isascii():
+        return text.strip()
+    return _strip_marks(text).strip()
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize(text: str) -> str:
+    """Normalize text for fuzzy comparison: strip diacritics, lowercase,
+    "&" → "and", punctuation → spaces, collapsed whitespace."""
+    if text.isascii():
+        text = text.lower().replace("&", "and").translate(_ASCII_PUNCTUATION)
+    else:
+        text = _strip_marks(text).lower().replace("&", "and")
+        text = _NON_WORD.sub(" ", text)
+    return " ".join(text.split())
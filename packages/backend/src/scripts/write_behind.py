@@ -0,0 +1,139 @@
+"""
+Write-behind buffer for the enrichment scripts' album updates.
+Worker threads hand over their changes and go back to looking things up; a
+background thread merges them per album and writes them as bulk upserts on
+album_id — one request per set of changed columns — whenever enough are
+pending or the flush interval passes. Transient database errors are retried
+on the background thread, so they never hold up a worker.
+
+Upserts only touch the columns that changed, but an album_id missing from the
+table would be inserted, so only update rows the script has just read.
+Set WRITE_BEHIND_BATCH_SIZE / WRITE_BEHIND_INTERVAL_SECONDS to tune flushing.
+"""
+
+import os
+import random
+import threading
+import time
+
+from postgrest.exceptions import APIError
+from supabase import Client
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_INTERVAL_SECONDS = 2.0
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+# SQLSTATE classes worth retrying: connection exception, transaction rollback
+# (serialization failure, deadlock), insufficient resources, operator intervention
+_TRANSIENT_SQLSTATE_CLASSES = ("08", "40", "53", "57")
+
+
+def _is_transient(exc: Exception) -> bool:
+    """True for errors a retry can fix: transport failures, 429/5xx, and
+    Postgres errors in the transient SQLSTATE classes."""
+    if not isinstance(exc, APIError):
+        return True
+    code = str(exc.code or "")
+    if len(code) == 3 and code.isdigit():
+        return code == "429" or code.startswith("5")
+    if len(code) == 5:
+        return code[:2] in _TRANSIENT_SQLSTATE_CLASSES
+    # No code: typically a gateway error page rather than a PostgREST answer
+    return not code
+
+
+class WriteBehindBuffer:
+    """Collects row updates from worker threads and upserts them in bulk.
+
+    Use as a context manager, or call close(), to flush what is left; close()
+    raises RuntimeError if some updates could not be written.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        table: str = "albums",
+        key: str = "album_id",
+        batch_size: int | None = None,
+        interval: float | None = None,
+    ):
+        self.client = client
+        self.table = table
+        self.key = key
+        self.batch_size = batch_size or int(os.environ.get("WRITE_BEHIND_BATCH_SIZE") or DEFAULT_BATCH_SIZE)
+        self.interval = interval or float(
+            os.environ.get("WRITE_BEHIND_INTERVAL_SECONDS") or DEFAULT_INTERVAL_SECONDS
+        )
+        self.written = 0
+        self.failed: list[dict] = []
+        self._pending: dict = {}
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f"write-behind-{table}", daemon=True)
+        self._thread.start()
+
+    def update(self, key_value, values: dict) -> None:
+        """Queue `values` for the row whose key is `key_value`; returns at once."""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("write-behind buffer is closed")
+            self._pending.setdefault(key_value, {}).update(values)
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify()
+
+    def close(self) -> None:
+        """Write everything still pending and stop the background thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        if self.failed:
+            raise RuntimeError(
+                f"{len(self.failed)} {self.table} update(s) could not be written: "
+                + ", ".join(str(row[self.key]) for row in self.failed[:10])
+            )
+
+    def __enter__(self) -> "WriteBehindBuffer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._condition.wait(self.interval)
+                pending, self._pending = self._pending, {}
+                closed = self._closed
+            if pending:
+                self._write(pending)
+            if closed:
+                return
+
+    def _write(self, pending: dict) -> None:
+        # PostgREST fills columns missing from some rows of a bulk upsert with
+        # NULL, so each request carries rows with the same changed columns.
+        groups: dict[tuple[str, ...], list[dict]] = {}
+        for key_value, values in pending.items():
+            groups.setdefault(tuple(sorted(values)), []).append({self.key: key_value, **values})
+        for rows in groups.values():
+            for i in range(0, len(rows), self.batch_size):
+                self._upsert(rows[i : i + self.batch_size])
+
+    def _upsert(self, rows: list[dict]) -> None:
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                self.client.table(self.table).upsert(rows, on_conflict=self.key).execute()
+                self.written += len(rows)
+                return
+            except Exception as e:
+                if not _is_transient(e) or attempt == MAX_ATTEMPTS - 1:
+                    print(f"  Failed to write {len(rows)} {self.table} update(s): {e}")
+                    self.failed.extend(rows)
+                    return
+                # Full jitter keeps retries from piling onto a struggling database
+                delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+                print(f"  Writing {len(rows)} {self.table} update(s) failed ({e}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
@@ -0,0 +1,116 @@
+"""
+Run metrics for the recommendation sender.
+Collects per-stage timings and event counters, and writes them as a JSON run
+report and optionally in Prometheus text exposition format (for the
+node_exporter textfile collector or a Pushgateway).
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from supabase import Client
+
+# Stages reported even when they never ran, so reports are comparable
+STAGES = ("user_fetch", "album_selection", "render", "resend_call", "history_insert")
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class RunMetrics:
+    """Thread-safe timing samples and counters for one send run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: dict[str, list[float]] = {stage: [] for stage in STAGES}
+        self._counters: dict[str, int] = {}
+        self._started = time.monotonic()
+
+    @contextmanager
+    def time(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._samples.setdefault(stage, []).append(elapsed)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def track_db_round_trips(self, client: Client) -> None:
+        """Count every PostgREST response received through this client."""
+        client.postgrest.session.event_hooks["response"].append(
+            lambda response: self.count("db_round_trips")
+        )
+
+    def report(self, **info) -> dict:
+        """Summarize the run. Extra keyword arguments are included verbatim."""
+        wall_time = time.monotonic() - self._started
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+            counters = dict(self._counters)
+
+        stages = {}
+        for stage, values in samples.items():
+            stages[stage] = {
+                "count": len(values),
+                "total_seconds": round(sum(values), 9),
+                "p50_seconds": round(_percentile(values, 0.50), 9),
+                "p95_seconds": round(_percentile(values, 0.95), 9),
+                "max_seconds": round(values[-1] if values else 0.0, 9),
+            }
+
+        sent = counters.get("emails_sent", 0)
+        return {
+            **info,
+            "wall_time_seconds": round(wall_time, 3),
+            "emails_per_second": round(sent / wall_time, 3) if wall_time else 0.0,
+            "stages": stages,
+            "counters": counters,
+        }
+
+    @staticmethod
+    def to_prometheus(report: dict, prefix: str = "jazzy_send") -> str:
+        """Render a report() dict in Prometheus text exposition format."""
+        lines = [
+            f"# HELP {prefix}_stage_seconds Time spent per pipeline stage call.",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        for stage, stats in report["stages"].items():
+            for quantile, key in (("0.5", "p50_seconds"), ("0.95", "p95_seconds"), ("1", "max_seconds")):
+                lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="{quantile}"}} {stats[key]}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {stats["total_seconds"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+
+        lines += [
+            f"# HELP {prefix}_events_total Events counted during the run.",
+            f"# TYPE {prefix}_events_total counter",
+        ]
+        for name, value in sorted(report["counters"].items()):
+            lines.append(f'{prefix}_events_total{{event="{name}"}} {value}')
+
+        for name in ("wall_time_seconds", "emails_per_second"):
+            lines += [f"# TYPE {prefix}_{name} gauge", f"{prefix}_{name} {report[name]}"]
+
+        return "\n".join(lines) + "\n"
+
+
+def write_report(report: dict, path: str, prometheus_path: str | None = None) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    if prometheus_path:
+        with open(prometheus_path, "w", encoding="utf-8") as f:
+            f.write(RunMetrics.to_prometheus(report))
@@ -1,30 +1,58 @@
 """
 Send jazz album recommendations to eligible users via Resend.
-Runs daily via GitHub Actions cron. Checks each user's newsletter_frequency
-to decide who gets an email today.
+Runs hourly via GitHub Actions cron. Each tick sends to the users whose
+preferred local send hour has been reached, whose newsletter_frequency is
+due on their local date and who have not had today's email yet, so a late
+or dropped tick is caught up by the next one; --schedule daily sends to
+everyone due today at once.
 """
 
+import argparse
 import os
 import sys
 from datetime import datetime, timezone
+from typing import Iterator
 
 import resend
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+from email_dispatch import DEFAULT_CONCURRENCY, DEFAULT_RATE_LIMIT, OutgoingEmail, dispatch
 from email_template import render_recommendation_email
+from recommendation_history import RecommendationHistory
+from run_ledger import RunLedger, parse_shard, shard_of
+from send_metrics import RunMetrics, write_report
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 BACKEND_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
 
 FROM_EMAIL = os.environ.get("FROM_EMAIL", "Jazzy <noreply@jazzy.yaennu.ch>")
 FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:3000")
+OUTPUT_DIR = os.path.join(BACKEND_ROOT, "output")
 
+# Rows per PostgREST request. Must not exceed the project's max-rows setting
+# (1000 by default), otherwise a full page looks like the last one.
+PAGE_SIZE = 1000
+# Users selected and dispatched together; also the keyset page size.
+USER_PAGE_SIZE = 500
+# User IDs per `in.(...)` filter — keeps request URLs well below length limits.
+USER_ID_CHUNK_SIZE = 100
 
-def get_supabase_client() -> Client:
+ALBUM_COLUMNS = (
+    "album_id, title, artist, release_year, cover_image_url, "
+    "streaming_link_spotify, streaming_link_apple, artist_summary, "
+    "album_summary, calendar_order"
+)
+
+
+def load_env() -> None:
     load_dotenv(os.path.join(BACKEND_ROOT, ".env.local"))
     if os.environ.get("PRODUCTION") == "True":
         load_dotenv(os.path.join(BACKEND_ROOT, ".env.production"), override=True)
+
+
+def get_supabase_client() -> Client:
+    load_env()
     url = os.environ.get("SUPABASE_URL")
     key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
     if not url or not key:
@@ -55,19 +83,64 @@ def get_eligible_frequencies() -> list[str]:
     return frequencies
 
 
-def get_eligible_users(client: Client) -> list[dict]:
-    """Query users with active subscriptions whose frequency matches today."""
+def iter_eligible_users(client: Client, page_size: int = USER_PAGE_SIZE) -> Iterator[list[dict]]:
+    """Yield pages of users with active subscriptions whose frequency matches today.
+
+    Uses keyset pagination on user_id, so every matching user is returned no
+    matter the server's max-rows, and only one page is held at a time.
+    """
     frequencies = get_eligible_frequencies()
     print(f"Eligible frequencies today: {frequencies}")
 
-    response = (
-        client.table("users")
-        .select("user_id, email, name, newsletter_frequency, unsubscribe_token")
-        .eq("subscription_status", "active")
-        .in_("newsletter_frequency", frequencies)
-        .execute()
-    )
-    return response.data
+    last_user_id = None
+    while True:
+        query = (
+            client.table("users")
+            .select("user_id, email, name, newsletter_frequency, unsubscribe_token")
+            .eq("subscription_status", "active")
+            .in_("newsletter_frequency", frequencies)
+        )
+        if last_user_id is not None:
+            query = query.gt("user_id", last_user_id)
+        page = query.order("user_id").limit(page_size).execute().data
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        last_user_id = page[-1]["user_id"]
+
+
+def iter_due_users(
+    client: Client, tick: datetime, page_size: int = USER_PAGE_SIZE
+) -> Iterator[list[dict]]:
+    """Yield pages of users whose local send hour is at or before `tick` and
+    who have not been sent anything yet on their local date.
+
+    The users_due_at database function applies each user's timezone, send_hour
+    and newsletter_frequency, so a tick loads its own cohort plus anyone an
+    earlier, missed tick should have reached.
+    """
+    print(f"Selecting users due at {tick.isoformat()}")
+
+    last_user_id = None
+    while True:
+        page = client.rpc(
+            "users_due_at",
+            {"p_now": tick.isoformat(), "p_after": last_user_id, "p_limit": page_size},
+        ).execute().data
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        last_user_id = page[-1]["user_id"]
+
+
+def _parse_tick(value: str) -> datetime:
+    """Parse an ISO timestamp (UTC unless it has an offset), floored to the hour."""
+    tick = datetime.fromisoformat(value)
+    if tick.tzinfo is None:
+        tick = tick.replace(tzinfo=timezone.utc)
+    return tick.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
 
 
 def _get_last_sent_order(client: Client, user_id: str) -> int | None:
@@ -135,59 +208,364 @@ def get_unsent_album(client: Client, user_id: str) -> dict | None:
     return unsent[0]
 
 
-def send_email(user: dict, album: dict) -> bool:
-    """Send a recommendation email via Resend. Returns True on success."""
+def _fetch_all_pages(build_query) -> list[dict]:
+    """Run a query page by page so results are never truncated by max-rows.
+
+    `build_query` must return a fresh, ordered query builder on every call.
+    """
+    rows: list[dict] = []
+    start = 0
+    while True:
+        page = build_query().range(start, start + PAGE_SIZE - 1).execute().data
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def load_catalogue(client: Client) -> list[dict]:
+    """Fetch every album once, with just the columns the email needs."""
+    return _fetch_all_pages(
+        lambda: client.table("albums").select(ALBUM_COLUMNS).order("album_id")
+    )
+
+
+def load_histories(client: Client, user_ids: list[str]) -> dict[str, list[str]]:
+    """Fetch sent album IDs for many users, newest first per user."""
+    histories: dict[str, list[str]] = {user_id: [] for user_id in user_ids}
+    for chunk in _chunks(user_ids, USER_ID_CHUNK_SIZE):
+        rows = _fetch_all_pages(
+            lambda: client.table("recommendations")
+            .select("user_id, album_id")
+            .in_("user_id", chunk)
+            .order("user_id")
+            .order("sent_date", desc=True)
+            .order("recommendation_id")
+        )
+        for row in rows:
+            histories[row["user_id"]].append(row["album_id"])
+    return histories
+
+
+def _sort_catalogue(albums: list[dict]) -> list[dict]:
+    """Streamable albums in send order: calendar_order ascending, NULLs last."""
+    streamable = [
+        a for a in albums
+        if a.get("streaming_link_spotify") is not None or a.get("streaming_link_apple") is not None
+    ]
+    streamable.sort(key=lambda a: (a.get("calendar_order") is None, a.get("calendar_order") or 0))
+    return streamable
+
+
+def pick_next_album(
+    streamable: list[dict], order_by_id: dict[str, int | None], history: list[str]
+) -> tuple[dict | None, bool]:
+    """Pick a user's next album from an already sorted catalogue.
+
+    Same rules as get_unsent_album, without touching the database. `history`
+    lists sent album IDs newest first. Returns (album, reset) where reset is
+    True when every album has been sent and the user's history must be cleared.
+    """
+    if not streamable:
+        return None, False
+
+    sent = set(history)
+    last_order = order_by_id.get(history[0]) if history else None
+
+    first_unsent = None
+    for album in streamable:
+        if album["album_id"] in sent:
+            continue
+        if first_unsent is None:
+            first_unsent = album
+            if last_order is None:
+                break
+        order = album.get("calendar_order")
+        if order is not None and order > last_order:
+            return album, False
+
+    if first_unsent is None:
+        # All albums sent — history gets cleared, start over from the top
+        return streamable[0], True
+
+    # No previous recommendation, or wrap-around: return the first in sequence
+    return first_unsent, False
+
+
+def reset_histories(client: Client, user_ids: list[str]) -> None:
+    """Delete the recommendation history of every given user."""
+    for chunk in _chunks(user_ids, USER_ID_CHUNK_SIZE):
+        client.table("recommendations").delete().in_("user_id", chunk).execute()
+
+
+def select_albums_batch(
+    client: Client, users: list[dict], catalogue: list[dict]
+) -> dict[str, dict | None]:
+    """Pick the next album for every user with a fixed number of bulk queries.
+
+    Loads all histories in paged chunks, then runs the selection in memory
+    against the preloaded catalogue. Returns a mapping of user_id to album.
+    """
+    streamable = _sort_catalogue(catalogue)
+    order_by_id = {a["album_id"]: a.get("calendar_order") for a in catalogue}
+
+    user_ids = [u["user_id"] for u in users]
+    histories = load_histories(client, user_ids)
+
+    picks: dict[str, dict | None] = {}
+    resets: list[str] = []
+    for user_id in user_ids:
+        album, reset = pick_next_album(streamable, order_by_id, histories[user_id])
+        picks[user_id] = album
+        if reset:
+            resets.append(user_id)
+
+    if resets:
+        print(f"Resetting history for {len(resets)} user(s) who received every album.")
+        reset_histories(client, resets)
+
+    return picks
+
+
+def select_albums_rpc(
+    client: Client, users: list[dict], catalogue: list[dict]
+) -> dict[str, dict | None]:
+    """Pick the next album for every user via the next_albums_for_users RPC.
+
+    Selection and history resets happen in Postgres; the preloaded catalogue
+    is only used to render the emails. Returns a mapping of user_id to album.
+    """
+    albums_by_id = {a["album_id"]: a for a in catalogue}
+
+    picks: dict[str, dict | None] = {}
+    reset_count = 0
+    user_ids = [u["user_id"] for u in users]
+    # RPC results are subject to max-rows too, so never ask for more than a page
+    for chunk in _chunks(user_ids, PAGE_SIZE):
+        rows = client.rpc("next_albums_for_users", {"p_user_ids": chunk}).execute().data
+        for row in rows:
+            picks[row["user_id"]] = albums_by_id.get(row["album_id"]) if row["album_id"] else None
+            if row["history_reset"]:
+                reset_count += 1
+
+    if reset_count:
+        print(f"Reset history for {reset_count} user(s) who received every album.")
+
+    return {user_id: picks.get(user_id) for user_id in user_ids}
+
+
+def build_email(user: dict, album: dict) -> OutgoingEmail:
+    """Render a recommendation email for one user, ready for dispatch."""
     unsubscribe_url = f"{FRONTEND_URL}/unsubscribe?token={user['unsubscribe_token']}"
     html = render_recommendation_email(user["name"], album, unsubscribe_url)
 
-    try:
-        resend.Emails.send({
+    return OutgoingEmail(
+        user_id=user["user_id"],
+        album_id=album["album_id"],
+        params={
             "from": FROM_EMAIL,
             "to": [user["email"]],
             "subject": f"Your jazz pick: {album['title']} by {album['artist']}",
             "html": html,
-        })
-        return True
-    except Exception as e:
-        print(f"  Failed to send to {user['email']}: {e}")
-        return False
-
-
-def record_recommendation(client: Client, user_id: str, album_id: str) -> None:
-    """Insert a row into the recommendations table."""
-    client.table("recommendations").insert({
-        "user_id": user_id,
-        "album_id": album_id,
-    }).execute()
+        },
+    )
 
 
-def main():
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Send jazz album recommendation emails.")
+    parser.add_argument(
+        "--selection",
+        choices=["batch", "rpc", "per-user"],
+        default="batch",
+        help="batch: bulk-load catalogue and histories once (default); "
+        "rpc: let the next_albums_for_users database function pick; "
+        "per-user: query the database separately for each user",
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=["hourly", "daily"],
+        default="daily",
+        help="hourly: send only to users whose preferred local send hour has "
+        "been reached and who have not had today's email (run every hour); daily: send to every user due "
+        "today in one go (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--at",
+        type=_parse_tick,
+        help="hourly schedule only: send the cohort of this UTC hour instead of "
+        "the current one, e.g. to catch up a missed tick (2026-10-19T04)",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        help="Resend API requests per second allowed for this account "
+        f"(default: $RESEND_RATE_LIMIT or {DEFAULT_RATE_LIMIT})",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Resend batch requests in flight at once (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--run-id",
+        help="checkpoint name; rerunning with the same id resumes unfinished "
+        "users (default: today's UTC date, or the UTC hour for --schedule hourly)",
+    )
+    parser.add_argument(
+        "--shard",
+        default="0/1",
+        help="handle only shard i of N (0-based), users split by user_id hash; "
+        "each shard gets 1/N of --rate-limit (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--report",
+        help="where to write the JSON run report "
+        "(default: output/send-report-<run-id>[-shard-i-of-N].json)",
+    )
+    parser.add_argument(
+        "--prometheus",
+        help="also write run metrics in Prometheus text format to this file",
+    )
+    args = parser.parse_args(argv)
+    try:
+        args.shard_index, args.shard_count = parse_shard(args.shard)
+    except ValueError as e:
+        parser.error(str(e))
+    # Resolved after parsing, so values loaded from .env.local by main() count
+    if args.rate_limit is None:
+        args.rate_limit = float(os.environ.get("RESEND_RATE_LIMIT") or DEFAULT_RATE_LIMIT)
+    if args.at and args.schedule != "hourly":
+        parser.error("--at requires --schedule hourly")
+    args.tick = args.at or _parse_tick(datetime.now(timezone.utc).isoformat())
+    if args.run_id is None:
+        args.run_id = args.tick.strftime("%Y-%m-%dT%H" if args.schedule == "hourly" else "%Y-%m-%d")
+    return args
+
+
+def main(argv: list[str] | None = None):
+    load_env()
+    args = parse_args(argv)
     print("Starting recommendation emails...")
 
     client = get_supabase_client()
     init_resend()
 
-    users = get_eligible_users(client)
-    print(f"Found {len(users)} eligible user(s).")
+    metrics = RunMetrics()
+    metrics.track_db_round_trips(client)
 
-    sent_count = 0
-    skip_count = 0
+    suffix = "" if args.shard_count == 1 else f"-shard-{args.shard_index}-of-{args.shard_count}"
+    history = RecommendationHistory(
+        client, os.path.join(OUTPUT_DIR, f"recommendations-journal{suffix}.jsonl"), metrics=metrics
+    )
+    replayed = history.replay()
+    if replayed:
+        print(f"Recorded {replayed} recommendation(s) left over from an interrupted run.")
 
-    for user in users:
-        album = get_unsent_album(client, user["user_id"])
+    ledger = RunLedger(os.path.join(OUTPUT_DIR, f"send-ledger{suffix}.sqlite3"), args.run_id)
+    print(f"Run {args.run_id}, shard {args.shard_index}/{args.shard_count}.")
 
-        if album is None:
-            print(f"  {user['email']}: no unsent albums left, skipping.")
-            skip_count += 1
-            continue
+    catalogue = []
+    if args.selection != "per-user":
+        with metrics.time("album_selection"):
+            catalogue = load_catalogue(client)
 
-        print(f"  {user['email']}: sending '{album['title']}' by {album['artist']}...")
-
-        if send_email(user, album):
-            record_recommendation(client, user["user_id"], album["album_id"])
+    user_count = 0
+    resumed_count = 0
+    sent_count = 0
+    skip_count = 0
+    fail_count = 0
+
+    def outgoing():
+        nonlocal user_count, resumed_count, skip_count
+        if args.schedule == "hourly":
+            pages = iter_due_users(client, args.tick)
+        else:
+            pages = iter_eligible_users(client)
+        while True:
+            with metrics.time("user_fetch"):
+                users = next(pages, None)
+            if users is None:
+                return
+
+            users = [u for u in users if shard_of(u["user_id"], args.shard_count) == args.shard_index]
+            finished = ledger.finished([u["user_id"] for u in users])
+            users = [u for u in users if u["user_id"] not in finished]
+            resumed_count += len(finished)
+            if not users:
+                continue
+
+            user_count += len(users)
+            print(f"Processing {len(users)} eligible user(s) ({user_count} so far)...")
+
+            picks = None
+            with metrics.time("album_selection"):
+                if args.selection == "batch":
+                    picks = select_albums_batch(client, users, catalogue)
+                elif args.selection == "rpc":
+                    picks = select_albums_rpc(client, users, catalogue)
+
+            for user in users:
+                if picks is not None:
+                    album = picks[user["user_id"]]
+                else:
+                    with metrics.time("album_selection"):
+                        album = get_unsent_album(client, user["user_id"])
+
+                if album is None:
+                    print(f"  {user['email']}: no unsent albums left, skipping.")
+                    ledger.mark(user["user_id"], "skipped")
+                    skip_count += 1
+                    continue
+
+                print(f"  {user['email']}: sending '{album['title']}' by {album['artist']}...")
+                with metrics.time("render"):
+                    email = build_email(user, album)
+                yield email
+
+    rate_limit = args.rate_limit / args.shard_count
+    results = dispatch(
+        outgoing(), rate_limit=rate_limit, concurrency=args.concurrency, metrics=metrics
+    )
+    for result in results:
+        if result.ok:
+            history.add(result.email.user_id, result.email.album_id)
+            ledger.mark(result.email.user_id, "sent", result.email.album_id)
             sent_count += 1
-
-    print(f"\nDone. Sent: {sent_count}, Skipped: {skip_count}, Failed: {len(users) - sent_count - skip_count}")
+        else:
+            print(f"  Failed to send to {result.email.params['to'][0]}: {result.error}")
+            ledger.mark(result.email.user_id, "failed", result.email.album_id)
+            fail_count += 1
+    history.close()
+    ledger.close()
+
+    if resumed_count:
+        print(f"\n{resumed_count} user(s) were already handled earlier in run {args.run_id}.")
+    print(f"\nDone. Eligible: {user_count}, Sent: {sent_count}, Skipped: {skip_count}, Failed: {fail_count}")
+
+    metrics.count("emails_sent", sent_count)
+    metrics.count("emails_skipped", skip_count)
+    metrics.count("emails_failed", fail_count)
+    metrics.count("users_resumed", resumed_count)
+    report = metrics.report(
+        run_id=args.run_id,
+        shard=args.shard,
+        schedule=args.schedule,
+        selection=args.selection,
+        eligible_users=user_count,
+    )
+    report_path = args.report or os.path.join(OUTPUT_DIR, f"send-report-{args.run_id}{suffix}.json")
+    write_report(report, report_path, args.prometheus)
+    db_calls = report["counters"].get("db_round_trips", 0)
+    print(
+        f"Report written to {report_path}: {report['wall_time_seconds']}s, "
+        f"{report['emails_per_second']} emails/s, {db_calls} DB round trip(s)."
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+"""
+Tests for the streaming-link lookup's artist listing index and UPC bridge.
+To run:  pytest tests/test_add_streaming_links.py -v
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scripts"))
+
+import add_streaming_links
+import http_cache
+import http_client
+
+
+class FakeResponse:
+    status_code = 200
+    headers: dict = {}
+    text = ""
+
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+LISTING = [
+    {"collectionName": "Kind of Blue", "artistName": "Miles Davis", "releaseDate": "1997-01-01",
+     "collectionViewUrl": "apple/kind-of-blue-reissue", "artworkUrl100": "art/100x100.jpg"},
+    {"collectionName": "Kind of Blue", "artistName": "Miles Davis", "releaseDate": "1959-08-17",
+     "collectionViewUrl": "apple/kind-of-blue", "artworkUrl100": "art/100x100.jpg"},
+    {"collectionName": "Sketches of Spain", "artistName": "Miles Davis", "releaseDate": "1960-07-18",
+     "collectionViewUrl": "apple/sketches", "artworkUrl100": None},
+]
+
+
+@pytest.fixture
+def network(monkeypatch):
+    monkeypatch.setenv("HTTP_CACHE", "off")
+    calls = []
+
+    def fake_get(url, params=None, **kwargs):
+        calls.append(params)
+        return FakeResponse({"results": LISTING if params.get("attribute") == "artistTerm" else []})
+
+    monkeypatch.setattr(http_cache.http_client, "get", fake_get)
+    return calls
+
+
+def _album(title, artist, year):
+    return {"title": title, "artist": artist, "release_year": year,
+            "streaming_link_apple": None, "streaming_link_spotify": "https://open.spotify.com/album/x"}
+
+
+def test_listing_is_fetched_once_per_repeated_artist(network):
+    albums = [
+        _album("Kind of Blue", "Miles Davis", 1959),
+        _album("Sketches of Spain (Legacy Edition)", "Miles Davis", 1960),
+        _album("Blue Train", "John Coltrane", 1957),
+    ]
+    index = add_streaming_links.build_artist_index(albums, spotify_token=None)
+
+    assert len(network) == 1
+    assert network[0]["term"] == "Miles Davis"
+    assert index.match_apple("Kind of Blue", "Miles Davis", 1959) == ("apple/kind-of-blue", "art/600x600.jpg", 1.0)
+    assert index.match_apple("Sketches of Spain (Legacy Edition)", "Miles Davis", 1960) == ("apple/sketches", None, 1.0)
+
+
+def test_only_exact_titles_are_matched_locally(network):
+    index = add_streaming_links.build_artist_index(
+        [_album("Kind of Blue", "Miles Davis", 1959), _album("Blue", "Miles Davis", None)], spotify_token=None
+    )
+    assert index.match_apple("Blue", "Miles Davis", None) is None
+    assert index.match_apple("Blue Train", "John Coltrane", 1957) is None
+
+
+@pytest.fixture
+def upc_network(monkeypatch):
+    """Spotify album i has UPC 000i; iTunes knows the even UPCs."""
+    monkeypatch.setenv("HTTP_CACHE", "off")
+    calls = []
+
+    def fake_get(url, params=None, **kwargs):
+        calls.append(url)
+        if url == "https://api.spotify.com/v1/albums":
+            ids = params["ids"].split(",")
+            return FakeResponse({"albums": [{"external_ids": {"upc": f"000{i}"}} for i in ids]})
+        upcs = params["upc"].split(",")
+        return FakeResponse({"results": [
+            {"upc": upc, "collectionViewUrl": f"apple/{upc}", "artworkUrl100": None}
+            for upc in upcs if int(upc) % 2 == 0
+        ]})
+
+    monkeypatch.setattr(http_cache.http_client, "get", fake_get)
+    return calls
+
+
+def test_upc_bridge_resolves_existing_links_in_batches(upc_network):
+    albums = [
+        {"title": "t", "artist": "a", "streaming_link_apple": None,
+         "streaming_link_spotify": f"https://open.spotify.com/album/{i}"}
+        for i in range(25)
+    ]
+    bridge = add_streaming_links.UpcBridge.resolve(albums, token="token")
+
+    # 25 Spotify albums: two /v1/albums requests, one multi-UPC iTunes lookup
+    assert len(upc_network) == 3
+    assert bridge.apple_for_spotify("https://open.spotify.com/album/4") == ("apple/0004", None)
+    assert bridge.apple_for_spotify("https://open.spotify.com/album/5") is None
+    assert len(upc_network) == 3
+
+
+@pytest.mark.parametrize("retry_after, banned", [("1.5", False), ("soon", False), ("3600", True)])
+def test_spotify_throttle_with_any_retry_after_is_handled(monkeypatch, retry_after, banned):
+    response = FakeResponse({})
+    response.status_code = 429
+    response.headers = {"Retry-After": retry_after}
+    monkeypatch.setattr(add_streaming_links, "cached_get", lambda url, **kwargs: response)
+    monkeypatch.setattr(add_streaming_links, "_spotify_rate_limited", add_streaming_links.threading.Event())
+
+    result = add_streaming_links._spotify_get("token", add_streaming_links.SPOTIFY_SEARCH_URL)
+
+    assert (result is None) == banned
+    assert add_streaming_links._spotify_rate_limited.is_set() == banned
+
+
+class NoLimit:
+    def acquire(self):
+        pass
+
+    def succeeded(self):
+        pass
+
+
+def test_losing_strategies_send_no_requests_after_a_match(monkeypatch):
+    """Strategies still backing off when the first one matches never retry."""
+    monkeypatch.setenv("HTTP_CACHE", "off")
+    monkeypatch.setattr(add_streaming_links, "ITUNES_SEARCH", NoLimit())
+    backoff = threading.Event()
+    monkeypatch.setattr(http_client.time, "sleep", lambda seconds: backoff.wait(1))
+    sent = []
+
+    class Session:
+        def request(self, method, url, params=None, **kwargs):
+            sent.append(params["term"])
+            if params["term"] == "Kind of Blue Miles Davis":
+                return FakeResponse({"results": [LISTING[1]]})
+            response = FakeResponse({})
+            response.status_code = 503
+            return response
+
+    monkeypatch.setattr(http_client, "_session", Session())
+
+    result = add_streaming_links.search_apple_music("Kind of Blue", "Miles Davis", 1959, country="us")
+    assert result[0] == "apple/kind-of-blue"
+
+    backoff.set()
+    threading.Event().wait(0.2)  # let the losing strategies wake up
+    assert len(sent) == add_streaming_links.SPECULATION_WIDTH
@@ -0,0 +1,116 @@
+"""
+Tests for recording and replaying HTTP traffic to cassettes.
+To run:  pytest tests/test_cassette.py -v
+"""
+
+import gzip
+import http.server
+import json
+import os
+import sys
+import threading
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scripts"))
+
+import cassette
+import http_cache
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    hits = 0
+
+    def _answer(self, data, status=200):
+        type(self).hits += 1
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._answer({"path": self.path, "hit": type(self).hits})
+
+    def do_POST(self):
+        if self.path == "/token":
+            return self._answer({"access_token": "secret", "token_type": "Bearer", "expires_in": 3600})
+        length = int(self.headers["Content-Length"])
+        self._answer({"echo": json.loads(self.rfile.read(length))})
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.hits = 0
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def _session(adapter):
+    session = requests.Session()
+    session.mount("http://", adapter)
+    return session
+
+
+def test_recorded_requests_replay_without_the_network(server, tmp_path):
+    recorder = cassette.RecordingAdapter(str(tmp_path / "script.jsonl.gz"))
+    live = _session(recorder)
+    first = live.get(f"{server}/search", params={"term": "kind of blue", "limit": 25}).json()
+    second = live.get(f"{server}/search", params={"term": "kind of blue", "limit": 25}).json()
+    posted = live.post(f"{server}/chat", json={"prompt": "Blue Train"}).json()
+    recorder.save()
+
+    player = cassette.ReplayAdapter([str(tmp_path / "script.jsonl.gz")], latency=0)
+    replay = _session(player)
+    # Parameter order doesn't matter; repeated requests replay in order
+    assert replay.get(f"{server}/search", params={"limit": 25, "term": "kind of blue"}).json() == first
+    assert replay.get(f"{server}/search", params={"limit": 25, "term": "kind of blue"}).json() == second
+    assert replay.post(f"{server}/chat", json={"prompt": "Blue Train"}).json() == posted
+    assert _Handler.hits == 3
+    assert player.replayed == 3
+
+
+def test_unrecorded_requests_get_a_404(server, tmp_path):
+    recorder = cassette.RecordingAdapter(str(tmp_path / "script.jsonl.gz"))
+    _session(recorder).post(f"{server}/chat", json={"prompt": "Blue Train"})
+    recorder.save()
+
+    player = cassette.ReplayAdapter([str(tmp_path / "script.jsonl.gz")], latency=0)
+    response = _session(player).post(f"{server}/chat", json={"prompt": "Giant Steps"})
+    assert response.status_code == 404
+    assert player.missed == 1
+
+
+def test_http_cache_is_bypassed_while_recording(monkeypatch):
+    monkeypatch.delenv("HTTP_CACHE", raising=False)
+    monkeypatch.setenv("HTTP_CASSETTE", "record")
+    assert http_cache.get_cache() is None
+
+
+def test_tokens_are_redacted_when_recording(server, tmp_path):
+    recorder = cassette.RecordingAdapter(str(tmp_path / "script.jsonl.gz"))
+    live = _session(recorder).post(f"{server}/token", data={"grant_type": "client_credentials"}).json()
+    assert live["access_token"] == "secret"
+    recorder.save()
+
+    with gzip.open(tmp_path / "script.jsonl.gz", "rt") as f:
+        assert "secret" not in f.read()
+    player = cassette.ReplayAdapter([str(tmp_path / "script.jsonl.gz")], latency=0)
+    token = _session(player).post(f"{server}/token", data={"grant_type": "client_credentials"}).json()
+    assert token == {"access_token": "redacted", "token_type": "Bearer", "expires_in": 3600}
+
+
+@pytest.mark.parametrize("value, latency", [(None, 0.0), ("", 0.0), ("250", 0.25), ("recorded", None)])
+def test_replay_latency_setting(monkeypatch, value, latency):
+    if value is None:
+        monkeypatch.delenv("HTTP_CASSETTE_LATENCY_MS", raising=False)
+    else:
+        monkeypatch.setenv("HTTP_CASSETTE_LATENCY_MS", value)
+    assert cassette._latency() == latency
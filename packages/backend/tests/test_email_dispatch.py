@@ -0,0 +1,95 @@
+"""
+Tests for batched Resend dispatch. Resend calls are replaced with a stub.
+To run:  pytest tests/test_email_dispatch.py -v
+"""
+
+import os
+import sys
+
+import pytest
+import resend
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import email_dispatch
+from email_dispatch import OutgoingEmail, dispatch
+
+
+def _emails(n):
+    return [
+        OutgoingEmail(user_id=f"u{i}", album_id="a1", params={"to": [f"u{i}@example.com"]})
+        for i in range(n)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(email_dispatch.time, "sleep", lambda _: None)
+
+
+def _error(code):
+    return resend.exceptions.ResendError(
+        code=code, error_type="x", message=f"error {code}", suggested_action=""
+    )
+
+
+def test_groups_emails_into_batches(monkeypatch):
+    sizes = []
+    monkeypatch.setattr(resend.Batch, "send", lambda params, options=None: sizes.append(len(params)))
+
+    results = list(dispatch(_emails(250), rate_limit=1000, concurrency=1))
+
+    assert sorted(sizes) == [50, 100, 100]
+    assert len(results) == 250
+    assert all(r.ok for r in results)
+
+
+def test_retries_rate_limited_batch(monkeypatch):
+    calls = []
+
+    def send(params, options=None):
+        calls.append(options["idempotency_key"])
+        if len(calls) < 3:
+            raise _error(429)
+
+    monkeypatch.setattr(resend.Batch, "send", send)
+
+    results = list(dispatch(_emails(3), rate_limit=1000))
+
+    assert len(calls) == 3
+    assert len(set(calls)) == 1  # same idempotency key on every retry
+    assert all(r.ok for r in results)
+
+
+def test_does_not_retry_validation_errors(monkeypatch):
+    calls = []
+
+    def send(params, options=None):
+        calls.append(params)
+        raise _error(422)
+
+    monkeypatch.setattr(resend.Batch, "send", send)
+
+    results = list(dispatch(_emails(2), rate_limit=1000))
+
+    # The batch, then each email alone; none of them is retried
+    assert len(calls) == 3
+    assert [r.ok for r in results] == [False, False]
+    assert results[0].error == "error 422"
+
+
+def test_one_bad_address_does_not_fail_the_rest_of_the_batch(monkeypatch):
+    keys = []
+
+    def send(params, options=None):
+        keys.append(options["idempotency_key"])
+        if any(p["to"] == ["u5@example.com"] for p in params):
+            raise _error(422)
+
+    monkeypatch.setattr(resend.Batch, "send", send)
+
+    results = list(dispatch(_emails(8), rate_limit=1000, concurrency=1))
+
+    assert [r.email.user_id for r in results if not r.ok] == ["u5"]
+    assert sum(r.ok for r in results) == 7
+    assert len(set(keys)) == len(keys)  # every sub-batch has its own key
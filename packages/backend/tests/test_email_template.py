@@ -0,0 +1,42 @@
+"""
+Tests for the recommendation email template.
+To run:  pytest tests/test_email_template.py -v
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from email_template import _render_album_fragments, render_recommendation_email
+
+ALBUM = {
+    "album_id": "a1",
+    "title": "Blue Train",
+    "artist": "John Coltrane",
+    "release_year": 1957,
+    "cover_image_url": "https://example.com/cover.jpg",
+    "streaming_link_spotify": "https://open.spotify.com/album/x",
+    "streaming_link_apple": None,
+    "artist_summary": "Saxophonist.",
+    "album_summary": None,
+}
+
+
+def test_album_fragments_are_rendered_once_per_album():
+    _render_album_fragments.cache_clear()
+    ann = render_recommendation_email("Ann", ALBUM, "https://jazzy.example/unsubscribe?token=1")
+    bob = render_recommendation_email("Bob", ALBUM, "https://jazzy.example/unsubscribe?token=2")
+
+    assert _render_album_fragments.cache_info().misses == 1
+    assert "Hey Ann!</h2>" in ann and "token=1" in ann
+    assert "Hey Bob!</h2>" in bob and "token=2" in bob
+    assert ann.replace("Ann", "Bob").replace("token=1", "token=2") == bob
+
+
+def test_unsubscribe_link_is_omitted_without_url():
+    html = render_recommendation_email("Ann", ALBUM)
+
+    assert "Unsubscribe" not in html
+    assert html.endswith("</html>")
+    assert "Blue Train" in html and "(1957)" in html
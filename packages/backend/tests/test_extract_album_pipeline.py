@@ -0,0 +1,205 @@
+"""
+Tests for the extraction pipeline around the model: cropping, the crop and
+model stages, the extraction cache, multi-page requests and batch jobs.
+The Gemini client is replaced by fakes, so no API key or network is needed.
+To run:  pytest tests/test_extract_album_pipeline.py -v
+"""
+
+import io
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scripts"))
+# The module creates its Gemini client on import; every test replaces it
+os.environ.setdefault("GEMINI_API_KEY", "unused")
+
+import extract_album_data
+from extract_album_data import MAX_IMAGE_SIDE, _crop_text_area, _parse_json_from_response
+from disk_cache import DiskCache
+from gemini_batch import LocalBatchJobs
+
+
+def _pages(tmp_path, count):
+    """Small calendar pages with distinct content, IMG_0.png ... IMG_<count-1>.png."""
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"IMG_{i}.png"
+        Image.new("RGB", (60, 80), (i, i, i)).save(path)
+        paths.append(str(path))
+    return paths
+
+
+def _fake_client(generate_content):
+    return SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+
+
+@pytest.mark.parametrize("image_format,mime_type", [
+    ("png", "image/png"), ("jpeg", "image/jpeg"), ("webp", "image/webp"),
+])
+def test_crop_upscales_the_text_area_in_memory(tmp_path, image_format, mime_type):
+    path = tmp_path / "page.png"
+    Image.new("RGB", (600, 800), "white").save(path)
+
+    data, mime = _crop_text_area(str(path), image_format)
+
+    assert mime == mime_type
+    assert Image.open(io.BytesIO(data)).size == (1200, 800)
+
+
+def test_crop_of_a_large_photo_is_capped_at_the_model_resolution(tmp_path):
+    path = tmp_path / "page.jpg"
+    Image.new("RGB", (4000, 6000), "white").save(path)
+
+    data, _ = _crop_text_area(str(path), "jpeg")
+
+    assert Image.open(io.BytesIO(data)).size == (MAX_IMAGE_SIDE, MAX_IMAGE_SIDE * 3000 // 4000)
+
+
+def test_crops_and_model_calls_run_as_a_pipeline(tmp_path, monkeypatch):
+    paths = _pages(tmp_path, 12)
+    monkeypatch.setattr(extract_album_data, "PREPARE_WORKERS", 2)
+    monkeypatch.setattr(extract_album_data, "MAX_WORKERS", 3)
+
+    def fake_model(image_bytes, mime_type, image_path, model=None, cache=None, cache_key=None):
+        assert Image.open(io.BytesIO(image_bytes)).size == (120, 80)
+        return {"title": os.path.basename(image_path), "artist": "a", "calendar_order": 1}
+
+    monkeypatch.setattr(extract_album_data, "extract_album_info", fake_model)
+
+    albums = extract_album_data.extract_albums(paths)
+
+    assert sorted(a["image_filename"] for a in albums) == sorted(os.path.basename(p) for p in paths)
+
+
+def test_second_run_is_answered_from_the_extraction_cache(tmp_path, monkeypatch):
+    paths = _pages(tmp_path, 3)
+    calls = []
+
+    def generate_content(model, contents):
+        calls.append(model)
+        return SimpleNamespace(text=json.dumps(
+            {"title": f"Album {len(calls)}", "artist": "Artist", "release_year": "1959", "calendar_date": "JAN 2"}
+        ))
+
+    monkeypatch.setattr(extract_album_data, "PREPARE_WORKERS", 1)
+    monkeypatch.setattr(extract_album_data, "client", _fake_client(generate_content))
+
+    cache = DiskCache(str(tmp_path / "extraction-cache.sqlite3"))
+    first = extract_album_data.extract_albums(paths, cache)
+    second = extract_album_data.extract_albums(paths, cache)
+    cache.close()
+
+    assert len(calls) == 3
+    assert cache.hits == 3
+    by_file = lambda albums: sorted(albums, key=lambda a: a["image_filename"])
+    assert by_file(second) == by_file(first)
+    assert second[0]["release_year"] == 1959
+
+
+def test_untitled_answers_are_not_cached(tmp_path, monkeypatch):
+    paths = _pages(tmp_path, 2)
+    calls = []
+
+    def generate_content(model, contents):
+        calls.append(model)
+        title = "Unknown Title" if len(calls) == 1 else f"Album {len(calls)}"
+        return SimpleNamespace(text=json.dumps({"title": title, "artist": "Artist"}))
+
+    monkeypatch.setattr(extract_album_data, "PREPARE_WORKERS", 1)
+    monkeypatch.setattr(extract_album_data, "MAX_WORKERS", 1)
+    monkeypatch.setattr(extract_album_data, "client", _fake_client(generate_content))
+
+    cache = DiskCache(str(tmp_path / "extraction-cache.sqlite3"))
+    first = extract_album_data.extract_albums(paths, cache)
+    second = extract_album_data.extract_albums(paths, cache)
+    cache.close()
+
+    assert len(first) == 1
+    assert len(second) == 2
+    # The untitled page is asked again; the other one comes from the cache
+    assert len(calls) == 3
+
+
+def test_batch_response_is_mapped_back_to_files():
+    files = ["IMG_1.png", "IMG_2.png", "IMG_3.png"]
+    text = """```json
+    [{"image": "IMG_2.png", "title": "Blue Train"},
+     {"image": "img_1.PNG", "title": "Giant Steps"},
+     {"title": "Ballads"}]
+    ```"""
+    assert _parse_json_from_response(text, files) == {
+        "IMG_1.png": {"image": "img_1.PNG", "title": "Giant Steps"},
+        "IMG_2.png": {"image": "IMG_2.png", "title": "Blue Train"},
+        # Untagged, but the array is intact: matched by position
+        "IMG_3.png": {"title": "Ballads"},
+    }
+
+
+def test_malformed_batch_item_only_loses_its_own_entry():
+    files = ["IMG_1.png", "IMG_2.png", "IMG_3.png"]
+    text = '[{"image": "IMG_1.png", "title": "Blue Train"}, {"image": "IMG_2.png", "title": "Gi, {"title": "Ballads"}]'
+    assert _parse_json_from_response(text, files) == {"IMG_1.png": {"image": "IMG_1.png", "title": "Blue Train"}}
+    assert _parse_json_from_response("no JSON here", files) is None
+
+
+def test_batched_pages_fall_back_to_single_requests(tmp_path, monkeypatch):
+    paths = _pages(tmp_path, 5)
+    requests = []
+
+    def generate_content(model, contents):
+        names = [part[len("Image: "):] for part in contents if isinstance(part, str) and part.startswith("Image: ")]
+        requests.append(names or ["single"])
+        if not names:
+            return SimpleNamespace(text='{"title": "Retried", "artist": "Artist", "calendar_date": "03 JAN"}')
+        # IMG_1 comes back malformed
+        records = [{"image": n, "title": f"Album {n}", "artist": "Artist"} for n in names if n != "IMG_1.png"]
+        return SimpleNamespace(text=json.dumps(records))
+
+    monkeypatch.setattr(extract_album_data, "PREPARE_WORKERS", 1)
+    monkeypatch.setattr(extract_album_data, "MAX_WORKERS", 1)
+    monkeypatch.setattr(extract_album_data, "BATCH_SIZE", 3)
+    monkeypatch.setattr(extract_album_data, "client", _fake_client(generate_content))
+
+    albums = {a["image_filename"]: a["title"] for a in extract_album_data.extract_albums(paths)}
+
+    assert albums == {
+        "IMG_0.png": "Album IMG_0.png", "IMG_1.png": "Retried", "IMG_2.png": "Album IMG_2.png",
+        "IMG_3.png": "Album IMG_3.png", "IMG_4.png": "Album IMG_4.png",
+    }
+    assert sorted(len(r) for r in requests) == [1, 2, 3]
+
+
+def test_batch_job_mode_extracts_pages_and_retries_failures_directly(tmp_path, monkeypatch):
+    paths = _pages(tmp_path, 4)
+    calls = []
+
+    def generate_content(model, contents):
+        calls.append(model)
+        # The batch job's answer for the first page is lost, the second has no title
+        if len(calls) == 1:
+            raise RuntimeError("internal error")
+        title = "Unknown Title" if len(calls) == 2 else f"Album {len(calls)}"
+        return SimpleNamespace(text=json.dumps({"title": title, "artist": "Artist"}))
+
+    fake_client = _fake_client(generate_content)
+    monkeypatch.setattr(extract_album_data, "PREPARE_WORKERS", 1)
+    monkeypatch.setattr(extract_album_data, "MAX_WORKERS", 1)
+    monkeypatch.setattr(extract_album_data, "BATCH_POLL_SECONDS", 0.01)
+    monkeypatch.setattr(extract_album_data, "client", fake_client)
+
+    cache = DiskCache(str(tmp_path / "extraction-cache.sqlite3"))
+    albums = extract_album_data.extract_albums_in_batch_job(
+        paths, LocalBatchJobs(fake_client, "m", max_workers=1), cache
+    )
+
+    assert sorted(a["image_filename"] for a in albums) == [f"IMG_{i}.png" for i in range(4)]
+    assert all(a["title"] != "Unknown Title" for a in albums)
+    assert len(calls) == 6
+    cached = [cache.get(extract_album_data.extraction_cache_key(path)) for path in paths]
+    assert all(data and data["title"] != "Unknown Title" for data in cached)
+    cache.close()
@@ -0,0 +1,79 @@
+"""
+Tests for running generate_content requests as Gemini batch jobs.
+To run:  pytest tests/test_gemini_batch.py -v
+"""
+
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+from google.genai import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scripts"))
+
+import gemini_batch
+from gemini_batch import GeminiBatchJobs, LocalBatchJobs
+
+
+class FakeBatchClient:
+    """Just enough of genai.Client's files and batches APIs for GeminiBatchJobs."""
+
+    def __init__(self):
+        self.uploaded = []
+        self.states = ["JOB_STATE_PENDING", "JOB_STATE_RUNNING", "JOB_STATE_SUCCEEDED"]
+        self.files = SimpleNamespace(upload=self._upload, download=self._download)
+        self.batches = SimpleNamespace(create=self._create, get=self._get)
+
+    def _upload(self, file, config):
+        with open(file) as f:
+            self.uploaded = [json.loads(line) for line in f]
+        return SimpleNamespace(name="files/input")
+
+    def _create(self, model, src, config):
+        assert src == "files/input"
+        return SimpleNamespace(name="batches/1")
+
+    def _get(self, name):
+        state = self.states.pop(0) if len(self.states) > 1 else self.states[0]
+        dest = SimpleNamespace(file_name="files/output") if state == "JOB_STATE_SUCCEEDED" else None
+        return SimpleNamespace(name=name, state=types.JobState(state), dest=dest)
+
+    def _download(self, file):
+        assert file == "files/output"
+        lines = [
+            {"key": "IMG_1.png", "response": {"candidates": [{"content": {"parts": [{"text": '{"title": "Blue Train"}'}]}}]}},
+            {"key": "IMG_2.png", "error": {"code": 3, "message": "invalid image"}},
+        ]
+        return "\n".join(json.dumps(line) for line in lines).encode()
+
+
+def test_requests_are_uploaded_as_jsonl_and_results_read_back(monkeypatch):
+    monkeypatch.setattr(gemini_batch.time, "sleep", lambda seconds: None)
+    client = FakeBatchClient()
+    jobs = GeminiBatchJobs(client, "gemini-2.0-flash")
+    image = types.Part.from_bytes(data=b"\x89PNG", mime_type="image/png")
+
+    name = jobs.submit([("IMG_1.png", [image, "Read this."]), ("IMG_2.png", [image, "Read this."])], "test")
+
+    assert client.uploaded[0] == {
+        "key": "IMG_1.png",
+        "request": {"contents": [{"role": "user", "parts": [
+            {"inlineData": {"data": "iVBORw==", "mimeType": "image/png"}}, {"text": "Read this."},
+        ]}]},
+    }
+    assert gemini_batch.wait(jobs, name, poll_seconds=0) == "JOB_STATE_SUCCEEDED"
+    assert jobs.results(name) == {"IMG_1.png": '{"title": "Blue Train"}', "IMG_2.png": None}
+
+
+def test_local_stand_in_sends_each_request_itself():
+    def generate_content(model, contents):
+        if contents == ["fail"]:
+            raise RuntimeError("boom")
+        return SimpleNamespace(text=f"{model}: {contents[0]}")
+
+    jobs = LocalBatchJobs(SimpleNamespace(models=SimpleNamespace(generate_content=generate_content)), "m")
+    name = jobs.submit([("a", ["one"]), ("b", ["fail"])], "test")
+
+    assert gemini_batch.wait(jobs, name, poll_seconds=0.01) == "JOB_STATE_SUCCEEDED"
+    assert jobs.results(name) == {"a": "m: one", "b": None}
@@ -0,0 +1,119 @@
+"""
+Tests for the on-disk cache behind the iTunes/Spotify lookups.
+To run:  pytest tests/test_http_cache.py -v
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scripts"))
+
+import disk_cache
+import http_cache
+from disk_cache import DiskCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.text = str(data)
+        self.headers = {}
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+@pytest.fixture
+def network(tmp_path, monkeypatch):
+    """Route cached_get to a fresh cache and a scripted fake network."""
+    monkeypatch.setenv("HTTP_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.delenv("HTTP_CACHE", raising=False)
+    monkeypatch.setattr(http_cache, "_cache", None)
+    calls = []
+    responses = {}
+
+    def fake_get(url, params=None, headers=None, **kwargs):
+        calls.append((url, params))
+        return responses.get(params.get("term") if params else url, FakeResponse(200, {"results": []}))
+
+    monkeypatch.setattr(http_cache.http_client, "get", fake_get)
+    yield calls, responses
+    http_cache.close_cache()
+
+
+def test_values_expire_after_ttl(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path / "c.sqlite3"))
+    cache.set("k", {"a": 1}, ttl=60)
+    assert cache.get("k") == {"a": 1}
+
+    monkeypatch.setattr(disk_cache.time, "time", lambda: 10**10)
+    assert cache.get("k") is None
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path / "c.sqlite3"), max_entries=2)
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(disk_cache.time, "time", lambda: next(clock))
+    cache.set("a", 1, ttl=3600)
+    cache.set("b", 2, ttl=3600)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", 3, ttl=3600)
+    cache._evict(next(clock))
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    cache.close()
+
+
+def test_cache_survives_reopening(tmp_path):
+    path = str(tmp_path / "c.sqlite3")
+    cache = DiskCache(path)
+    cache.set("k", [1, 2], ttl=60)
+    cache.close()
+    assert DiskCache(path).get("k") == [1, 2]
+
+
+def test_cache_key_normalizes_url_and_params():
+    a = http_cache.cache_key("HTTPS://iTunes.Apple.com/search/", {"term": "Kind  of Blue ", "limit": 25})
+    b = http_cache.cache_key("https://itunes.apple.com/search?limit=25", {"term": "Kind of Blue"})
+    assert a == b
+    assert a != http_cache.cache_key("https://itunes.apple.com/search", {"term": "Blue Train"})
+
+
+def test_repeated_lookups_hit_the_network_once(network):
+    calls, responses = network
+    responses["kind of blue"] = FakeResponse(200, {"results": [{"collectionName": "Kind of Blue"}]})
+
+    for _ in range(3):
+        response = http_cache.cached_get("https://itunes.apple.com/search", params={"term": "kind of blue"})
+        assert response.status_code == 200
+        assert response.json()["results"][0]["collectionName"] == "Kind of Blue"
+    assert len(calls) == 1
+
+
+def test_empty_results_are_cached(network):
+    calls, _ = network
+    http_cache.cached_get("https://itunes.apple.com/search", params={"term": "nothing"})
+    http_cache.cached_get("https://itunes.apple.com/search", params={"term": "nothing"})
+    assert len(calls) == 1
+
+
+def test_errors_are_not_cached(network):
+    calls, responses = network
+    responses["busy"] = FakeResponse(429, {})
+    assert http_cache.cached_get("https://itunes.apple.com/search", params={"term": "busy"}).status_code == 429
+    assert http_cache.cached_get("https://itunes.apple.com/search", params={"term": "busy"}).status_code == 429
+    assert len(calls) == 2
+
+
+def test_cache_can_be_disabled(network, monkeypatch):
+    calls, _ = network
+    monkeypatch.setenv("HTTP_CACHE", "off")
+    http_cache.cached_get("https://itunes.apple.com/search", params={"term": "x"})
+    http_cache.cached_get("https://itunes.apple.com/search", params={"term": "x"})
+    assert len(calls) == 2
@@ -0,0 +1,115 @@
+"""
+Tests for the shared HTTP client's retry policy.
+To run:  pytest tests/test_http_client.py -v
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scripts"))
+
+import http_client
+from rate_limit import RateLimiter
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSession:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(http_client.time, "sleep", lambda seconds: None)
+
+    def install(*outcomes):
+        fake = FakeSession(outcomes)
+        monkeypatch.setattr(http_client, "_session", fake)
+        return fake
+
+    return install
+
+
+def test_session_is_shared_and_pooled(monkeypatch):
+    monkeypatch.setattr(http_client, "_session", None)
+    first = http_client.get_session()
+    assert http_client.get_session() is first
+    assert first.get_adapter("https://itunes.apple.com")._pool_maxsize == http_client.POOL_SIZE
+
+
+def test_default_timeout_is_applied(session):
+    fake = session(FakeResponse(200))
+    http_client.get("https://example.com", params={"q": "x"})
+    assert fake.calls[0][2]["timeout"] == http_client.DEFAULT_TIMEOUT
+    assert fake.calls[0][2]["params"] == {"q": "x"}
+
+
+def test_server_errors_and_connection_errors_are_retried(session):
+    fake = session(FakeResponse(503), requests.ConnectionError("reset"), FakeResponse(200))
+    assert http_client.get("https://example.com").status_code == 200
+    assert len(fake.calls) == 3
+
+
+def test_client_errors_are_not_retried(session):
+    fake = session(FakeResponse(404))
+    assert http_client.get("https://example.com").status_code == 404
+    assert len(fake.calls) == 1
+
+
+def test_last_response_is_returned_when_attempts_run_out(session):
+    fake = session(*[FakeResponse(500)] * 3)
+    assert http_client.get("https://example.com", max_attempts=3).status_code == 500
+    assert len(fake.calls) == 3
+
+
+def test_rate_limits_slow_the_limiter(session):
+    limiter = RateLimiter("test", rate=1000.0)
+    session(FakeResponse(429, {"Retry-After": "0"}), FakeResponse(200))
+    assert http_client.get("https://example.com", limiter=limiter).status_code == 200
+    assert limiter.rate < 1000.0
+
+
+def test_long_retry_after_is_returned_to_the_caller(session):
+    fake = session(FakeResponse(429, {"Retry-After": "3600"}))
+    response = http_client.get("https://example.com", max_retry_after=30)
+    assert response.status_code == 429
+    assert len(fake.calls) == 1
+
+
+def test_cancelled_requests_are_not_sent(session):
+    fake = session(FakeResponse(200))
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(http_client.Cancelled):
+        http_client.get("https://example.com", cancel=cancel)
+    assert fake.calls == []
+
+
+def test_cancel_is_checked_after_waiting_for_the_limiter(session):
+    fake = session(FakeResponse(200))
+    cancel = threading.Event()
+
+    class CancellingLimiter:
+        def acquire(self):
+            cancel.set()
+
+    with pytest.raises(http_client.Cancelled):
+        http_client.get("https://example.com", limiter=CancellingLimiter(), cancel=cancel)
+    assert fake.calls == []
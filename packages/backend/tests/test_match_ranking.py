@@ -0,0 +1,78 @@
+"""
+Tests for the scored ranking of iTunes/Spotify search results.
+To run:  pytest tests/test_match_ranking.py -v
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scripts"))
+
+from match_ranking import CandidateIndex, similarity
+
+
+def _index(*results):
+    return CandidateIndex(
+        [{"title": t, "artist": a, "date": d, "id": i} for i, (t, a, d) in enumerate(results)],
+        title=lambda r: r["title"],
+        artists=lambda r: [r["artist"]],
+        date=lambda r: r["date"],
+    )
+
+
+def _best_id(index, title, artist, year):
+    best = index.best(title, artist, year)
+    return best[0]["id"] if best else None
+
+
+def test_weak_early_candidate_does_not_block_a_better_one():
+    index = _index(
+        ("Kind of Blue (Legacy Edition)", "Miles Davis", "2009-01-01"),
+        ("Kind of Blue", "Miles Davis", "1959-08-17"),
+    )
+    item, score = index.best("Kind of Blue", "Miles Davis", 1959)
+    assert item["id"] == 1
+    assert score == 1.0
+
+
+def test_closer_year_wins_and_reissues_are_accepted():
+    index = _index(
+        ("Blue Train", "John Coltrane", "1997-01-01"),
+        ("Blue Train", "John Coltrane", "1958-01-01"),
+    )
+    assert _best_id(index, "Blue Train", "John Coltrane", 1957) == 1
+    assert _best_id(index, "Blue Train", "John Coltrane", 1995) == 0
+
+
+def test_candidates_must_share_title_and_artist():
+    index = _index(
+        ("Blue Train", "Sonny Clark", "1957-01-01"),
+        ("Giant Steps", "John Coltrane", "1960-01-01"),
+        ("", "John Coltrane", "1957-01-01"),
+    )
+    assert index.best("Blue Train", "John Coltrane", 1957) is None
+
+
+def test_partial_titles_need_most_of_the_album_title():
+    index = _index(("Live at the Village Vanguard", "Bill Evans", "1961-01-01"))
+    assert _best_id(index, "Sunday at the Village Vanguard", "Bill Evans", 1961) == 0
+    assert _best_id(index, "Waltz for Debby at the Vanguard", "Bill Evans", 1961) is None
+
+
+def test_ties_go_to_the_earlier_result():
+    index = _index(
+        ("Moanin'", "Art Blakey & The Jazz Messengers", "1958-01-01"),
+        ("Moanin", "Art Blakey and the Jazz Messengers", "1958-01-01"),
+    )
+    assert _best_id(index, "Moanin", "Art Blakey and the Jazz Messengers", 1958) == 0
+
+
+def test_exact_title_filter():
+    index = _index(("Kind of Blue (Legacy Edition)", "Miles Davis", "1959-01-01"))
+    assert index.best("Kind of Blue", "Miles Davis", 1959, min_title_similarity=1.0) is None
+    assert index.best("Kind of Blue", "Miles Davis", 1959) is not None
+
+
+def test_substitute_similarity_is_low():
+    assert similarity("Kind of Blue", "Miles Davis", 1959, "Kind of Blue", "Miles Davis", 1959) == 1.0
+    assert similarity("Kind of Blue", "Miles Davis", 1959, "Bitches Brew", "Miles Davis", 1970) < 0.3
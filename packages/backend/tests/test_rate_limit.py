@@ -0,0 +1,56 @@
+"""
+Tests for the adaptive per-provider rate limiter.
+To run:  pytest tests/test_rate_limit.py -v
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scripts"))
+
+from rate_limit import RateLimiter
+
+
+def test_acquire_paces_requests_to_the_rate():
+    limiter = RateLimiter("test", rate=50.0)
+    start = time.monotonic()
+    for _ in range(60):
+        limiter.acquire()
+    # 50 burst tokens at most, the rest paced at 50/s
+    assert time.monotonic() - start >= 0.15
+
+
+def test_rate_limited_halves_rate_and_pauses_everyone():
+    limiter = RateLimiter("test", rate=100.0, min_rate=10.0)
+    limiter.rate_limited(retry_after=0.2)
+    assert limiter.rate == 50.0
+
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.19
+
+    for _ in range(5):
+        limiter.rate_limited(retry_after=0)
+    assert limiter.rate == 10.0
+
+
+def test_successes_raise_rate_up_to_the_ceiling():
+    limiter = RateLimiter("test", rate=1.0, max_rate=2.0)
+    for _ in range(100):
+        limiter.succeeded()
+    assert limiter.rate == 2.0
+
+
+def test_env_rate_is_read_on_first_use(monkeypatch):
+    monkeypatch.delenv("TEST_RPS", raising=False)
+    limiter = RateLimiter("test", 1.0, max_rate=4.0, env="TEST_RPS")
+    # Set after the limiter exists, as load_dotenv() in a script's main() does
+    monkeypatch.setenv("TEST_RPS", "3.5")
+    limiter.acquire()
+    assert limiter.rate == 3.5
+    assert limiter.max_rate == 4.0
+
+    monkeypatch.setenv("TEST_RPS", "8")
+    limiter.acquire()
+    assert limiter.rate == 3.5
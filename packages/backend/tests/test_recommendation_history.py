@@ -0,0 +1,154 @@
+"""
+Tests for buffered recommendation history writes and journal replay.
+To run:  pytest tests/test_recommendation_history.py -v
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import recommendation_history
+from recommendation_history import RecommendationHistory
+
+
+class FakeRecommendationsTable:
+    """Just enough of the Supabase query builder for RecommendationHistory."""
+
+    def __init__(self):
+        self.rows = []
+        self.insert_calls = 0
+        self.fail_inserts = False
+        self._pending = None
+
+    def table(self, name):
+        assert name == "recommendations"
+        return self
+
+    def insert(self, rows):
+        self._pending = ("insert", rows)
+        return self
+
+    def select(self, columns):
+        self._pending = ("select", {})
+        self._range = None
+        return self
+
+    def in_(self, column, values):
+        self._pending[1][column] = set(values)
+        return self
+
+    def order(self, column):
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
+    def execute(self):
+        action, arg = self._pending
+        if action == "insert":
+            if self.fail_inserts:
+                raise RuntimeError("database unavailable")
+            self.insert_calls += 1
+            self.rows.extend(arg)
+            return SimpleNamespace(data=arg)
+        matches = [r for r in self.rows if all(r[column] in values for column, values in arg.items())]
+        if self._range:
+            matches = matches[self._range[0] : self._range[1] + 1]
+        return SimpleNamespace(data=matches)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return str(tmp_path / "output" / "journal.jsonl")
+
+
+def test_flushes_in_chunks(journal):
+    client = FakeRecommendationsTable()
+    history = RecommendationHistory(client, journal, flush_size=2)
+    for i in range(5):
+        history.add(f"u{i}", "a1")
+    history.close()
+
+    assert client.insert_calls == 3
+    assert len(client.rows) == 5
+    assert os.path.getsize(journal) == 0
+
+
+def test_failed_flush_is_replayed_on_next_run(journal):
+    client = FakeRecommendationsTable()
+    client.fail_inserts = True
+    history = RecommendationHistory(client, journal)
+    history.add("u1", "a1")
+    history.add("u2", "a1")
+    history.close()
+    assert client.rows == []
+
+    client.fail_inserts = False
+    assert RecommendationHistory(client, journal).replay() == 2
+    assert {(r["user_id"], r["album_id"]) for r in client.rows} == {("u1", "a1"), ("u2", "a1")}
+
+
+def test_replay_skips_rows_already_inserted(journal):
+    client = FakeRecommendationsTable()
+    history = RecommendationHistory(client, journal)
+    history.add("u1", "a1")
+    history._buffer.clear()  # simulate a crash after the insert, before the journal was cleared
+    client.rows.append({"user_id": "u1", "album_id": "a1"})
+    history.add("u2", "a1")
+    history._buffer.clear()
+
+    assert RecommendationHistory(client, journal).replay() == 1
+    assert len(client.rows) == 2
+
+
+def test_replay_pages_through_long_histories(journal, monkeypatch):
+    monkeypatch.setattr(recommendation_history, "PAGE_SIZE", 2)
+    client = FakeRecommendationsTable()
+    client.rows.extend({"user_id": "u1", "album_id": f"old{i}"} for i in range(5))
+    client.rows.extend({"user_id": "u1", "album_id": f"a{i}"} for i in range(3))
+    history = RecommendationHistory(client, journal)
+    for i in range(4):
+        history.add("u1", f"a{i}")
+    history._buffer.clear()
+
+    assert RecommendationHistory(client, journal).replay() == 1
+    assert sum(1 for r in client.rows if r["album_id"].startswith("a")) == 4
+
+
+def test_replay_chunks_album_ids(journal, monkeypatch):
+    monkeypatch.setattr(recommendation_history, "ID_CHUNK_SIZE", 2)
+    client = FakeRecommendationsTable()
+    filters = []
+    original_in = client.in_
+    client.in_ = lambda column, values: filters.append((column, len(values))) or original_in(column, values)
+    client.rows.append({"user_id": "u1", "album_id": "a4"})
+    history = RecommendationHistory(client, journal)
+    for i in range(5):
+        history.add("u1", f"a{i}")
+    history._buffer.clear()
+
+    assert RecommendationHistory(client, journal).replay() == 4
+    assert max(size for column, size in filters if column == "album_id") == 2
+
+
+def test_failed_flush_is_not_retried_on_every_add(journal):
+    client = FakeRecommendationsTable()
+    client.fail_inserts = True
+    attempts = []
+    original_execute = client.execute
+    client.execute = lambda: attempts.append(1) or original_execute()
+    history = RecommendationHistory(client, journal, flush_size=2)
+    for i in range(5):
+        history.add(f"u{i}", "a1")
+
+    # Flushes at 2 rows, then not again until 2 more are buffered
+    assert len(attempts) == 2
+
+    client.fail_inserts = False
+    history.close()
+    assert len(client.rows) == 5
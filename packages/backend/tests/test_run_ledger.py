@@ -0,0 +1,66 @@
+"""
+Tests for the send run checkpoint and user sharding.
+To run:  pytest tests/test_run_ledger.py -v
+"""
+
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from run_ledger import RunLedger, parse_shard, shard_of
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == (2, 4)
+    for bad in ("4/4", "-1/2", "1", "a/b", "0/0"):
+        with pytest.raises(ValueError):
+            parse_shard(bad)
+
+
+def test_shards_partition_users_evenly():
+    user_ids = [str(uuid.UUID(int=i)) for i in range(4000)]
+    counts = [0] * 4
+    for user_id in user_ids:
+        counts[shard_of(user_id, 4)] += 1
+
+    assert sum(counts) == 4000
+    assert min(counts) > 900
+    assert shard_of(user_ids[0], 4) == shard_of(user_ids[0], 4)
+
+
+def test_restarted_run_skips_finished_users(tmp_path):
+    path = str(tmp_path / "ledger.sqlite3")
+    ledger = RunLedger(path, "2026-10-18")
+    ledger.mark("u1", "sent", "a1")
+    ledger.mark("u2", "skipped")
+    ledger.mark("u3", "failed", "a1")
+    ledger.close()
+
+    resumed = RunLedger(path, "2026-10-18")
+    assert resumed.finished(["u1", "u2", "u3", "u4"]) == {"u1", "u2"}
+    resumed.close()
+
+    next_day = RunLedger(path, "2026-10-19")
+    assert next_day.finished(["u1", "u2"]) == set()
+    next_day.close()
+
+
+def test_earlier_runs_stay_resumable_until_they_expire(tmp_path):
+    path = str(tmp_path / "ledger.sqlite3")
+    crashed = RunLedger(path, "2026-10-19T04")
+    crashed.mark("u1", "sent", "a1")
+    crashed.close()
+    RunLedger(path, "2026-10-19T05").close()
+
+    resumed = RunLedger(path, "2026-10-19T04")
+    assert resumed.finished(["u1", "u2"]) == {"u1"}
+    resumed.close()
+
+    RunLedger(path, "2026-10-19T06", retention_days=0).close()
+    expired = RunLedger(path, "2026-10-19T04")
+    assert expired.finished(["u1"]) == set()
+    expired.close()
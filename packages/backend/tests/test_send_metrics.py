@@ -0,0 +1,59 @@
+"""
+Tests for the send run metrics, report and Prometheus output.
+To run:  pytest tests/test_send_metrics.py -v
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from send_metrics import STAGES, RunMetrics, _percentile, write_report
+
+
+def test_percentile_is_nearest_rank():
+    assert _percentile([1, 2, 3, 4, 5], 0.5) == 3
+    assert _percentile(list(range(1, 10)), 0.5) == 5
+    assert _percentile(list(range(1, 101)), 0.95) == 95
+    assert _percentile([7], 0.95) == 7
+    assert _percentile([], 0.5) == 0.0
+
+
+def _report():
+    metrics = RunMetrics()
+    metrics._samples["render"] = [0.004, 0.001, 0.002, 0.003, 0.005]
+    metrics.count("emails_sent", 5)
+    metrics.count("resend_requests")
+    return metrics.report(run_id="2026-10-19T04")
+
+
+def test_report_summarizes_every_stage():
+    report = _report()
+
+    assert report["run_id"] == "2026-10-19T04"
+    assert set(report["stages"]) == set(STAGES)
+    assert report["stages"]["render"] == {
+        "count": 5, "total_seconds": 0.015, "p50_seconds": 0.003, "p95_seconds": 0.005, "max_seconds": 0.005,
+    }
+    assert report["stages"]["resend_call"]["count"] == 0
+    assert report["counters"] == {"emails_sent": 5, "resend_requests": 1}
+
+
+def test_prometheus_output():
+    text = RunMetrics.to_prometheus(_report())
+
+    assert 'jazzy_send_stage_seconds{stage="render",quantile="0.5"} 0.003' in text
+    assert 'jazzy_send_stage_seconds_count{stage="render"} 5' in text
+    assert 'jazzy_send_events_total{event="emails_sent"} 5' in text
+    assert "# TYPE jazzy_send_wall_time_seconds gauge" in text
+    assert text.endswith("\n")
+
+
+def test_write_report(tmp_path):
+    report = _report()
+    write_report(report, str(tmp_path / "out" / "report.json"), str(tmp_path / "metrics.prom"))
+
+    with open(tmp_path / "out" / "report.json") as f:
+        assert json.load(f) == report
+    assert (tmp_path / "metrics.prom").read_text() == RunMetrics.to_prometheus(report)
@@ -0,0 +1,182 @@
+"""
+Tests for the recommendation sender's album selection and scheduling.
+To run:  pytest tests/test_send_recommendations.py -v
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import send_recommendations
+from send_recommendations import _sort_catalogue, iter_due_users, iter_eligible_users, parse_args, pick_next_album
+
+
+def _album(album_id, order, spotify="https://open.spotify.com/album/x"):
+    return {
+        "album_id": album_id,
+        "calendar_order": order,
+        "streaming_link_spotify": spotify,
+        "streaming_link_apple": None,
+    }
+
+
+CATALOGUE = [
+    _album("c", 3),
+    _album("a", 1),
+    _album("none", None),
+    _album("b", 2),
+    _album("hidden", 4, spotify=None),  # no streaming link
+]
+STREAMABLE = _sort_catalogue(CATALOGUE)
+ORDER_BY_ID = {a["album_id"]: a["calendar_order"] for a in CATALOGUE}
+
+
+def _pick(history):
+    album, reset = pick_next_album(STREAMABLE, ORDER_BY_ID, history)
+    return (album["album_id"] if album else None), reset
+
+
+def test_sort_catalogue_drops_unstreamable_and_puts_nulls_last():
+    assert [a["album_id"] for a in STREAMABLE] == ["a", "b", "c", "none"]
+
+
+def test_new_user_gets_first_album():
+    assert _pick([]) == ("a", False)
+
+
+def test_continues_after_last_sent_order():
+    assert _pick(["b", "a"]) == ("c", False)
+
+
+def test_skips_already_sent_albums():
+    assert _pick(["a", "c"]) == ("b", False)
+
+
+def test_wraps_around_after_highest_order():
+    # Last sent was order 4 (unstreamable): nothing later, so wrap to first unsent
+    assert _pick(["hidden", "a"]) == ("b", False)
+
+
+def test_last_sent_album_with_null_order_wraps_to_first_unsent():
+    assert _pick(["none", "a"]) == ("b", False)
+
+
+def test_full_history_triggers_reset():
+    assert _pick(["none", "c", "b", "a"]) == ("a", True)
+
+
+def test_empty_catalogue_returns_none_without_reset():
+    assert pick_next_album([], {}, ["a"]) == (None, False)
+
+
+def test_hourly_tick_is_floored_and_names_the_run():
+    args = parse_args(["--schedule", "hourly", "--at", "2026-10-19T06:42+02:00"])
+    assert args.tick.isoformat() == "2026-10-19T04:00:00+00:00"
+    assert args.run_id == "2026-10-19T04"
+
+
+def test_daily_schedule_run_id_is_the_date(monkeypatch):
+    class FixedClock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2026, 10, 19, 23, 30, tzinfo=timezone.utc).astimezone(tz)
+
+    # --at is hourly-only, so pin the clock the daily run id is taken from
+    monkeypatch.setattr(send_recommendations, "datetime", FixedClock)
+    args = parse_args(["--schedule", "daily", "--run-id", "manual"])
+    assert args.run_id == "manual"
+    assert parse_args([]).run_id == "2026-10-19"
+
+
+def test_rate_limit_defaults_to_the_environment(monkeypatch):
+    monkeypatch.setenv("RESEND_RATE_LIMIT", "7.5")
+    assert parse_args([]).rate_limit == 7.5
+    assert parse_args(["--rate-limit", "3"]).rate_limit == 3
+    monkeypatch.delenv("RESEND_RATE_LIMIT")
+    assert parse_args([]).rate_limit == send_recommendations.DEFAULT_RATE_LIMIT
+
+
+class FakeUsersClient:
+    """Just enough of the Supabase client for the user keyset pagination."""
+
+    def __init__(self, user_ids):
+        self.users = [
+            {"user_id": user_id, "subscription_status": "active", "newsletter_frequency": "daily"}
+            for user_id in user_ids
+        ]
+        self.after = []  # cursor of every page request
+        self.rpc_params = []
+
+    def table(self, name):
+        assert name == "users"
+        self._after = None
+        return self
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def in_(self, column, values):
+        assert "daily" in values
+        return self
+
+    def gt(self, column, value):
+        assert column == "user_id"
+        self._after = value
+        return self
+
+    def order(self, column):
+        assert column == "user_id"
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def execute(self):
+        self.after.append(self._after)
+        return SimpleNamespace(data=self._page(self._after, self._limit))
+
+    def rpc(self, name, params):
+        assert name == "users_due_at"
+        self.rpc_params.append(params)
+        self.after.append(params["p_after"])
+        page = self._page(params["p_after"], params["p_limit"])
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=page))
+
+    def _page(self, after, limit):
+        users = sorted(self.users, key=lambda u: u["user_id"])
+        return [u for u in users if after is None or u["user_id"] > after][:limit]
+
+
+def _ids(pages):
+    return [[u["user_id"] for u in page] for page in pages]
+
+
+def test_eligible_users_are_paged_by_user_id():
+    client = FakeUsersClient(["u1", "u2", "u3", "u4", "u5"])
+    assert _ids(iter_eligible_users(client, page_size=2)) == [["u1", "u2"], ["u3", "u4"], ["u5"]]
+    assert client.after == [None, "u2", "u4"]
+
+
+def test_a_full_last_page_ends_with_an_empty_request():
+    client = FakeUsersClient(["u1", "u2", "u3", "u4"])
+    assert _ids(iter_eligible_users(client, page_size=2)) == [["u1", "u2"], ["u3", "u4"]]
+    # The empty page after an exactly full one yields nothing
+    assert client.after == [None, "u2", "u4"]
+    assert _ids(iter_eligible_users(FakeUsersClient([]), page_size=2)) == []
+
+
+def test_due_users_pass_the_cursor_to_the_rpc():
+    client = FakeUsersClient(["u1", "u2", "u3"])
+    tick = datetime(2026, 10, 19, 4, tzinfo=timezone.utc)
+    assert _ids(iter_due_users(client, tick, page_size=2)) == [["u1", "u2"], ["u3"]]
+    assert client.rpc_params == [
+        {"p_now": "2026-10-19T04:00:00+00:00", "p_after": None, "p_limit": 2},
+        {"p_now": "2026-10-19T04:00:00+00:00", "p_after": "u2", "p_limit": 2},
+    ]
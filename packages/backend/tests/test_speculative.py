@@ -0,0 +1,72 @@
+"""
+Tests for speculative execution of ordered search strategies.
+To run:  pytest tests/test_speculative.py -v
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scripts"))
+
+from speculative import first_match
+
+
+def _strategy(result, delay=0.0, calls=None):
+    def run(cancel):
+        if calls is not None:
+            calls.append(result)
+        time.sleep(delay)
+        return result
+    return run
+
+
+def test_higher_priority_match_wins_even_if_slower():
+    strategies = [_strategy(None), _strategy("slow", delay=0.1), _strategy("fast")]
+    assert first_match(strategies, width=3) == "slow"
+
+
+def test_returns_none_when_nothing_matches():
+    assert first_match([_strategy(None)] * 5, width=2) is None
+    assert first_match([], width=2) is None
+
+
+def test_runs_strategies_concurrently():
+    strategies = [_strategy(None, delay=0.1) for _ in range(3)] + [_strategy("hit", delay=0.1)]
+    start = time.monotonic()
+    assert first_match(strategies, width=4) == "hit"
+    assert time.monotonic() - start < 0.3
+
+
+def test_later_strategies_are_not_started_after_a_match():
+    calls = []
+    gate = threading.Event()
+
+    def blocked(cancel):
+        gate.wait(1)
+        return None
+
+    strategies = [_strategy("hit", calls=calls), blocked] + [_strategy(i, calls=calls) for i in range(10)]
+    assert first_match(strategies, width=2) == "hit"
+    gate.set()
+    assert calls == ["hit"]
+
+
+def test_running_strategies_are_told_to_stop_after_a_match():
+    started = threading.Event()
+    seen = []
+
+    def slow(cancel):
+        started.set()
+        time.sleep(0.1)
+        seen.append(cancel.is_set())
+        return None
+
+    def hit(cancel):
+        started.wait(1)
+        return "hit"
+
+    assert first_match([hit, slow], width=2) == "hit"
+    time.sleep(0.2)
+    assert seen == [True]
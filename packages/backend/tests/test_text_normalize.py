@@ -0,0 +1,28 @@
+"""
+Tests for the shared fuzzy-matching text normalization.
+To run:  pytest tests/test_text_normalize.py -v
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scripts"))
+
+from text_normalize import normalize, strip_accents
+
+
+def test_normalize_strips_accents_punctuation_and_case():
+    assert normalize("Éthiopiques, Vol. 4") == "ethiopiques vol 4"
+    assert normalize("  Duke Ellington & John Coltrane ") == "duke ellington and john coltrane"
+    assert normalize("Don't Explain") == "don t explain"
+    assert normalize("Mingus Ah Um (Legacy Edition)") == "mingus ah um legacy edition"
+
+
+def test_normalize_keeps_non_latin_letters():
+    assert normalize("Ryo Fukui – 「Scenery」") == "ryo fukui scenery"
+    assert normalize("Ντίνος") == "ντινος"
+
+
+def test_strip_accents_keeps_case_and_punctuation():
+    assert strip_accents(" Éthiopiques, Vol. 4 ") == "Ethiopiques, Vol. 4"
+    assert strip_accents("Kind of Blue") == "Kind of Blue"
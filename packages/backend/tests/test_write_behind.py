@@ -0,0 +1,97 @@
+"""
+Tests for the write-behind buffer behind the enrichment scripts' album updates.
+To run:  pytest tests/test_write_behind.py -v
+"""
+
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+from postgrest.exceptions import APIError
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scripts"))
+
+import write_behind
+from write_behind import WriteBehindBuffer
+
+
+class FakeAlbumsTable:
+    """Just enough of the Supabase query builder for WriteBehindBuffer."""
+
+    def __init__(self, failures=()):
+        self.upserts = []
+        self.failures = list(failures)
+        self._lock = threading.Lock()
+        self._pending = None
+
+    def table(self, name):
+        assert name == "albums"
+        return self
+
+    def upsert(self, rows, on_conflict=""):
+        assert on_conflict == "album_id"
+        self._pending = rows
+        return self
+
+    def execute(self):
+        with self._lock:
+            if self.failures:
+                raise self.failures.pop(0)
+            self.upserts.append(self._pending)
+        return SimpleNamespace(data=self._pending)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(write_behind.time, "sleep", lambda seconds: None)
+
+
+def test_updates_are_grouped_by_changed_columns():
+    client = FakeAlbumsTable()
+    with WriteBehindBuffer(client, batch_size=10, interval=60) as writes:
+        writes.update("a", {"cover_image_url": "a.jpg"})
+        writes.update("b", {"streaming_link_apple": "apple/b", "apple_link_is_substitute": False})
+        writes.update("c", {"cover_image_url": "c.jpg"})
+        writes.update("a", {"album_summary": "..."})
+
+    assert client.upserts == [
+        [{"album_id": "a", "album_summary": "...", "cover_image_url": "a.jpg"}],
+        [{"album_id": "b", "streaming_link_apple": "apple/b", "apple_link_is_substitute": False}],
+        [{"album_id": "c", "cover_image_url": "c.jpg"}],
+    ]
+    assert writes.written == 3
+
+
+def test_full_batches_are_written_without_waiting_for_the_interval():
+    client = FakeAlbumsTable()
+    writes = WriteBehindBuffer(client, batch_size=2, interval=60)
+    writes.update("a", {"cover_image_url": "a.jpg"})
+    writes.update("b", {"cover_image_url": "b.jpg"})
+    for _ in range(200):
+        if client.upserts:
+            break
+        threading.Event().wait(0.01)
+    assert client.upserts == [[{"album_id": "a", "cover_image_url": "a.jpg"},
+                               {"album_id": "b", "cover_image_url": "b.jpg"}]]
+    writes.close()
+
+
+def test_transient_errors_are_retried():
+    client = FakeAlbumsTable(failures=[
+        ConnectionError("connection reset"),
+        APIError({"code": "40001", "message": "could not serialize access"}),
+    ])
+    with WriteBehindBuffer(client, batch_size=10, interval=60) as writes:
+        writes.update("a", {"cover_image_url": "a.jpg"})
+    assert client.upserts == [[{"album_id": "a", "cover_image_url": "a.jpg"}]]
+
+
+def test_permanent_errors_fail_on_close():
+    client = FakeAlbumsTable(failures=[APIError({"code": "23514", "message": "check violation"})])
+    writes = WriteBehindBuffer(client, batch_size=10, interval=60)
+    writes.update("a", {"apple_link_confidence": 2})
+    with pytest.raises(RuntimeError, match="1 albums update"):
+        writes.close()
+    assert client.upserts == []
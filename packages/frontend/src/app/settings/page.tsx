@@ -18,8 +18,13 @@ import {
 import { createClient } from "@/lib/supabase/client";
 import { useRouter } from "next/navigation";
 
+const HOURS = Array.from({ length: 24 }, (_, hour) => hour);
+
 export default function SettingsPage() {
     const [frequency, setFrequency] = useState("weekly");
+    const [sendHour, setSendHour] = useState(6);
+    const [timezone, setTimezone] = useState("Europe/Zurich");
+    const [browserTimezone, setBrowserTimezone] = useState<string | null>(null);
     const [user, setUser] = useState<{ id: string } | null>(null);
     const [initialLoading, setInitialLoading] = useState(true);
     const [loading, setLoading] = useState(false);
@@ -30,6 +35,10 @@ export default function SettingsPage() {
     const router = useRouter();
     const supabase = createClient();
 
+    useEffect(() => {
+        setBrowserTimezone(Intl.DateTimeFormat().resolvedOptions().timeZone);
+    }, []);
+
     useEffect(() => {
         const getUser = async () => {
             const { data: { user } } = await supabase.auth.getUser();
@@ -37,11 +46,13 @@ export default function SettingsPage() {
                 setUser(user);
                 const { data } = await supabase
                     .from("users")
-                    .select("newsletter_frequency")
+                    .select("newsletter_frequency, send_hour, timezone")
                     .eq("user_id", user.id)
                     .single();
                 if (data) {
                     setFrequency(data.newsletter_frequency);
+                    setSendHour(data.send_hour);
+                    setTimezone(data.timezone);
                 }
             }
             setInitialLoading(false);
@@ -56,9 +67,10 @@ export default function SettingsPage() {
         setLoading(true);
 
         if (user) {
+            // The send hour is saved in the time zone shown, which only changes on request
             const { error } = await supabase
                 .from("users")
-                .update({ newsletter_frequency: frequency })
+                .update({ newsletter_frequency: frequency, send_hour: sendHour, timezone })
                 .eq("user_id", user.id);
 
             if (error) {
@@ -78,7 +90,7 @@ export default function SettingsPage() {
 
         const { data: userData } = await supabase
             .from("users")
-            .select("email, name, subscription_status, newsletter_frequency, created_at")
+            .select("email, name, subscription_status, newsletter_frequency, send_hour, timezone, created_at")
             .eq("user_id", user.id)
             .single();
 
@@ -110,6 +122,8 @@ export default function SettingsPage() {
         router.refresh();
     };
 
+    const sendTime = formatHour(sendHour);
+
     if (initialLoading) {
         return (
             <div className="flex items-center justify-center min-h-screen">
@@ -138,7 +152,7 @@ export default function SettingsPage() {
             <div className="w-full max-w-md p-8 space-y-8 bg-card rounded-lg shadow-md">
                 <div className="text-center">
                     <h1 className="text-3xl font-bold">Newsletter Settings</h1>
-                    <p className="mt-2 text-sm text-muted-foreground">Choose how often you want to receive the newsletter.</p>
+                    <p className="mt-2 text-sm text-muted-foreground">Choose how often and when you want to receive the newsletter.</p>
                 </div>
                 <form onSubmit={handleSave} className="space-y-6">
                     {message && (
@@ -150,23 +164,49 @@ export default function SettingsPage() {
                                 <RadioGroupItem value="daily" id="daily" />
                                 <Label htmlFor="daily">Daily</Label>
                             </div>
-                            <p className="text-xs text-muted-foreground ml-6 mt-0.5">Every day at 6:00</p>
+                            <p className="text-xs text-muted-foreground ml-6 mt-0.5">Every day at {sendTime}</p>
                         </div>
                         <div>
                             <div className="flex items-center space-x-2">
                                 <RadioGroupItem value="weekly" id="weekly" />
                                 <Label htmlFor="weekly">Weekly</Label>
                             </div>
-                            <p className="text-xs text-muted-foreground ml-6 mt-0.5">Every Monday at 6:00</p>
+                            <p className="text-xs text-muted-foreground ml-6 mt-0.5">Every Monday at {sendTime}</p>
                         </div>
                         <div>
                             <div className="flex items-center space-x-2">
                                 <RadioGroupItem value="monthly" id="monthly" />
                                 <Label htmlFor="monthly">Monthly</Label>
                             </div>
-                            <p className="text-xs text-muted-foreground ml-6 mt-0.5">1st of each month at 6:00</p>
+                            <p className="text-xs text-muted-foreground ml-6 mt-0.5">1st of each month at {sendTime}</p>
                         </div>
                     </RadioGroup>
+                    <div className="space-y-2">
+                        <Label htmlFor="send-hour">Delivery time</Label>
+                        <select
+                            id="send-hour"
+                            value={sendHour}
+                            onChange={(e) => setSendHour(Number(e.target.value))}
+                            className="border-input h-9 w-full rounded-md border bg-transparent px-3 py-1 text-base shadow-xs outline-none focus-visible:border-ring focus-visible:ring-ring/50 focus-visible:ring-[3px] md:text-sm"
+                        >
+                            {HOURS.map((hour) => (
+                                <option key={hour} value={hour}>{formatHour(hour)}</option>
+                            ))}
+                        </select>
+                        <p className="text-xs text-muted-foreground">
+                            Your local time ({timezone}).
+                        </p>
+                        {browserTimezone && browserTimezone !== timezone && (
+                            <Button
+                                type="button"
+                                variant="link"
+                                className="h-auto p-0 text-xs"
+                                onClick={() => setTimezone(browserTimezone)}
+                            >
+                                Use this browser&apos;s time zone ({browserTimezone})
+                            </Button>
+                        )}
+                    </div>
                     <Button type="submit" className="w-full" disabled={loading}>
                         {loading ? "Saving..." : "Save Settings"}
                     </Button>
@@ -231,3 +271,7 @@ export default function SettingsPage() {
         </div>
     );
 }
+
+function formatHour(hour: number) {
+    return `${hour}:00`;
+}
@@ -0,0 +1,80 @@
+-- ============================================================
+-- Indexes for per-user recommendation history lookups
+-- ============================================================
+
+CREATE INDEX IF NOT EXISTS recommendations_user_sent_date_idx
+  ON recommendations (user_id, sent_date DESC);
+
+CREATE INDEX IF NOT EXISTS recommendations_user_album_idx
+  ON recommendations (user_id, album_id);
+
+-- ============================================================
+-- RPC function: next album for many users at once
+-- ============================================================
+-- For each user, returns the first unsent streamable album whose
+-- calendar_order is after the last one sent, wrapping around to the
+-- first unsent album in sequence (NULL calendar_order last). Users who
+-- have already received every streamable album get their history
+-- cleared first and start over (history_reset = true).
+
+CREATE OR REPLACE FUNCTION public.next_albums_for_users(p_user_ids UUID[])
+RETURNS TABLE (user_id UUID, album_id UUID, history_reset BOOLEAN) AS $$
+#variable_conflict use_column
+DECLARE
+  v_reset UUID[];
+BEGIN
+  SELECT COALESCE(array_agg(u.id), '{}') INTO v_reset
+  FROM unnest(p_user_ids) AS u(id)
+  WHERE EXISTS (
+      SELECT 1 FROM public.albums a
+      WHERE a.streaming_link_spotify IS NOT NULL OR a.streaming_link_apple IS NOT NULL
+    )
+    AND NOT EXISTS (
+      SELECT 1 FROM public.albums a
+      WHERE (a.streaming_link_spotify IS NOT NULL OR a.streaming_link_apple IS NOT NULL)
+        AND NOT EXISTS (
+          SELECT 1 FROM public.recommendations r
+          WHERE r.user_id = u.id AND r.album_id = a.album_id
+        )
+    );
+
+  DELETE FROM public.recommendations r WHERE r.user_id = ANY(v_reset);
+
+  RETURN QUERY
+  WITH streamable AS (
+    SELECT a.album_id, a.calendar_order
+    FROM public.albums a
+    WHERE a.streaming_link_spotify IS NOT NULL OR a.streaming_link_apple IS NOT NULL
+  ),
+  last_sent AS (
+    SELECT u.id AS uid, (
+      SELECT a.calendar_order
+      FROM public.recommendations r
+      JOIN public.albums a ON a.album_id = r.album_id
+      WHERE r.user_id = u.id
+      ORDER BY r.sent_date DESC
+      LIMIT 1
+    ) AS last_order
+    FROM unnest(p_user_ids) AS u(id)
+  )
+  SELECT ls.uid, pick.album_id, ls.uid = ANY(v_reset)
+  FROM last_sent ls
+  LEFT JOIN LATERAL (
+    SELECT s.album_id
+    FROM streamable s
+    WHERE NOT EXISTS (
+      SELECT 1 FROM public.recommendations r
+      WHERE r.user_id = ls.uid AND r.album_id = s.album_id
+    )
+    ORDER BY
+      COALESCE(s.calendar_order > ls.last_order, FALSE) DESC,
+      s.calendar_order IS NULL,
+      s.calendar_order
+    LIMIT 1
+  ) pick ON TRUE;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Only the sender (service role) may call it: it deletes history rows.
+REVOKE EXECUTE ON FUNCTION public.next_albums_for_users(UUID[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.next_albums_for_users(UUID[]) TO service_role;
@@ -0,0 +1,71 @@
+-- ============================================================
+-- Preferred local send time per user
+-- ============================================================
+-- Defaults match what the settings page has always promised:
+-- 6:00 in Switzerland.
+
+ALTER TABLE users
+  ADD COLUMN send_hour SMALLINT NOT NULL DEFAULT 6
+    CHECK (send_hour BETWEEN 0 AND 23),
+  ADD COLUMN timezone TEXT NOT NULL DEFAULT 'Europe/Zurich';
+
+CREATE OR REPLACE FUNCTION public.validate_user_timezone()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_timezone_names WHERE name = NEW.timezone) THEN
+    RAISE EXCEPTION 'unknown time zone: %', NEW.timezone
+      USING ERRCODE = 'invalid_parameter_value';
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER users_validate_timezone
+  BEFORE INSERT OR UPDATE OF timezone ON users
+  FOR EACH ROW EXECUTE FUNCTION public.validate_user_timezone();
+
+-- ============================================================
+-- RPC function: users due in the current hour
+-- ============================================================
+-- Returns active users whose local time at p_now falls in their
+-- send_hour and whose newsletter_frequency is due on their local date
+-- (weekly: Monday, monthly: the 1st). Users who received a
+-- recommendation in the last 20 hours are left out, so a local hour
+-- that repeats when clocks go back, or a send_hour changed after
+-- today's email, never produces a second email the same day.
+-- Keyset-paged by user_id via p_after / p_limit.
+
+CREATE OR REPLACE FUNCTION public.users_due_at(
+  p_now TIMESTAMPTZ,
+  p_after UUID DEFAULT NULL,
+  p_limit INTEGER DEFAULT 500
+)
+RETURNS TABLE (
+  user_id UUID,
+  email VARCHAR,
+  name VARCHAR,
+  newsletter_frequency VARCHAR,
+  unsubscribe_token UUID
+) AS $$
+  SELECT u.user_id, u.email, u.name, u.newsletter_frequency, u.unsubscribe_token
+  FROM public.users u
+  CROSS JOIN LATERAL (SELECT p_now AT TIME ZONE u.timezone AS local_now) t
+  WHERE u.subscription_status = 'active'
+    AND (p_after IS NULL OR u.user_id > p_after)
+    AND EXTRACT(HOUR FROM t.local_now) = u.send_hour
+    AND (
+      u.newsletter_frequency = 'daily'
+      OR (u.newsletter_frequency = 'weekly' AND EXTRACT(ISODOW FROM t.local_now) = 1)
+      OR (u.newsletter_frequency = 'monthly' AND EXTRACT(DAY FROM t.local_now) = 1)
+    )
+    AND NOT EXISTS (
+      SELECT 1 FROM public.recommendations r
+      WHERE r.user_id = u.user_id
+        AND r.sent_date > p_now - INTERVAL '20 hours'
+    )
+  ORDER BY u.user_id
+  LIMIT p_limit;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+REVOKE EXECUTE ON FUNCTION public.users_due_at(TIMESTAMPTZ, UUID, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.users_due_at(TIMESTAMPTZ, UUID, INTEGER) TO service_role;
@@ -0,0 +1,10 @@
+-- How closely each streaming link matches the album, from 0 to 1:
+-- 1 for links found through a shared UPC barcode, otherwise the search
+-- result's match score. NULL for links set before scoring existed.
+-- The *_is_substitute flags stay as they are for existing readers.
+
+ALTER TABLE albums
+  ADD COLUMN apple_link_confidence REAL
+    CHECK (apple_link_confidence BETWEEN 0 AND 1),
+  ADD COLUMN spotify_link_confidence REAL
+    CHECK (spotify_link_confidence BETWEEN 0 AND 1);
@@ -0,0 +1,51 @@
+-- ============================================================
+-- RPC function: users due in the current hour, with catch-up
+-- ============================================================
+-- Returns active users whose send_hour is at or before their local
+-- hour at p_now, whose newsletter_frequency is due on their local date
+-- (weekly: Monday, monthly: the 1st), and who have not received a
+-- recommendation yet on that local date. A scheduled tick that runs
+-- late, or never runs, is therefore caught up by the next one instead
+-- of skipping that hour's cohort for the day. Users who received a
+-- recommendation in the last 20 hours are still left out, so a changed
+-- time zone or send_hour never produces a second email the same day.
+-- Keyset-paged by user_id via p_after / p_limit.
+
+CREATE OR REPLACE FUNCTION public.users_due_at(
+  p_now TIMESTAMPTZ,
+  p_after UUID DEFAULT NULL,
+  p_limit INTEGER DEFAULT 500
+)
+RETURNS TABLE (
+  user_id UUID,
+  email VARCHAR,
+  name VARCHAR,
+  newsletter_frequency VARCHAR,
+  unsubscribe_token UUID
+) AS $$
+  SELECT u.user_id, u.email, u.name, u.newsletter_frequency, u.unsubscribe_token
+  FROM public.users u
+  CROSS JOIN LATERAL (SELECT p_now AT TIME ZONE u.timezone AS local_now) t
+  WHERE u.subscription_status = 'active'
+    AND (p_after IS NULL OR u.user_id > p_after)
+    AND EXTRACT(HOUR FROM t.local_now) >= u.send_hour
+    AND (
+      u.newsletter_frequency = 'daily'
+      OR (u.newsletter_frequency = 'weekly' AND EXTRACT(ISODOW FROM t.local_now) = 1)
+      OR (u.newsletter_frequency = 'monthly' AND EXTRACT(DAY FROM t.local_now) = 1)
+    )
+    AND NOT EXISTS (
+      SELECT 1 FROM public.recommendations r
+      WHERE r.user_id = u.user_id
+        AND r.sent_date > LEAST(
+          p_now - INTERVAL '20 hours',
+          -- Start of the user's local day
+          date_trunc('day', t.local_now) AT TIME ZONE u.timezone
+        )
+    )
+  ORDER BY u.user_id
+  LIMIT p_limit;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+REVOKE EXECUTE ON FUNCTION public.users_due_at(TIMESTAMPTZ, UUID, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.users_due_at(TIMESTAMPTZ, UUID, INTEGER) TO service_role;